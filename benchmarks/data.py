@@ -0,0 +1,97 @@
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+import models
+
+# Base de datos sintética: 10 historias por PBI y 10 PBIs por sprint, con características
+# aleatorias pero deterministas (misma semilla, mismos datos). Aparte, un sprint grande con más
+# PBIs que un lote de selectinload (500 ids) y una historia en cada uno.
+STORIES_PER_PBI = 10
+PBIS_PER_SPRINT = 10
+LARGE_SPRINT_PBIS = 520
+CHUNK = 5000
+
+
+@dataclass
+class Dataset:
+    stories: int
+    sprint_ids: List[int] = field(default_factory=list)
+    pbi_ids: List[int] = field(default_factory=list)
+    story_ids: List[int] = field(default_factory=list)
+    # Fuera de sprint_ids: los escenarios que eligen un sprint al azar no lo usan
+    large_sprint_id: Optional[int] = None
+
+
+def _chunks(rows: List[dict]):
+    for start in range(0, len(rows), CHUNK):
+        yield rows[start:start + CHUNK]
+
+
+def build(engine: Engine, stories: int, seed: int = 0) -> Dataset:
+    """Inserta `stories` historias (y sus PBIs y sprints) y el sprint grande en una base de datos vacía."""
+    rng = random.Random(seed)
+    n_pbis = max(1, -(-stories // STORIES_PER_PBI))
+    n_sprints = max(1, -(-n_pbis // PBIS_PER_SPRINT))
+    start = date(2025, 1, 6)
+
+    sprints = [
+        {'id': i, 'name': f'Sprint {i}', 'start_date': start + timedelta(weeks=2 * (i - 1)),
+         'end_date': start + timedelta(weeks=2 * i, days=-1)}
+        for i in range(1, n_sprints + 1)
+    ]
+    pbis = [
+        {'id': i, 'title': f'PBI {i}', 'description': f'Descripción del PBI {i}',
+         'sprint_id': (i - 1) // PBIS_PER_SPRINT + 1}
+        for i in range(1, n_pbis + 1)
+    ]
+    rows = [_story(rng, i, (i - 1) // STORIES_PER_PBI + 1) for i in range(1, stories + 1)]
+
+    large_sprint_id = n_sprints + 1
+    large_pbis = [
+        {'id': n_pbis + k, 'title': f'PBI grande {k}', 'description': None, 'sprint_id': large_sprint_id}
+        for k in range(1, LARGE_SPRINT_PBIS + 1)
+    ]
+    large = (
+        [{'id': large_sprint_id, 'name': 'Sprint grande', 'start_date': None, 'end_date': None}],
+        large_pbis,
+        [_story(rng, stories + k, pbi['id']) for k, pbi in enumerate(large_pbis, start=1)],
+    )
+
+    with engine.begin() as conn:
+        for table, data, extra in zip((models.Sprint, models.PBI, models.Story), (sprints, pbis, rows), large):
+            for chunk in _chunks(data + extra):
+                conn.execute(insert(table.__table__), chunk)
+
+    return Dataset(
+        stories=stories,
+        sprint_ids=[s['id'] for s in sprints],
+        pbi_ids=[p['id'] for p in pbis],
+        story_ids=[r['id'] for r in rows],
+        large_sprint_id=large_sprint_id,
+    )
+
+
+def _story(rng: random.Random, i: int, pbi_id: int) -> dict:
+    described = rng.random() < 0.5
+    return {
+        'id': i,
+        'title': f'Historia {i}',
+        'raw_description': f'Como usuario quiero la funcionalidad {i} para completar mi trabajo',
+        'formatted_description': f'Historia {i} descrita' if described else None,
+        'acceptance_criteria': 'Criterio 1\nCriterio 2' if described else None,
+        'criticity': rng.randint(1, 5),
+        'story_points': rng.choice((1, 2, 3, 5, 8, 13)),
+        'business_value': rng.randint(1, 10),
+        'complexity': rng.randint(1, 5),
+        'story_type': rng.choice((1, 2)),
+        'continuation': rng.randint(0, 1),
+        'internal_dependencies': rng.randint(0, 3),
+        'priority': rng.randint(0, 2),
+        'priority_dirty': False,
+        'pbi_id': pbi_id,
+    }
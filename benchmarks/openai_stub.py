@@ -0,0 +1,86 @@
+import json
+import time
+import asyncio
+from typing import Any, Dict
+
+import httpx
+
+# Respuestas fijas de la API de chat de OpenAI servidas dentro del proceso con
+# httpx.MockTransport: los endpoints LLM se miden sin red ni coste.
+SPRINT_GOAL = 'Completar el flujo de autenticación con sesiones seguras'
+DESCRIPTION = json.dumps({
+    'historia': 'Como usuario quiero iniciar sesión para acceder a mis datos',
+    'criterios': ['El formulario valida el correo', 'Tras tres intentos fallidos se bloquea la cuenta'],
+}, ensure_ascii=False)
+STREAM_CHUNKS = 8
+
+
+def _content(body: Dict[str, Any]) -> str:
+    prompt = body['messages'][-1]['content']
+    return DESCRIPTION if 'JSON' in prompt else SPRINT_GOAL
+
+
+def _completion(body: Dict[str, Any]) -> httpx.Response:
+    return httpx.Response(200, json={
+        'id': 'chatcmpl-benchmark',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body['model'],
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': _content(body)},
+            'finish_reason': 'stop',
+        }],
+        'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+    })
+
+
+def _stream(body: Dict[str, Any]) -> httpx.Response:
+    content = _content(body)
+    size = -(-len(content) // STREAM_CHUNKS)
+    events = []
+    for start in range(0, len(content), size):
+        chunk = {
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': body['model'],
+            'choices': [{'index': 0, 'delta': {'content': content[start:start + size]}, 'finish_reason': None}],
+        }
+        events.append(f'data: {json.dumps(chunk, ensure_ascii=False)}\n\n')
+    events.append('data: [DONE]\n\n')
+    return httpx.Response(200, headers={'content-type': 'text/event-stream'}, content=''.join(events).encode())
+
+
+def _respond(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    return _stream(body) if body.get('stream') else _completion(body)
+
+
+def install(latency_s: float = 0.0) -> None:
+    """
+    Sustituye los clientes OpenAI de services.ai_services por otros servidos en memoria.
+    `latency_s` simula el tiempo de respuesta del modelo.
+    """
+    from openai import AsyncOpenAI, OpenAI
+    from services import ai_services
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if latency_s:
+            time.sleep(latency_s)
+        return _respond(request)
+
+    async def async_handler(request: httpx.Request) -> httpx.Response:
+        if latency_s:
+            await asyncio.sleep(latency_s)
+        return _respond(request)
+
+    sync_client = OpenAI(
+        api_key='benchmark', max_retries=0, http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    async_client = AsyncOpenAI(
+        api_key='benchmark', max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(async_handler)),
+    )
+    ai_services.get_client = lambda: sync_client
+    ai_services.get_async_client = lambda: async_client
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia de todos los endpoints, dentro del proceso (ASGI + httpx, sin red).
+
+    python -m benchmarks.run --scales 10,1000,100000 --out bench.json
+    python -m benchmarks.run --scales 1000 --only sprints. --iterations 50
+    python -m benchmarks.run --scales 1000 --compare bench.json
+
+Cada escala se mide en un proceso nuevo sobre una base SQLite sintética de ese número de
+historias. OpenAI se sustituye por respuestas fijas en memoria. Por defecto se desactivan la
+caché de respuestas, la caché LLM, el recálculo de prioridades en segundo plano y el vigilante
+del modelo para medir el camino completo; --response-cache y --llm-cache las activan.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger('benchmarks')
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _summary(latencies: List[float], queries: List[int], statuses: Counter, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        'iterations': len(latencies),
+        'status_codes': {str(code): n for code, n in sorted(statuses.items())},
+        'p50_ms': round(_percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(_percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(_percentile(ordered, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else 0.0,
+    }
+
+
+# --- Proceso de una escala ---
+
+class QueryCounter:
+    """Cuenta las sentencias SQL enviadas por los engines de la aplicación."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    def attach(self) -> None:
+        from sqlalchemy import event
+        import database
+
+        engines = {id(e): e for e in (database.engine, database.read_engine)}
+        if database.DB_ASYNC:
+            async_engine = database.get_async_engine().sync_engine
+            engines[id(async_engine)] = async_engine
+        for engine in engines.values():
+            event.listen(engine, 'before_cursor_execute', self)
+
+
+async def _measure(client, scenario, ctx, iterations: int, warmup: int, counter: QueryCounter) -> Dict[str, Any]:
+    for i in range(warmup):
+        method, url, kwargs = scenario.request(ctx, -1 - i)
+        response = await client.request(method, url, **kwargs)
+        if scenario.collect:
+            scenario.collect(ctx, response)
+
+    latencies: List[float] = []
+    queries: List[int] = []
+    statuses: Counter = Counter()
+    started = time.perf_counter()
+    for i in range(iterations):
+        method, url, kwargs = scenario.request(ctx, i)
+        before = counter.count
+        t0 = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies.append(time.perf_counter() - t0)
+        queries.append(counter.count - before)
+        statuses[response.status_code] += 1
+        if scenario.collect:
+            scenario.collect(ctx, response)
+    return _summary(latencies, queries, statuses, time.perf_counter() - started)
+
+
+async def _measure_concurrent(client, scenario, ctx, iterations: int, concurrency: int) -> Dict[str, Any]:
+    pending = list(range(iterations))
+    statuses: Counter = Counter()
+    latencies: List[float] = []
+
+    async def worker() -> None:
+        while pending:
+            i = pending.pop()
+            method, url, kwargs = scenario.request(ctx, i)
+            t0 = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - t0)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = _summary(latencies, [], statuses, time.perf_counter() - started)
+    summary.pop('queries_per_request')
+    return {'concurrency': concurrency, **summary}
+
+
+async def _run_scenarios(app, dataset, args) -> Dict[str, Any]:
+    import httpx
+    import database
+    from benchmarks.scenarios import SCENARIOS, Context
+    from services import describe_jobs
+
+    counter = QueryCounter()
+    counter.attach()
+    ctx = Context(data=dataset, rng=random.Random(args.seed))
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+        for scenario in SCENARIOS:
+            if args.only and not any(scenario.name.startswith(prefix) for prefix in args.only):
+                continue
+            iterations = min(args.iterations, scenario.iterations or args.iterations)
+            logger.info(f"{scenario.name}: {iterations} peticiones")
+            result = await _measure(client, scenario, ctx, iterations, min(args.warmup, iterations), counter)
+            if args.concurrency > 1 and scenario.read_only:
+                result['concurrent'] = await _measure_concurrent(
+                    client, scenario, ctx, iterations, args.concurrency
+                )
+            results[scenario.name] = {'method': scenario.method, 'route': scenario.route, **result}
+            # Los trabajos de descripción lanzados siguen en este bucle: que terminen antes del siguiente
+            await describe_jobs.wait_all()
+    if database.DB_ASYNC:
+        # Las conexiones aiosqlite tienen hilos propios que impedirían terminar el proceso
+        await database.get_async_engine().dispose()
+    return results
+
+
+def _uncovered_routes(app) -> List[str]:
+    from benchmarks.scenarios import SCENARIOS
+
+    covered = {(s.method, s.route) for s in SCENARIOS}
+    missing = []
+    for route in app.routes:
+        for method in sorted(getattr(route, 'methods', None) or ()):
+            if method == 'HEAD' or route.path in ('/openapi.json', '/docs', '/docs/oauth2-redirect', '/redoc'):
+                continue
+            if (method, route.path) not in covered:
+                missing.append(f'{method} {route.path}')
+    return missing
+
+
+def run_scale(args) -> Dict[str, Any]:
+    """Mide una escala en este proceso (el entorno ya apunta a su base de datos)."""
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)
+
+    import main
+    import database
+    from benchmarks import data, openai_stub
+    from services.ai_services import priority_models
+
+    main.init_db()
+    started = time.perf_counter()
+    dataset = data.build(database.engine, args.scale, seed=args.seed)
+    build_s = time.perf_counter() - started
+    logger.info(f"Base sintética: {args.scale} historias en {build_s:.1f}s")
+    openai_stub.install(args.llm_latency_ms / 1000)
+    # El modelo se carga fuera de la medida (como en serve.py)
+    priority_models.current()
+
+    scenarios = asyncio.run(_run_scenarios(main.app, dataset, args))
+    return {
+        'stories': args.scale,
+        'sprints': len(dataset.sprint_ids),
+        'pbis': len(dataset.pbi_ids),
+        'build_s': round(build_s, 2),
+        'scenarios': scenarios,
+        'uncovered_routes': _uncovered_routes(main.app),
+    }
+
+
+# --- Orquestación ---
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _scale_env(args, db_path: Path) -> Dict[str, str]:
+    env = {
+        **os.environ,
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'OPENAI_API_KEY': 'benchmark',
+        'PRIORITY_RESCORE_ENABLED': 'false',
+        'MODEL_WATCH_INTERVAL_S': '0',
+        'RESPONSE_CACHE_ENABLED': 'true' if args.response_cache else 'false',
+        'LLM_CACHE_ENABLED': 'true' if args.llm_cache else 'false',
+        'DB_ASYNC': 'true' if args.db_async else 'false',
+        # Un N+1 nuevo hace fallar el escenario en lugar de solo ralentizarlo
+        'SQL_BUDGET_MODE': os.environ.get('SQL_BUDGET_MODE', 'raise'),
+    }
+    env.pop('READ_DATABASE_URL', None)
+    env.pop('ASYNC_DATABASE_URL', None)
+    return env
+
+
+def _child_args(args, scale: int, output: Path) -> List[str]:
+    argv = [
+        sys.executable, '-m', 'benchmarks.run', '--scale', str(scale), '--scale-output', str(output),
+        '--iterations', str(args.iterations), '--warmup', str(args.warmup),
+        '--concurrency', str(args.concurrency), '--seed', str(args.seed),
+        '--llm-latency-ms', str(args.llm_latency_ms),
+    ]
+    for prefix in args.only or ():
+        argv += ['--only', prefix]
+    return argv
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Imprime la variación de p50/p95 frente a `baseline` y devuelve los escenarios cuyo p95 empeora
+    más de `threshold` (relativo) y de `min_delta_ms` (absoluto, para no señalar ruido submilisegundo).
+    """
+    regressions = []
+    print(f"\n{'escala':>8} {'escenario':<28}{'p50 ms':>16}{'p95 ms':>22}{'consultas':>12}")
+    for scale, result in current['scales'].items():
+        base_scale = baseline.get('scales', {}).get(scale)
+        if not base_scale:
+            continue
+        for name, now in result['scenarios'].items():
+            before = base_scale['scenarios'].get(name)
+            if not before:
+                continue
+            change = (now['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+            worse = change > threshold and now['p95_ms'] - before['p95_ms'] > min_delta_ms
+            flag = ' <-' if worse else ''
+            print(f"{scale:>8} {name:<28}{before['p50_ms']:>7.2f} -> {now['p50_ms']:<7.2f}"
+                  f"{before['p95_ms']:>9.2f} -> {now['p95_ms']:<7.2f}{change:>+6.0%}"
+                  f"{before['queries_per_request']:>6.1f} -> {now['queries_per_request']:<5.1f}{flag}")
+            if flag:
+                regressions.append(f'{scale}:{name}')
+    return regressions
+
+
+def _print_table(result: Dict[str, Any]) -> None:
+    for scale, data in result['scales'].items():
+        print(f"\n{scale} historias ({data['sprints']} sprints, {data['pbis']} PBIs)")
+        print(f"{'escenario':<28}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'SQL':>7}  estados")
+        for name, s in data['scenarios'].items():
+            rps = s.get('concurrent', s)['throughput_rps']
+            print(f"{name:<28}{s['iterations']:>6}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}"
+                  f"{rps:>10.1f}{s['queries_per_request']:>7.1f}  {s['status_codes']}")
+        if data['uncovered_routes']:
+            print(f"Rutas sin escenario: {', '.join(data['uncovered_routes'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de endpoints en proceso")
+    parser.add_argument('--scales', default='10,1000', help="Número de historias por escala, separado por comas")
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8, help="Peticiones simultáneas en la fase de throughput (1 = sin ella)")
+    parser.add_argument('--only', action='append', help="Solo escenarios con este prefijo (repetible)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="Latencia simulada de OpenAI")
+    parser.add_argument('--db-async', action='store_true', help="Rutas CRUD con AsyncSession (DB_ASYNC=true)")
+    parser.add_argument('--response-cache', action='store_true')
+    parser.add_argument('--llm-cache', action='store_true')
+    parser.add_argument('--out', type=Path, help="Fichero JSON de resultados")
+    parser.add_argument('--compare', type=Path, help="Resultados anteriores con los que comparar")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Empeoramiento de p95 que se señala (0.2 = 20%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help="Empeoramiento absoluto mínimo de p95 que se señala")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--scale', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--scale-output', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scale is not None:
+        args.scale_output.write_text(json.dumps(run_scale(args)))
+        return
+
+    result: Dict[str, Any] = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'db_async': args.db_async,
+            'response_cache': args.response_cache,
+            'llm_cache': args.llm_cache,
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'concurrency': args.concurrency,
+            'llm_latency_ms': args.llm_latency_ms,
+            'seed': args.seed,
+        },
+        'scales': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='planning-bench-') as tmp:
+        for scale in (int(s) for s in args.scales.split(',')):
+            db_path = Path(tmp) / f'bench-{scale}.db'
+            output = Path(tmp) / f'bench-{scale}.json'
+            logger.info(f"Escala {scale} historias")
+            subprocess.run(_child_args(args, scale, output), cwd=ROOT, env=_scale_env(args, db_path), check=True)
+            result['scales'][str(scale)] = json.loads(output.read_text())
+
+    _print_table(result)
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        logger.info(f"Resultados guardados en {args.out}")
+    if args.compare:
+        regressions = compare(result, json.loads(args.compare.read_text()), args.threshold, args.min_delta_ms)
+        if regressions:
+            logger.warning(f"p95 peor que la referencia en más de {args.threshold:.0%}: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
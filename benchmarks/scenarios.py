@@ -0,0 +1,191 @@
+import random
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.data import Dataset
+
+# Una petición: (método, url, kwargs para httpx)
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class Context:
+    data: Dataset
+    rng: random.Random
+    created_sprints: List[int] = field(default_factory=list)
+    created_pbis: List[int] = field(default_factory=list)
+    created_stories: List[int] = field(default_factory=list)
+    job_ids: List[str] = field(default_factory=list)
+
+    def sprint(self) -> int:
+        return self.rng.choice(self.data.sprint_ids)
+
+    def pbi(self) -> int:
+        return self.rng.choice(self.data.pbi_ids)
+
+    def story(self) -> int:
+        return self.rng.choice(self.data.story_ids)
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    route: str                                   # ruta de la app que cubre (para el informe de cobertura)
+    request: Callable[[Context, int], Request]
+    collect: Optional[Callable[[Context, httpx.Response], None]] = None
+    read_only: bool = False                      # apto para la fase concurrente
+    iterations: Optional[int] = None             # límite propio (escenarios lentos o destructivos)
+
+
+STORY = {
+    'title': 'Historia de benchmark', 'raw_description': 'Como usuario quiero exportar mis datos a CSV',
+    'criticity': 3, 'story_points': 5, 'business_value': 7, 'complexity': 2,
+    'story_type': 1, 'continuation': 0, 'internal_dependencies': 1,
+}
+PRIORITY = {
+    'story_points': 5, 'business_value': 7, 'criticidad': 3,
+    'internal_dependencies': 1, 'continuation': 0, 'story_type': 'user',
+}
+BULK_SIZE = 20
+IMPORT_ROWS = 1000
+
+
+def _import_body(ctx: Context, i: int) -> Request:
+    # Claves propias por iteración: cada petición inserta IMPORT_ROWS historias nuevas
+    lines = ['key,sprint,pbi,title,criticity,story_points,business_value,story_type']
+    lines += [f'bench-{i}-{k},Sprint import {i},PBI import {i}-{k // 10},Historia {k},3,5,7,user'
+              for k in range(IMPORT_ROWS)]
+    return 'POST', '/import', {'content': '\n'.join(lines).encode(), 'headers': {'Content-Type': 'text/csv'}}
+
+
+def _get(url: str, **kwargs) -> Request:
+    return 'GET', url, kwargs
+
+
+def _collect_id(target: str) -> Callable[[Context, httpx.Response], None]:
+    def collect(ctx: Context, response: httpx.Response) -> None:
+        if response.status_code < 300:
+            getattr(ctx, target).append(response.json()['id'])
+    return collect
+
+
+def _collect_job(ctx: Context, response: httpx.Response) -> None:
+    if response.status_code < 300:
+        ctx.job_ids.append(response.json()['job_id'])
+
+
+def _pop(ids: List[int], fallback: Callable[[], int]) -> int:
+    return ids.pop() if ids else fallback()
+
+
+# En orden de ejecución: las creaciones van antes de los borrados que consumen sus ids
+SCENARIOS: List[Scenario] = [
+    # --- Sprints ---
+    Scenario('sprints.create', 'POST', '/sprints/sprints/',
+             lambda ctx, i: ('POST', '/sprints/sprints/', {'json': {'name': f'Bench {i}', 'start_date': '2025-06-02'}}),
+             collect=_collect_id('created_sprints')),
+    Scenario('sprints.list', 'GET', '/sprints/sprints/',
+             lambda ctx, i: _get('/sprints/sprints/'), read_only=True, iterations=20),
+    Scenario('sprints.list_page', 'GET', '/sprints/sprints/',
+             lambda ctx, i: _get('/sprints/sprints/', params={'limit': 20, 'after_id': ctx.sprint() - 1}),
+             read_only=True),
+    Scenario('sprints.list_ndjson', 'GET', '/sprints/sprints/',
+             lambda ctx, i: _get('/sprints/sprints/', params={'depth': 0},
+                                 headers={'Accept': 'application/x-ndjson'}),
+             read_only=True, iterations=50),
+    Scenario('sprints.get', 'GET', '/sprints/sprints/{sprint_id}',
+             lambda ctx, i: _get(f'/sprints/sprints/{ctx.sprint()}'), read_only=True),
+    Scenario('sprints.get_depth0', 'GET', '/sprints/sprints/{sprint_id}',
+             lambda ctx, i: _get(f'/sprints/sprints/{ctx.sprint()}', params={'depth': 0, 'fields': 'name'}),
+             read_only=True),
+    Scenario('sprints.stats', 'GET', '/sprints/sprints/{sprint_id}/stats',
+             lambda ctx, i: _get(f'/sprints/sprints/{ctx.sprint()}/stats'), read_only=True),
+    Scenario('sprints.update', 'PUT', '/sprints/sprints/{sprint_id}',
+             lambda ctx, i: ('PUT', f'/sprints/sprints/{ctx.sprint()}', {'json': {'name': f'Sprint editado {i}'}})),
+    # Sprint con más de 500 PBIs: las sentencias SQL no deben crecer con los lotes de selectinload
+    Scenario('sprints.get_large', 'GET', '/sprints/sprints/{sprint_id}',
+             lambda ctx, i: _get(f'/sprints/sprints/{ctx.data.large_sprint_id}'), read_only=True, iterations=20),
+    Scenario('sprints.list_page_large', 'GET', '/sprints/sprints/',
+             lambda ctx, i: _get('/sprints/sprints/', params={'limit': 5, 'after_id': ctx.data.large_sprint_id - 1}),
+             read_only=True, iterations=20),
+    Scenario('sprints.update_large', 'PUT', '/sprints/sprints/{sprint_id}',
+             lambda ctx, i: ('PUT', f'/sprints/sprints/{ctx.data.large_sprint_id}', {'json': {'name': f'Grande {i}'}}),
+             iterations=20),
+
+    # --- PBIs ---
+    Scenario('pbis.create', 'POST', '/pbis/pbis/',
+             lambda ctx, i: ('POST', '/pbis/pbis/', {'json': {'title': f'PBI bench {i}', 'sprint_id': ctx.sprint()}}),
+             collect=_collect_id('created_pbis')),
+    Scenario('pbis.by_sprint', 'GET', '/pbis/pbis/by_sprint/{sprint_id}',
+             lambda ctx, i: _get(f'/pbis/pbis/by_sprint/{ctx.sprint()}'), read_only=True),
+    Scenario('pbis.get', 'GET', '/pbis/pbis/{pbi_id}',
+             lambda ctx, i: _get(f'/pbis/pbis/{ctx.pbi()}'), read_only=True),
+    Scenario('pbis.update', 'PUT', '/pbis/pbis/{pbi_id}',
+             lambda ctx, i: ('PUT', f'/pbis/pbis/{ctx.pbi()}', {'json': {'description': f'Editado {i}'}})),
+
+    # --- Historias ---
+    Scenario('stories.create', 'POST', '/stories/stories/{pbi_id}',
+             lambda ctx, i: ('POST', f'/stories/stories/{ctx.pbi()}', {'json': STORY}),
+             collect=_collect_id('created_stories')),
+    Scenario('stories.create_bulk', 'POST', '/stories/stories/bulk/{pbi_id}',
+             lambda ctx, i: ('POST', f'/stories/stories/bulk/{ctx.pbi()}', {'json': [STORY] * BULK_SIZE})),
+    Scenario('stories.by_pbi', 'GET', '/stories/stories/by_pbi/{pbi_id}',
+             lambda ctx, i: _get(f'/stories/stories/by_pbi/{ctx.pbi()}'), read_only=True),
+    Scenario('stories.get', 'GET', '/stories/stories/{story_id}',
+             lambda ctx, i: _get(f'/stories/stories/{ctx.story()}'), read_only=True),
+    Scenario('stories.update', 'PUT', '/stories/stories/{story_id}',
+             lambda ctx, i: ('PUT', f'/stories/stories/{ctx.story()}', {'json': {'story_points': 1 + i % 13}})),
+    Scenario('stories.update_bulk', 'PATCH', '/stories/stories/bulk',
+             lambda ctx, i: ('PATCH', '/stories/stories/bulk', {'json': [
+                 {'id': ctx.story(), 'business_value': 1 + (i + k) % 10} for k in range(BULK_SIZE)
+             ]})),
+
+    # --- ML y LLM (OpenAI sustituido por openai_stub) ---
+    Scenario('ml.prioridad', 'POST', '/ml/ml/prioridad/',
+             lambda ctx, i: ('POST', '/ml/ml/prioridad/', {'json': {**PRIORITY, 'story_points': 1 + i % 13}}),
+             read_only=True),
+    Scenario('ml.calcular_prioridades', 'POST', '/ml/ml/calcular_prioridades/{sprint_id}/',
+             lambda ctx, i: ('POST', f'/ml/ml/calcular_prioridades/{ctx.sprint()}/', {})),
+    Scenario('ml.lookup_check', 'GET', '/ml/ml/prioridad/lookup/check',
+             lambda ctx, i: _get('/ml/ml/prioridad/lookup/check', params={'sample': 256}), iterations=5),
+    Scenario('ml.sprint_goal', 'GET', '/ml/ml/sprint_goal/{sprint_id}',
+             lambda ctx, i: _get(f'/ml/ml/sprint_goal/{ctx.sprint()}'), read_only=True),
+    Scenario('ml.sprint_goal_stream', 'GET', '/ml/ml/sprint_goal/{sprint_id}/stream',
+             lambda ctx, i: _get(f'/ml/ml/sprint_goal/{ctx.sprint()}/stream'), read_only=True),
+    Scenario('ml.describir', 'POST', '/ml/ml/stories/describir_criterios/{story_id}',
+             lambda ctx, i: ('POST', f'/ml/ml/stories/describir_criterios/{ctx.story()}', {})),
+    Scenario('ml.describir_stream', 'POST', '/ml/ml/stories/describir_criterios/{story_id}/stream',
+             lambda ctx, i: ('POST', f'/ml/ml/stories/describir_criterios/{ctx.story()}/stream', {})),
+    Scenario('ml.describir_todo', 'POST', '/ml/ml/sprints/{sprint_id}/describir_todo',
+             lambda ctx, i: ('POST', f'/ml/ml/sprints/{ctx.sprint()}/describir_todo', {}),
+             collect=_collect_job, iterations=20),
+    Scenario('ml.job', 'GET', '/ml/ml/jobs/{job_id}',
+             lambda ctx, i: _get(f'/ml/ml/jobs/{ctx.rng.choice(ctx.job_ids) if ctx.job_ids else "none"}'),
+             read_only=True),
+    Scenario('ml.model', 'GET', '/ml/ml/model', lambda ctx, i: _get('/ml/ml/model'), read_only=True),
+    Scenario('ml.model_reload', 'POST', '/ml/ml/model/reload',
+             lambda ctx, i: ('POST', '/ml/ml/model/reload', {}), iterations=20),
+    Scenario('ml.rescorer_stats', 'GET', '/ml/ml/priority_rescorer/stats',
+             lambda ctx, i: _get('/ml/ml/priority_rescorer/stats'), read_only=True),
+    Scenario('ml.llm_cache_stats', 'GET', '/ml/ml/llm_cache/stats',
+             lambda ctx, i: _get('/ml/ml/llm_cache/stats'), read_only=True),
+
+    Scenario('metrics', 'GET', '/metrics', lambda ctx, i: _get('/metrics'), read_only=True),
+
+    # --- Importación masiva ---
+    Scenario('import.csv', 'POST', '/import', _import_body, iterations=10),
+
+    # --- Borrados (consumen lo creado arriba) ---
+    Scenario('stories.delete', 'DELETE', '/stories/stories/{story_id}',
+             lambda ctx, i: ('DELETE', f'/stories/stories/{_pop(ctx.created_stories, ctx.story)}', {})),
+    Scenario('pbis.delete', 'DELETE', '/pbis/pbis/{pbi_id}',
+             lambda ctx, i: ('DELETE', f'/pbis/pbis/{_pop(ctx.created_pbis, ctx.pbi)}', {})),
+    Scenario('sprints.delete', 'DELETE', '/sprints/sprints/{sprint_id}',
+             lambda ctx, i: ('DELETE', f'/sprints/sprints/{_pop(ctx.created_sprints, ctx.sprint)}', {})),
+
+    # Vuelve a sembrar los datos de ejemplo: siempre el último
+    Scenario('reset_db', 'POST', '/reset-db', lambda ctx, i: ('POST', '/reset-db', {}), iterations=3),
+]
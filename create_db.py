@@ -1,28 +1,45 @@
 #!/usr/bin/env python3
+"""
+Crea las tablas, aplica las migraciones y siembra los datos de ejemplo.
+
+    python create_db.py
+    python create_db.py --import backlog.csv          # además, importa una exportación CSV/JSONL
+    python create_db.py --import backlog.jsonl --chunk-size 10000
+
+Columnas de la exportación (una fila por historia): sprint, sprint_key, sprint_start,
+sprint_end, pbi, pbi_key, pbi_description, title, key y las columnas de la historia
+(raw_description, criticity, story_points, ...). Ver services/bulk_import.py.
+"""
+import json
 import logging
+import argparse
 from datetime import date
 from sqlalchemy.exc import SQLAlchemyError
 
 from database import engine, SessionLocal
-from models import Base, Sprint, PBI, Story
+from migrations import run_migrations
+from models import Base
 from schemas import Criticity, StoryType
+from services.bulk_import import BulkImporter, IMPORT_CHUNK_SIZE, import_file
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
+EXAMPLE_SPRINTS = {
+    "Sprint 1": (date(2025, 4, 1), date(2025, 4, 15)),
+    "Sprint 2": (date(2025, 4, 16), date(2025, 4, 30)),
+}
+
+
+# Mismo camino que la importación masiva, solo inserción: sembrar de nuevo no duplica ni deshace
+# los cambios hechos después en los datos de ejemplo
 def seed_sprints(session):
-    example = {
-        "Sprint 1": (date(2025, 4, 1), date(2025, 4, 15)),
-        "Sprint 2": (date(2025, 4, 16), date(2025, 4, 30)),
-    }
-    for name, (start, end) in example.items():
-        sprint = session.query(Sprint).filter_by(name=name).first()
-        if not sprint:
-            sprint = Sprint(name=name, start_date=start, end_date=end)
-            session.add(sprint)
-            logger.info(f"Sembrando Sprint: {name}")
+    sprints = [{"name": name, "external_key": name, "start_date": start, "end_date": end}
+               for name, (start, end) in EXAMPLE_SPRINTS.items()]
+    BulkImporter(update=False).upsert_sprints(session.connection(), sprints)
     session.commit()
+    logger.info(f"Sembrados {len(sprints)} sprints")
 
 
 def seed_pbis_and_stories(session):
@@ -61,57 +78,63 @@ def seed_pbis_and_stories(session):
         ]
     }
 
+    rows = []
     for sprint_name, pbis in templates.items():
-        sprint = session.query(Sprint).filter_by(name=sprint_name).first()
-        if not sprint:
-            logger.warning(f"Sprint {sprint_name} no encontrado.")
-            continue
-
         for pbi_data in pbis:
-            pbi = session.query(PBI).filter_by(title=pbi_data["title"], sprint_id=sprint.id).first()
-            if not pbi:
-                pbi = PBI(title=pbi_data["title"], description=pbi_data["description"], sprint_id=sprint.id)
-                session.add(pbi)
-                session.flush()
-                logger.info(f"Sembrando PBI: {pbi.title} en {sprint_name}")
-
             for story_data in pbi_data["stories"]:
-                story = session.query(Story).filter_by(title=story_data["title"], pbi_id=pbi.id).first()
-                if not story:
-                    # Calcular prioridad según criticidad
-                    criticity = story_data.get("criticity")
-                    priority = {
-                        Criticity.HIGH: 2,
-                        Criticity.MEDIUM: 1,
-                        Criticity.LOW: 0
-                    }.get(criticity, 1)  # Valor por defecto: MEDIA = 1
-
-                    story_data["priority"] = priority
-
-                    story = Story(**story_data, pbi_id=pbi.id)
-                    session.add(story)
-                    logger.info(f"  - Sembrando Story: {story.title} con prioridad {priority}")
+                # Calcular prioridad según criticidad
+                priority = {
+                    Criticity.HIGH: 2,
+                    Criticity.MEDIUM: 1,
+                    Criticity.LOW: 0
+                }.get(story_data.get("criticity"), 1)  # Valor por defecto: MEDIA = 1
+                rows.append({
+                    **story_data, "sprint": sprint_name, "pbi": pbi_data["title"],
+                    "pbi_description": pbi_data["description"], "priority": priority,
+                })
+
+    importer = BulkImporter(update=False)
+    importer.import_chunk(session.connection(), enumerate(rows, start=1))
     session.commit()
+    logger.info(f"Sembrados {len(importer.pbi_ids)} PBIs y {importer.stats['stories']} historias")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Crea la base de datos y siembra o importa el backlog")
+    parser.add_argument('--import', dest='import_path', metavar='FICHERO',
+                        help="Exportación CSV o JSONL a importar tras sembrar")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="Por defecto, según la extensión")
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help="Filas por transacción")
+    parser.add_argument('--no-seed', action='store_true', help="No siembra los datos de ejemplo")
+    args = parser.parse_args()
+
     try:
         Base.metadata.create_all(bind=engine)
         logger.info("Tablas creadas o existentes.")
+        run_migrations(engine)
     except SQLAlchemyError as err:
         logger.error(f"Error creando tablas: {err}")
         return
 
-    session = SessionLocal()
-    try:
-        seed_sprints(session)
-        seed_pbis_and_stories(session)
-        logger.info("Datos iniciales sembrados correctamente.")
-    except SQLAlchemyError as err:
-        session.rollback()
-        logger.error(f"Error sembrando datos: {err}")
-    finally:
-        session.close()
+    if not args.no_seed:
+        session = SessionLocal()
+        try:
+            seed_sprints(session)
+            seed_pbis_and_stories(session)
+            logger.info("Datos iniciales sembrados correctamente.")
+        except SQLAlchemyError as err:
+            session.rollback()
+            logger.error(f"Error sembrando datos: {err}")
+        finally:
+            session.close()
+
+    if args.import_path:
+        try:
+            report = import_file(engine, args.import_path, args.format, args.chunk_size)
+        except (OSError, ValueError, SQLAlchemyError) as err:
+            logger.error(f"Error importando {args.import_path}: {err}")
+            raise SystemExit(1)
+        print(json.dumps(report, indent=2, ensure_ascii=False))
 
 
 if __name__ == '__main__':
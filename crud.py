@@ -1,13 +1,149 @@
 import logging
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Sequence, Tuple, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Select, insert, or_, select, update
+from sqlalchemy.orm import Session, Query, joinedload, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import SQLAlchemyError
 
 import models
 import schemas
+import response_cache
+import sprint_stats
+from services import priority_rescorer
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for the `limit` of keyset-paginated list endpoints
+MAX_PAGE_SIZE = 500
+# Rows fetched per round trip when streaming from a server-side cursor
+STREAM_BATCH_SIZE = 50
+# Errors that reject one row of a bulk insert; sqlite3 raises OverflowError, unwrapped, for
+# integers beyond 64 bits
+BULK_ROW_ERRORS = (SQLAlchemyError, OverflowError)
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+
+def _keyset(query: Query, key_column, limit: Optional[int], after_id: Optional[int]) -> Query:
+    """Apply keyset pagination (`key > after_id ORDER BY key LIMIT n`) to a query."""
+    if after_id is not None:
+        query = query.filter(key_column > after_id)
+    query = query.order_by(key_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+# Relationships are lazy='raise' in models.py: every query states the loaders it needs.
+
+def _sprint_options(depth: int = 2, fields: Optional[Sequence[str]] = None) -> list:
+    """Loader options for a Sprint view: only the requested columns and nesting levels."""
+    options = []
+    if fields:
+        options.append(load_only(*[getattr(models.Sprint, f) for f in fields]))
+    if depth == 1:
+        options.append(selectinload(models.Sprint.pbis))
+    elif depth >= 2:
+        options.append(selectinload(models.Sprint.pbis).selectinload(models.PBI.stories))
+    return options
+
+
+def _pbi_options(depth: int = 1, fields: Optional[Sequence[str]] = None) -> list:
+    """Loader options for a PBI view: only the requested columns and nesting levels."""
+    options = []
+    if fields:
+        options.append(load_only(*[getattr(models.PBI, f) for f in fields]))
+    if depth >= 1:
+        options.append(selectinload(models.PBI.stories))
+    return options
+
+
+def _sprint_range(sprints: Sequence[models.Sprint]):
+    """`pbis.sprint_id BETWEEN first AND last`. Keyset pages (and the whole table) are contiguous id
+    ranges, so the range matches exactly the Sprints of the page."""
+    ids = [sprint.id for sprint in sprints]
+    return models.PBI.sprint_id.between(min(ids), max(ids))
+
+
+# List views load each nesting level with one query of their own instead of selectinload, which
+# splits the parent ids into batches of 500 and so needs one more statement per 500 parents.
+
+def _pbis_of_sprints(sprints: Sequence[models.Sprint]) -> Select:
+    """The PBIs of `sprints` in one query."""
+    return select(models.PBI).where(_sprint_range(sprints)).order_by(models.PBI.id)
+
+
+def _stories_of_sprints(sprints: Sequence[models.Sprint], columns: Sequence[Any] = ()) -> Select:
+    """The Stories of `sprints` in one query (`pbi_id IN (SELECT id FROM pbis WHERE sprint_id BETWEEN ...)`)."""
+    in_sprints = select(models.PBI.id).where(_sprint_range(sprints))
+    stmt = select(models.Story).where(models.Story.pbi_id.in_(in_sprints)).order_by(models.Story.id)
+    if columns:
+        stmt = stmt.options(load_only(*columns))
+    return stmt
+
+
+def _stories_of_pbis(sprint_id: int, pbis: Sequence[models.PBI]) -> Select:
+    """The Stories of a page of the PBIs of a Sprint in one query."""
+    ids = [pbi.id for pbi in pbis]
+    in_page = select(models.PBI.id).where(models.PBI.sprint_id == sprint_id, models.PBI.id.between(min(ids), max(ids)))
+    return select(models.Story).where(models.Story.pbi_id.in_(in_page)).order_by(models.Story.id)
+
+
+def _assign_pbis(sprints: Sequence[models.Sprint], pbis: Iterable[models.PBI]) -> None:
+    """Set the `pbis` collection of every Sprint from the result of _pbis_of_sprints."""
+    by_sprint: Dict[int, List[models.PBI]] = defaultdict(list)
+    for pbi in pbis:
+        by_sprint[pbi.sprint_id].append(pbi)
+    for sprint in sprints:
+        set_committed_value(sprint, 'pbis', by_sprint.get(sprint.id, []))
+
+
+def _assign_stories(pbis: Iterable[models.PBI], stories: Iterable[models.Story]) -> None:
+    """Set the `stories` collection of every PBI from the result of _stories_of_sprints or _stories_of_pbis."""
+    by_pbi: Dict[int, List[models.Story]] = defaultdict(list)
+    for story in stories:
+        by_pbi[story.pbi_id].append(story)
+    for pbi in pbis:
+        set_committed_value(pbi, 'stories', by_pbi.get(pbi.id, []))
+
+
+def _load_sprint_pbis(db: Session, sprints: Sequence[models.Sprint]) -> None:
+    if sprints:
+        _assign_pbis(sprints, db.scalars(_pbis_of_sprints(sprints)))
+
+
+def _load_sprint_stories(db: Session, sprints: Sequence[models.Sprint], columns: Sequence[Any] = ()) -> None:
+    pbis = [pbi for sprint in sprints for pbi in sprint.pbis]
+    if pbis:
+        _assign_stories(pbis, db.scalars(_stories_of_sprints(sprints, columns)))
+
+
+# Children the ORM delete cascade removes. It needs their primary and foreign keys: without
+# the foreign key the unit of work reloads it row by row. A Sprint's Stories come from
+# _stories_of_sprints(..., _STORY_KEYS).
+_STORY_KEYS = (models.Story.id, models.Story.pbi_id)
+_SPRINT_DELETE_OPTIONS = [selectinload(models.Sprint.pbis).load_only(models.PBI.id, models.PBI.sprint_id)]
+_PBI_DELETE_OPTIONS = [selectinload(models.PBI.stories).load_only(*_STORY_KEYS)]
+
+
+def _sprint_id_of_pbi(db: Session, pbi_id: int) -> Optional[int]:
+    return db.query(models.PBI.sprint_id).filter(models.PBI.id == pbi_id).scalar()
+
+
+def _sprint_ids_of_stories(db: Session, story_ids: List[int]) -> List[Optional[int]]:
+    if not story_ids:
+        return []
+    rows = (
+        db.query(models.PBI.sprint_id)
+        .join(models.Story, models.Story.pbi_id == models.PBI.id)
+        .filter(models.Story.id.in_(story_ids))
+        .distinct()
+    )
+    return [row.sprint_id for row in rows]
+
+
 # ----------------------------
 # SPRINTS CRUD
 # ----------------------------
@@ -19,6 +155,8 @@ def create_sprint(db: Session, sprint_in: schemas.SprintCreate) -> models.Sprint
         db.add(sprint)
         db.commit()
         db.refresh(sprint)
+        set_committed_value(sprint, 'pbis', [])  # a new Sprint has no PBIs yet
+        response_cache.invalidate_sprint(sprint.id)
         logger.info(f"Sprint created with id={sprint.id}")
         return sprint
     except SQLAlchemyError as e:
@@ -27,14 +165,55 @@ def create_sprint(db: Session, sprint_in: schemas.SprintCreate) -> models.Sprint
         raise
 
 
-def get_sprints(db: Session) -> List[models.Sprint]:
-    """Retrieve all Sprints."""
-    return db.query(models.Sprint).all()
+def get_sprints(
+    db: Session,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    depth: int = 2,
+    fields: Optional[Sequence[str]] = None,
+) -> List[models.Sprint]:
+    """Retrieve Sprints ordered by id, optionally one keyset page at a time."""
+    query = db.query(models.Sprint).options(*_sprint_options(0, fields))
+    sprints = _keyset(query, models.Sprint.id, limit, after_id).all()
+    if depth >= 1:
+        _load_sprint_pbis(db, sprints)
+    if depth >= 2:
+        _load_sprint_stories(db, sprints)
+    return sprints
+
+
+def iter_sprints(
+    db: Session,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    depth: int = 2,
+    fields: Optional[Sequence[str]] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[models.Sprint]:
+    """Yield Sprints one by one from a server-side cursor, releasing each once consumed."""
+    query = db.query(models.Sprint).options(*_sprint_options(depth, fields))
+    query = _keyset(query, models.Sprint.id, limit, after_id)
+    for sprint in query.yield_per(batch_size):
+        yield sprint
+        db.expunge(sprint)
+
+
+def get_sprint_by_id(
+    db: Session, sprint_id: int, depth: int = 2, fields: Optional[Sequence[str]] = None
+) -> Optional[models.Sprint]:
+    """Retrieve a Sprint by its ID."""
+    sprint = db.query(models.Sprint).options(*_sprint_options(min(depth, 1), fields)).get(sprint_id)
+    if sprint is not None and depth >= 2:
+        _load_sprint_stories(db, [sprint])
+    return sprint
 
 
-def get_sprint_by_id(db: Session, sprint_id: int) -> Optional[models.Sprint]:
-    """Retrieve a Sprint by its ID."""
-    return db.query(models.Sprint).get(sprint_id)
+def get_sprint_stats(db: Session, sprint_id: int) -> Optional[Dict[str, Any]]:
+    """Sprint totals from the sprint_stats rollup; None if the Sprint does not exist."""
+    rows = db.execute(sprint_stats.rows_query(db.get_bind(), sprint_id)).all()
+    if not rows and db.query(models.Sprint.id).filter(models.Sprint.id == sprint_id).scalar() is None:
+        return None
+    return sprint_stats.summarize(sprint_id, rows)
 
 
 def update_sprint(db: Session, sprint_id: int, sprint_in: schemas.SprintUpdate) -> Optional[models.Sprint]:
@@ -47,7 +226,9 @@ def update_sprint(db: Session, sprint_id: int, sprint_in: schemas.SprintUpdate)
         setattr(sprint, key, value)
     try:
         db.commit()
-        db.refresh(sprint)
+        sprint = db.get(models.Sprint, sprint_id, options=_sprint_options(depth=1), populate_existing=True)
+        _load_sprint_stories(db, [sprint])
+        response_cache.invalidate_sprint(sprint_id)
         logger.info(f"Sprint updated id={sprint.id}")
         return sprint
     except SQLAlchemyError as e:
@@ -58,12 +239,14 @@ def update_sprint(db: Session, sprint_id: int, sprint_in: schemas.SprintUpdate)
 
 def delete_sprint(db: Session, sprint_id: int) -> bool:
     """Delete a Sprint by its ID."""
-    sprint = db.query(models.Sprint).get(sprint_id)
+    sprint = db.get(models.Sprint, sprint_id, options=_SPRINT_DELETE_OPTIONS)
     if not sprint:
         return False
+    _load_sprint_stories(db, [sprint], _STORY_KEYS)
     try:
         db.delete(sprint)
         db.commit()
+        response_cache.invalidate_sprint(sprint_id)
         logger.info(f"Sprint deleted id={sprint_id}")
         return True
     except SQLAlchemyError as e:
@@ -83,6 +266,8 @@ def create_pbi(db: Session, pbi_in: schemas.PBICreate) -> models.PBI:
         db.add(pbi)
         db.commit()
         db.refresh(pbi)
+        set_committed_value(pbi, 'stories', [])  # a new PBI has no Stories yet
+        response_cache.invalidate_sprint(pbi.sprint_id)
         logger.info(f"PBI created with id={pbi.id}")
         return pbi
     except SQLAlchemyError as e:
@@ -91,14 +276,27 @@ def create_pbi(db: Session, pbi_in: schemas.PBICreate) -> models.PBI:
         raise
 
 
-def get_pbis_by_sprint(db: Session, sprint_id: int) -> List[models.PBI]:
-    """Retrieve PBIs for a given Sprint."""
-    return db.query(models.PBI).filter(models.PBI.sprint_id == sprint_id).all()
-
-
-def get_pbi_by_id(db: Session, pbi_id: int) -> Optional[models.PBI]:
+def get_pbis_by_sprint(
+    db: Session,
+    sprint_id: int,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    depth: int = 1,
+    fields: Optional[Sequence[str]] = None,
+) -> List[models.PBI]:
+    """Retrieve PBIs for a given Sprint, optionally one keyset page at a time."""
+    query = db.query(models.PBI).options(*_pbi_options(0, fields)).filter(models.PBI.sprint_id == sprint_id)
+    pbis = _keyset(query, models.PBI.id, limit, after_id).all()
+    if depth >= 1 and pbis:
+        _assign_stories(pbis, db.scalars(_stories_of_pbis(sprint_id, pbis)))
+    return pbis
+
+
+def get_pbi_by_id(
+    db: Session, pbi_id: int, depth: int = 1, fields: Optional[Sequence[str]] = None
+) -> Optional[models.PBI]:
     """Retrieve a PBI by its ID."""
-    return db.query(models.PBI).get(pbi_id)
+    return db.query(models.PBI).options(*_pbi_options(depth, fields)).get(pbi_id)
 
 
 def update_pbi(db: Session, pbi_id: int, pbi_in: schemas.PBIUpdate) -> Optional[models.PBI]:
@@ -106,12 +304,14 @@ def update_pbi(db: Session, pbi_id: int, pbi_in: schemas.PBIUpdate) -> Optional[
     pbi = db.query(models.PBI).get(pbi_id)
     if not pbi:
         return None
+    old_sprint_id = pbi.sprint_id
     data = pbi_in.dict(exclude_unset=True)
     for key, value in data.items():
         setattr(pbi, key, value)
     try:
         db.commit()
-        db.refresh(pbi)
+        pbi = db.get(models.PBI, pbi_id, options=_pbi_options(), populate_existing=True)
+        response_cache.invalidate_sprint(old_sprint_id, pbi.sprint_id)
         logger.info(f"PBI updated id={pbi.id}")
         return pbi
     except SQLAlchemyError as e:
@@ -122,12 +322,14 @@ def update_pbi(db: Session, pbi_id: int, pbi_in: schemas.PBIUpdate) -> Optional[
 
 def delete_pbi(db: Session, pbi_id: int) -> bool:
     """Delete a PBI by its ID."""
-    pbi = db.query(models.PBI).get(pbi_id)
+    pbi = db.get(models.PBI, pbi_id, options=_PBI_DELETE_OPTIONS)
     if not pbi:
         return False
+    sprint_id = pbi.sprint_id
     try:
         db.delete(pbi)
         db.commit()
+        response_cache.invalidate_sprint(sprint_id)
         logger.info(f"PBI deleted id={pbi_id}")
         return True
     except SQLAlchemyError as e:
@@ -142,11 +344,13 @@ def delete_pbi(db: Session, pbi_id: int) -> bool:
 
 def create_story(db: Session, story_in: schemas.StoryCreate, pbi_id: int) -> models.Story:
     """Create a new Story under a PBI."""
-    story = models.Story(**story_in.dict(), pbi_id=pbi_id)
+    story = models.Story(**story_in.dict(), pbi_id=pbi_id, priority_dirty=True)
     try:
         db.add(story)
         db.commit()
         db.refresh(story)
+        response_cache.invalidate_sprint(_sprint_id_of_pbi(db, pbi_id))
+        priority_rescorer.notify()
         logger.info(f"Story created with id={story.id}")
         return story
     except SQLAlchemyError as e:
@@ -155,14 +359,204 @@ def create_story(db: Session, story_in: schemas.StoryCreate, pbi_id: int) -> mod
         raise
 
 
-def get_stories_by_pbi(db: Session, pbi_id: int) -> List[models.Story]:
-    """Retrieve Stories for a given PBI."""
-    return db.query(models.Story).filter(models.Story.pbi_id == pbi_id).all()
+def get_stories_by_pbi(
+    db: Session, pbi_id: int, limit: Optional[int] = None, after_id: Optional[int] = None
+) -> List[models.Story]:
+    """Retrieve Stories for a given PBI, optionally one keyset page at a time."""
+    query = db.query(models.Story).filter(models.Story.pbi_id == pbi_id)
+    return _keyset(query, models.Story.id, limit, after_id).all()
+
+
+def _validate_bulk_items(items: List[Any], schema: Type[ModelT]) -> Tuple[List[Tuple[int, ModelT]], List[Dict[str, Any]]]:
+    """Validate each raw item against `schema`; returns (index, model) for the valid ones and results for the rest."""
+    valid, failed = [], []
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, schema.model_validate(item)))
+        except ValidationError as ve:
+            error = '; '.join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" if err['loc'] else err['msg']
+                for err in ve.errors()
+            )
+            failed.append({'index': i, 'id': None, 'ok': False, 'error': error})
+    return valid, failed
+
+
+def _bulk_story_rows(items: List[Any], pbi_id: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """Validate each raw item as a StoryCreate; returns (index, row) for the valid ones and results for the rest."""
+    valid, failed = _validate_bulk_items(items, schemas.StoryCreate)
+    return [(i, dict(story_in.model_dump(), pbi_id=pbi_id, priority_dirty=True)) for i, story_in in valid], failed
+
+
+def create_stories_bulk(db: Session, items: List[Any], pbi_id: int) -> List[Dict[str, Any]]:
+    """
+    Create many Stories under a PBI. Items are validated one by one and the valid ones go in one
+    multi-row INSERT; if that fails, each row is retried on its own so the error is reported per item.
+    """
+    rows, results = _bulk_story_rows(items, pbi_id)
+    if not rows:
+        return results
+    statement = insert(models.Story).returning(models.Story.id, sort_by_parameter_order=True)
+    try:
+        ids = db.execute(statement, [row for _, row in rows]).scalars().all()
+        db.commit()
+        results.extend({'index': i, 'id': story_id, 'ok': True, 'error': None} for (i, _), story_id in zip(rows, ids))
+    except BULK_ROW_ERRORS as e:
+        db.rollback()
+        logger.warning(f"Bulk story insert failed, retrying item by item: {e}")
+        for i, row in rows:
+            try:
+                story_id = db.execute(statement, [row]).scalar_one()
+                db.commit()
+                results.append({'index': i, 'id': story_id, 'ok': True, 'error': None})
+            except BULK_ROW_ERRORS as item_error:
+                db.rollback()
+                logger.error(f"Error creating story {i} of bulk: {item_error}")
+                results.append({'index': i, 'id': None, 'ok': False, 'error': 'Database error'})
+    created = sum(1 for r in results if r['ok'])
+    if created:
+        response_cache.invalidate_sprint(_sprint_id_of_pbi(db, pbi_id))
+        priority_rescorer.notify()
+        logger.info(f"{created} stories created under PBI {pbi_id}")
+    return sorted(results, key=lambda r: r['index'])
+
+
+def _bulk_update_ids(stories_in: List[Tuple[int, schemas.StoryBulkUpdate]]) -> set:
+    """Ids to look up; ids beyond a 64-bit integer cannot exist (and sqlite3 would raise OverflowError)."""
+    return {story_in.id for _, story_in in stories_in if -2 ** 63 <= story_in.id < 2 ** 63}
+
+
+def _bulk_update_rows(
+    stories_in: List[Tuple[int, schemas.StoryBulkUpdate]], existing: set
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """(index, row) to UPDATE for each known id; results for unknown, repeated and no-op items."""
+    rows, results = [], []
+    seen = set()
+    for i, story_in in stories_in:
+        if story_in.id not in existing:
+            results.append({'index': i, 'id': story_in.id, 'ok': False, 'error': 'Story not found'})
+            continue
+        if story_in.id in seen:
+            results.append({'index': i, 'id': story_in.id, 'ok': False, 'error': 'Duplicate id in payload'})
+            continue
+        seen.add(story_in.id)
+        data = story_in.model_dump(exclude_unset=True)
+        # Sin leer los valores actuales: basta con que el payload toque una característica.
+        # Una prioridad explícita en el payload manda sobre el modelo.
+        if 'priority' not in data and any(key in data for key in priority_rescorer.PRIORITY_FEATURES):
+            data['priority_dirty'] = True
+        if len(data) > 1:
+            rows.append((i, data))
+        else:
+            results.append({'index': i, 'id': story_in.id, 'ok': True, 'error': None})
+    return rows, results
+
+
+def update_stories_bulk(db: Session, items: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Update many Stories. Items are validated one by one and the valid ones go in one executemany
+    UPDATE; if that fails, each row is retried on its own so the error is reported per item.
+    Unknown or repeated ids are reported per item.
+    """
+    stories_in, results = _validate_bulk_items(items, schemas.StoryBulkUpdate)
+    ids = _bulk_update_ids(stories_in)
+    existing = {row.id for row in db.query(models.Story.id).filter(models.Story.id.in_(ids))} if ids else set()
+    rows, checked = _bulk_update_rows(stories_in, existing)
+    results.extend(checked)
+    if not rows:
+        return sorted(results, key=lambda r: r['index'])
+
+    statement = update(models.Story)
+    try:
+        db.execute(statement, [row for _, row in rows])
+        db.commit()
+        updated = rows
+    except BULK_ROW_ERRORS as e:
+        db.rollback()
+        logger.warning(f"Bulk story update failed, retrying item by item: {e}")
+        updated = []
+        for i, row in rows:
+            try:
+                db.execute(statement, [row])
+                db.commit()
+                updated.append((i, row))
+            except BULK_ROW_ERRORS as item_error:
+                db.rollback()
+                logger.error(f"Error updating story {i} of bulk: {item_error}")
+                results.append({'index': i, 'id': row['id'], 'ok': False, 'error': 'Database error'})
+    results.extend({'index': i, 'id': row['id'], 'ok': True, 'error': None} for i, row in updated)
+    if updated:
+        response_cache.invalidate_sprint(*_sprint_ids_of_stories(db, [row['id'] for _, row in updated]))
+        if any(row.get('priority_dirty') for _, row in updated):
+            priority_rescorer.notify()
+        logger.info(f"{len(updated)} stories updated in bulk")
+    return sorted(results, key=lambda r: r['index'])
+
+
+def get_story_features_by_sprint(db: Session, sprint_id: int) -> List[Any]:
+    """Retrieve the priority model features of every Story in a Sprint as plain rows."""
+    return (
+        db.query(
+            models.Story.id,
+            models.Story.title,
+            models.Story.story_points,
+            models.Story.business_value,
+            models.Story.criticity,
+            models.Story.internal_dependencies,
+            models.Story.continuation,
+            models.Story.story_type,
+        )
+        .join(models.PBI, models.Story.pbi_id == models.PBI.id)
+        .filter(models.PBI.sprint_id == sprint_id)
+        .order_by(models.Story.id)
+        .all()
+    )
+
+
+def _undescribed():
+    return or_(models.Story.formatted_description.is_(None), models.Story.formatted_description == '')
+
+
+def get_undescribed_stories_by_sprint(db: Session, sprint_id: int) -> List[Any]:
+    """Retrieve id and raw description of the Stories in a Sprint without a formatted description."""
+    return (
+        db.query(models.Story.id, models.Story.raw_description)
+        .join(models.PBI, models.Story.pbi_id == models.PBI.id)
+        .filter(models.PBI.sprint_id == sprint_id, _undescribed())
+        .order_by(models.Story.id)
+        .all()
+    )
+
+
+def set_story_description(
+    db: Session,
+    story_id: int,
+    formatted_description: str,
+    acceptance_criteria: str,
+    sprint_id: Optional[int] = None,
+) -> bool:
+    """Store a generated description unless the Story has been described meanwhile."""
+    try:
+        written = db.execute(
+            update(models.Story)
+            .where(models.Story.id == story_id, _undescribed())
+            .values(formatted_description=formatted_description, acceptance_criteria=acceptance_criteria)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if written:
+            response_cache.invalidate_sprint(sprint_id)
+        return bool(written)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Error storing description for story {story_id}: {e}")
+        raise
 
 
-def get_story_by_id(db: Session, story_id: int) -> Optional[models.Story]:
-    """Retrieve a Story by its ID."""
-    return db.query(models.Story).get(story_id)
+def get_story_by_id(db: Session, story_id: int, with_pbi: bool = False) -> Optional[models.Story]:
+    """Retrieve a Story by its ID, optionally joining the sprint_id of its PBI."""
+    options = [joinedload(models.Story.pbi).load_only(models.PBI.sprint_id)] if with_pbi else []
+    return db.get(models.Story, story_id, options=options)
 
 
 def update_story(db: Session, story_id: int, story_in: schemas.StoryUpdate) -> Optional[models.Story]:
@@ -171,11 +565,18 @@ def update_story(db: Session, story_id: int, story_in: schemas.StoryUpdate) -> O
     if not story:
         return None
     data = story_in.dict(exclude_unset=True)
+    # Una prioridad explícita en el payload manda sobre el modelo
+    rescore = 'priority' not in data and priority_rescorer.features_changed(story, data)
     for key, value in data.items():
         setattr(story, key, value)
+    if rescore:
+        story.priority_dirty = True
     try:
         db.commit()
         db.refresh(story)
+        response_cache.invalidate_sprint(_sprint_id_of_pbi(db, story.pbi_id))
+        if rescore:
+            priority_rescorer.notify()
         logger.info(f"Story updated id={story.id}")
         return story
     except SQLAlchemyError as e:
@@ -189,12 +590,34 @@ def delete_story(db: Session, story_id: int) -> bool:
     story = db.query(models.Story).get(story_id)
     if not story:
         return False
+    sprint_id = _sprint_id_of_pbi(db, story.pbi_id)
     try:
         db.delete(story)
         db.commit()
+        response_cache.invalidate_sprint(sprint_id)
         logger.info(f"Story deleted id={story_id}")
         return True
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Error deleting story {story_id}: {e}")
         raise
+
+
+def update_story_priorities(db: Session, priorities: Dict[int, int]) -> int:
+    """Write many Story priorities with a single executemany UPDATE."""
+    if not priorities:
+        return 0
+    try:
+        db.execute(
+            update(models.Story),
+            [{'id': story_id, 'priority': priority, 'priority_dirty': False}
+             for story_id, priority in priorities.items()],
+        )
+        db.commit()
+        response_cache.invalidate_sprint(*_sprint_ids_of_stories(db, list(priorities)))
+        logger.info(f"Priorities updated for {len(priorities)} stories")
+        return len(priorities)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Error updating story priorities: {e}")
+        raise
@@ -0,0 +1,449 @@
+import logging
+from typing import List, Optional, Dict, Any, AsyncIterator, Sequence
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.attributes import set_committed_value
+
+import models
+import schemas
+import response_cache
+import sprint_stats
+from services import priority_rescorer
+from crud import (
+    BULK_ROW_ERRORS, STREAM_BATCH_SIZE, _bulk_story_rows, _bulk_update_ids, _bulk_update_rows,
+    _validate_bulk_items, _keyset, _sprint_options, _pbi_options, _pbis_of_sprints, _stories_of_sprints,
+    _stories_of_pbis, _assign_pbis, _assign_stories, _STORY_KEYS, _SPRINT_DELETE_OPTIONS, _PBI_DELETE_OPTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Async counterparts of crud.py for DB_ASYNC mode. They share crud.py's loader options:
+# relationships are lazy='raise', so every one that is used must be eagerly loaded.
+
+async def _sprint_id_of_pbi(db: AsyncSession, pbi_id: int) -> Optional[int]:
+    return await db.scalar(select(models.PBI.sprint_id).filter(models.PBI.id == pbi_id))
+
+
+async def _load_sprint_pbis(db: AsyncSession, sprints: Sequence[models.Sprint]) -> None:
+    if sprints:
+        _assign_pbis(sprints, (await db.scalars(_pbis_of_sprints(sprints))).all())
+
+
+async def _load_sprint_stories(db: AsyncSession, sprints: Sequence[models.Sprint], columns: Sequence[Any] = ()) -> None:
+    pbis = [pbi for sprint in sprints for pbi in sprint.pbis]
+    if pbis:
+        _assign_stories(pbis, (await db.scalars(_stories_of_sprints(sprints, columns))).all())
+
+
+async def _sprint_ids_of_stories(db: AsyncSession, story_ids: List[int]) -> List[Optional[int]]:
+    if not story_ids:
+        return []
+    result = await db.scalars(
+        select(models.PBI.sprint_id)
+        .join(models.Story, models.Story.pbi_id == models.PBI.id)
+        .filter(models.Story.id.in_(story_ids))
+        .distinct()
+    )
+    return list(result.all())
+
+
+# ----------------------------
+# SPRINTS CRUD
+# ----------------------------
+
+async def create_sprint(db: AsyncSession, sprint_in: schemas.SprintCreate) -> models.Sprint:
+    """Create a new Sprint."""
+    sprint = models.Sprint(**sprint_in.dict())
+    try:
+        db.add(sprint)
+        await db.commit()
+        await db.refresh(sprint)
+        set_committed_value(sprint, 'pbis', [])  # a new Sprint has no PBIs yet
+        response_cache.invalidate_sprint(sprint.id)
+        logger.info(f"Sprint created with id={sprint.id}")
+        return sprint
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error creating sprint: {e}")
+        raise
+
+
+async def get_sprints(
+    db: AsyncSession,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    depth: int = 2,
+    fields: Optional[Sequence[str]] = None,
+) -> List[models.Sprint]:
+    """Retrieve Sprints ordered by id, optionally one keyset page at a time."""
+    stmt = select(models.Sprint).options(*_sprint_options(0, fields))
+    result = await db.scalars(_keyset(stmt, models.Sprint.id, limit, after_id))
+    sprints = list(result.all())
+    if depth >= 1:
+        await _load_sprint_pbis(db, sprints)
+    if depth >= 2:
+        await _load_sprint_stories(db, sprints)
+    return sprints
+
+
+async def iter_sprints(
+    db: AsyncSession,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    depth: int = 2,
+    fields: Optional[Sequence[str]] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> AsyncIterator[models.Sprint]:
+    """Yield Sprints one by one, fetching keyset batches and releasing each batch once consumed."""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = batch_size if remaining is None else min(batch_size, remaining)
+        batch = await get_sprints(db, limit=page_size, after_id=after_id, depth=depth, fields=fields)
+        if not batch:
+            return
+        for sprint in batch:
+            yield sprint
+        after_id = batch[-1].id
+        if remaining is not None:
+            remaining -= len(batch)
+        db.expunge_all()
+
+
+async def get_sprint_by_id(
+    db: AsyncSession, sprint_id: int, depth: int = 2, fields: Optional[Sequence[str]] = None
+) -> Optional[models.Sprint]:
+    """Retrieve a Sprint by its ID."""
+    sprint = await db.get(models.Sprint, sprint_id, options=_sprint_options(min(depth, 1), fields))
+    if sprint is not None and depth >= 2:
+        await _load_sprint_stories(db, [sprint])
+    return sprint
+
+
+async def get_sprint_stats(db: AsyncSession, sprint_id: int) -> Optional[Dict[str, Any]]:
+    """Sprint totals from the sprint_stats rollup; None if the Sprint does not exist."""
+    rows = (await db.execute(sprint_stats.rows_query(db.get_bind(), sprint_id))).all()
+    if not rows and await db.scalar(select(models.Sprint.id).filter(models.Sprint.id == sprint_id)) is None:
+        return None
+    return sprint_stats.summarize(sprint_id, rows)
+
+
+async def update_sprint(db: AsyncSession, sprint_id: int, sprint_in: schemas.SprintUpdate) -> Optional[models.Sprint]:
+    """Update fields of an existing Sprint."""
+    sprint = await db.get(models.Sprint, sprint_id)
+    if not sprint:
+        return None
+    data = sprint_in.dict(exclude_unset=True)
+    for key, value in data.items():
+        setattr(sprint, key, value)
+    try:
+        await db.commit()
+        sprint = await db.get(models.Sprint, sprint_id, options=_sprint_options(depth=1), populate_existing=True)
+        await _load_sprint_stories(db, [sprint])
+        response_cache.invalidate_sprint(sprint_id)
+        logger.info(f"Sprint updated id={sprint.id}")
+        return sprint
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error updating sprint {sprint_id}: {e}")
+        raise
+
+
+async def delete_sprint(db: AsyncSession, sprint_id: int) -> bool:
+    """Delete a Sprint by its ID."""
+    sprint = await db.get(models.Sprint, sprint_id, options=_SPRINT_DELETE_OPTIONS)
+    if not sprint:
+        return False
+    await _load_sprint_stories(db, [sprint], _STORY_KEYS)
+    try:
+        await db.delete(sprint)
+        await db.commit()
+        response_cache.invalidate_sprint(sprint_id)
+        logger.info(f"Sprint deleted id={sprint_id}")
+        return True
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error deleting sprint {sprint_id}: {e}")
+        raise
+
+
+# ----------------------------
+# PBIs CRUD
+# ----------------------------
+
+async def create_pbi(db: AsyncSession, pbi_in: schemas.PBICreate) -> models.PBI:
+    """Create a new PBI."""
+    pbi = models.PBI(**pbi_in.dict())
+    try:
+        db.add(pbi)
+        await db.commit()
+        await db.refresh(pbi)
+        set_committed_value(pbi, 'stories', [])  # a new PBI has no Stories yet
+        response_cache.invalidate_sprint(pbi.sprint_id)
+        logger.info(f"PBI created with id={pbi.id}")
+        return pbi
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error creating PBI: {e}")
+        raise
+
+
+async def get_pbis_by_sprint(
+    db: AsyncSession,
+    sprint_id: int,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    depth: int = 1,
+    fields: Optional[Sequence[str]] = None,
+) -> List[models.PBI]:
+    """Retrieve PBIs for a given Sprint, optionally one keyset page at a time."""
+    stmt = select(models.PBI).options(*_pbi_options(0, fields)).filter(models.PBI.sprint_id == sprint_id)
+    result = await db.scalars(_keyset(stmt, models.PBI.id, limit, after_id))
+    pbis = list(result.all())
+    if depth >= 1 and pbis:
+        _assign_stories(pbis, (await db.scalars(_stories_of_pbis(sprint_id, pbis))).all())
+    return pbis
+
+
+async def get_pbi_by_id(
+    db: AsyncSession, pbi_id: int, depth: int = 1, fields: Optional[Sequence[str]] = None
+) -> Optional[models.PBI]:
+    """Retrieve a PBI by its ID."""
+    return await db.get(models.PBI, pbi_id, options=_pbi_options(depth, fields))
+
+
+async def update_pbi(db: AsyncSession, pbi_id: int, pbi_in: schemas.PBIUpdate) -> Optional[models.PBI]:
+    """Update fields of an existing PBI."""
+    pbi = await db.get(models.PBI, pbi_id)
+    if not pbi:
+        return None
+    old_sprint_id = pbi.sprint_id
+    data = pbi_in.dict(exclude_unset=True)
+    for key, value in data.items():
+        setattr(pbi, key, value)
+    try:
+        await db.commit()
+        pbi = await db.get(models.PBI, pbi_id, options=_pbi_options(), populate_existing=True)
+        response_cache.invalidate_sprint(old_sprint_id, pbi.sprint_id)
+        logger.info(f"PBI updated id={pbi.id}")
+        return pbi
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error updating PBI {pbi_id}: {e}")
+        raise
+
+
+async def delete_pbi(db: AsyncSession, pbi_id: int) -> bool:
+    """Delete a PBI by its ID."""
+    pbi = await db.get(models.PBI, pbi_id, options=_PBI_DELETE_OPTIONS)
+    if not pbi:
+        return False
+    sprint_id = pbi.sprint_id
+    try:
+        await db.delete(pbi)
+        await db.commit()
+        response_cache.invalidate_sprint(sprint_id)
+        logger.info(f"PBI deleted id={pbi_id}")
+        return True
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error deleting PBI {pbi_id}: {e}")
+        raise
+
+
+async def pbi_exists(db: AsyncSession, pbi_id: int) -> bool:
+    """Check whether a PBI exists without loading it."""
+    return (await db.scalar(select(models.PBI.id).filter(models.PBI.id == pbi_id))) is not None
+
+
+# ----------------------------
+# STORIES CRUD
+# ----------------------------
+
+async def create_story(db: AsyncSession, story_in: schemas.StoryCreate, pbi_id: int) -> models.Story:
+    """Create a new Story under a PBI."""
+    story = models.Story(**story_in.dict(), pbi_id=pbi_id, priority_dirty=True)
+    try:
+        db.add(story)
+        await db.commit()
+        await db.refresh(story)
+        response_cache.invalidate_sprint(await _sprint_id_of_pbi(db, pbi_id))
+        priority_rescorer.notify()
+        logger.info(f"Story created with id={story.id}")
+        return story
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error creating story: {e}")
+        raise
+
+
+async def create_stories_bulk(db: AsyncSession, items: List[Any], pbi_id: int) -> List[Dict[str, Any]]:
+    """
+    Create many Stories under a PBI. Items are validated one by one and the valid ones go in one
+    multi-row INSERT; if that fails, each row is retried on its own so the error is reported per item.
+    """
+    rows, results = _bulk_story_rows(items, pbi_id)
+    if not rows:
+        return results
+    statement = insert(models.Story).returning(models.Story.id, sort_by_parameter_order=True)
+    try:
+        ids = (await db.execute(statement, [row for _, row in rows])).scalars().all()
+        await db.commit()
+        results.extend({'index': i, 'id': story_id, 'ok': True, 'error': None} for (i, _), story_id in zip(rows, ids))
+    except BULK_ROW_ERRORS as e:
+        await db.rollback()
+        logger.warning(f"Bulk story insert failed, retrying item by item: {e}")
+        for i, row in rows:
+            try:
+                story_id = (await db.execute(statement, [row])).scalar_one()
+                await db.commit()
+                results.append({'index': i, 'id': story_id, 'ok': True, 'error': None})
+            except BULK_ROW_ERRORS as item_error:
+                await db.rollback()
+                logger.error(f"Error creating story {i} of bulk: {item_error}")
+                results.append({'index': i, 'id': None, 'ok': False, 'error': 'Database error'})
+    created = sum(1 for r in results if r['ok'])
+    if created:
+        response_cache.invalidate_sprint(await _sprint_id_of_pbi(db, pbi_id))
+        priority_rescorer.notify()
+        logger.info(f"{created} stories created under PBI {pbi_id}")
+    return sorted(results, key=lambda r: r['index'])
+
+
+async def update_stories_bulk(db: AsyncSession, items: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Update many Stories. Items are validated one by one and the valid ones go in one executemany
+    UPDATE; if that fails, each row is retried on its own so the error is reported per item.
+    Unknown or repeated ids are reported per item.
+    """
+    stories_in, results = _validate_bulk_items(items, schemas.StoryBulkUpdate)
+    ids = _bulk_update_ids(stories_in)
+    existing = set((await db.scalars(select(models.Story.id).filter(models.Story.id.in_(ids)))).all()) if ids else set()
+    rows, checked = _bulk_update_rows(stories_in, existing)
+    results.extend(checked)
+    if not rows:
+        return sorted(results, key=lambda r: r['index'])
+
+    statement = update(models.Story)
+    try:
+        await db.execute(statement, [row for _, row in rows])
+        await db.commit()
+        updated = rows
+    except BULK_ROW_ERRORS as e:
+        await db.rollback()
+        logger.warning(f"Bulk story update failed, retrying item by item: {e}")
+        updated = []
+        for i, row in rows:
+            try:
+                await db.execute(statement, [row])
+                await db.commit()
+                updated.append((i, row))
+            except BULK_ROW_ERRORS as item_error:
+                await db.rollback()
+                logger.error(f"Error updating story {i} of bulk: {item_error}")
+                results.append({'index': i, 'id': row['id'], 'ok': False, 'error': 'Database error'})
+    results.extend({'index': i, 'id': row['id'], 'ok': True, 'error': None} for i, row in updated)
+    if updated:
+        response_cache.invalidate_sprint(*await _sprint_ids_of_stories(db, [row['id'] for _, row in updated]))
+        if any(row.get('priority_dirty') for _, row in updated):
+            priority_rescorer.notify()
+        logger.info(f"{len(updated)} stories updated in bulk")
+    return sorted(results, key=lambda r: r['index'])
+
+
+async def get_story_features_by_sprint(db: AsyncSession, sprint_id: int) -> List[Any]:
+    """Retrieve the priority model features of every Story in a Sprint as plain rows."""
+    result = await db.execute(
+        select(
+            models.Story.id,
+            models.Story.title,
+            models.Story.story_points,
+            models.Story.business_value,
+            models.Story.criticity,
+            models.Story.internal_dependencies,
+            models.Story.continuation,
+            models.Story.story_type,
+        )
+        .join(models.PBI, models.Story.pbi_id == models.PBI.id)
+        .filter(models.PBI.sprint_id == sprint_id)
+        .order_by(models.Story.id)
+    )
+    return list(result.all())
+
+
+async def get_stories_by_pbi(
+    db: AsyncSession, pbi_id: int, limit: Optional[int] = None, after_id: Optional[int] = None
+) -> List[models.Story]:
+    """Retrieve Stories for a given PBI, optionally one keyset page at a time."""
+    stmt = select(models.Story).filter(models.Story.pbi_id == pbi_id)
+    result = await db.scalars(_keyset(stmt, models.Story.id, limit, after_id))
+    return list(result.all())
+
+
+async def get_story_by_id(db: AsyncSession, story_id: int) -> Optional[models.Story]:
+    """Retrieve a Story by its ID."""
+    return await db.get(models.Story, story_id)
+
+
+async def update_story(db: AsyncSession, story_id: int, story_in: schemas.StoryUpdate) -> Optional[models.Story]:
+    """Update fields of an existing Story."""
+    story = await db.get(models.Story, story_id)
+    if not story:
+        return None
+    data = story_in.dict(exclude_unset=True)
+    # Una prioridad explícita en el payload manda sobre el modelo
+    rescore = 'priority' not in data and priority_rescorer.features_changed(story, data)
+    for key, value in data.items():
+        setattr(story, key, value)
+    if rescore:
+        story.priority_dirty = True
+    try:
+        await db.commit()
+        await db.refresh(story)
+        response_cache.invalidate_sprint(await _sprint_id_of_pbi(db, story.pbi_id))
+        if rescore:
+            priority_rescorer.notify()
+        logger.info(f"Story updated id={story.id}")
+        return story
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error updating story {story_id}: {e}")
+        raise
+
+
+async def delete_story(db: AsyncSession, story_id: int) -> bool:
+    """Delete a Story by its ID."""
+    story = await db.get(models.Story, story_id)
+    if not story:
+        return False
+    sprint_id = await _sprint_id_of_pbi(db, story.pbi_id)
+    try:
+        await db.delete(story)
+        await db.commit()
+        response_cache.invalidate_sprint(sprint_id)
+        logger.info(f"Story deleted id={story_id}")
+        return True
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error deleting story {story_id}: {e}")
+        raise
+
+
+async def update_story_priorities(db: AsyncSession, priorities: Dict[int, int]) -> int:
+    """Write many Story priorities with a single executemany UPDATE."""
+    if not priorities:
+        return 0
+    try:
+        await db.execute(
+            update(models.Story),
+            [{'id': story_id, 'priority': priority, 'priority_dirty': False}
+             for story_id, priority in priorities.items()],
+        )
+        await db.commit()
+        response_cache.invalidate_sprint(*await _sprint_ids_of_stories(db, list(priorities)))
+        logger.info(f"Priorities updated for {len(priorities)} stories")
+        return len(priorities)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error updating story priorities: {e}")
+        raise
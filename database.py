@@ -1,11 +1,13 @@
 import os
-from sqlalchemy import create_engine
+from functools import lru_cache
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
 import logging
 
 from models import Base  # ← usa el Base de los modelos
+import metrics
 
 # Cargar variables de entorno
 load_dotenv()
@@ -16,16 +18,92 @@ logger = logging.getLogger(__name__)
 
 # URL base de datos
 database_url = os.getenv('DATABASE_URL', 'sqlite:///./planning.db')
+# URL de lectura (por defecto la misma base de datos, con un pool propio de solo lectura)
+read_database_url = os.getenv('READ_DATABASE_URL', database_url)
 
-connect_args = {'check_same_thread': False} if database_url.startswith('sqlite') else {}
-engine = create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+# Modo asíncrono (AsyncSession): aiosqlite para SQLite, asyncpg para PostgreSQL
+DB_ASYNC = os.getenv('DB_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+
+# Perfil SQLite (se aplica con PRAGMAs al abrir cada conexión)
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # negativo = KiB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_TEMP_STORE = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+
+# Pools
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+READ_POOL_SIZE = int(os.getenv('READ_POOL_SIZE', '10'))
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith('sqlite')
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return _is_sqlite(url) and (':memory:' in url or url.rstrip('/') in ('sqlite:', 'sqlite+pysqlite:'))
+
+
+def _async_url(url: str) -> str:
+    scheme, rest = url.split(':', 1)
+    if scheme.startswith('sqlite'):
+        return f'sqlite+aiosqlite:{rest}'
+    if scheme.startswith('postgres'):
+        return f'postgresql+asyncpg:{rest}'
+    return url
+
+
+async_database_url = os.getenv('ASYNC_DATABASE_URL', _async_url(database_url))
+
+
+def _apply_sqlite_pragmas(dbapi_connection, read_only: bool) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if not read_only:
+            # journal_mode es persistente en el fichero: basta con fijarlo desde el pool de escritura
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA temp_store={SQLITE_TEMP_STORE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def _create_engine(url: str, pool_size: int, read_only: bool = False):
+    connect_args = {'check_same_thread': False} if _is_sqlite(url) else {}
+    pool_args = {} if _is_sqlite_memory(url) else {'pool_size': pool_size}
+    new_engine = create_engine(url, connect_args=connect_args, pool_pre_ping=True, **pool_args)
+
+    if _is_sqlite(url) and not _is_sqlite_memory(url):
+        @event.listens_for(new_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            _apply_sqlite_pragmas(dbapi_connection, read_only)
+
+    metrics.instrument_engine(new_engine, 'read' if read_only else 'write')
+    return new_engine
+
+
+engine = _create_engine(database_url, DB_POOL_SIZE)
+
+# Una base en memoria solo existe dentro de su propio engine: las lecturas comparten el de escritura
+if _is_sqlite_memory(read_database_url):
+    read_engine = engine
+else:
+    read_engine = _create_engine(read_database_url, READ_POOL_SIZE, read_only=True)
 
 # Sesión
 SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+ReadSessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=read_engine))
 
-# Para FastAPI
+# Para FastAPI. Una sesión nueva por petición (no la del hilo): las dependencias y los
+# endpoints async pueden ejecutarse en hilos distintos del threadpool
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal.session_factory()
     try:
         yield db
     except SQLAlchemyError as e:
@@ -34,3 +112,54 @@ def get_db():
         raise
     finally:
         db.close()
+
+# Para las rutas GET: pool de solo lectura que no compite con las escrituras
+def get_read_db():
+    db = ReadSessionLocal.session_factory()
+    try:
+        yield db
+    except SQLAlchemyError as e:
+        logger.error(f"Error en la sesión de lectura de DB: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# --- Capa asíncrona (solo se crea si se usa; aiosqlite/asyncpg no se importan en modo síncrono) ---
+@lru_cache(maxsize=1)
+def get_async_engine():
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    pool_args = {} if _is_sqlite_memory(async_database_url) else {'pool_size': DB_POOL_SIZE}
+    async_engine = create_async_engine(async_database_url, pool_pre_ping=True, **pool_args)
+
+    if _is_sqlite(async_database_url) and not _is_sqlite_memory(async_database_url):
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            _apply_sqlite_pragmas(dbapi_connection, read_only=False)
+
+    metrics.instrument_engine(async_engine.sync_engine, 'async')
+    logger.info(f"Engine asíncrono creado para {async_engine.url.drivername}")
+    return async_engine
+
+
+@lru_cache(maxsize=1)
+def get_async_sessionmaker():
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    # expire_on_commit=False: tras el commit no se puede recargar atributos de forma perezosa en async
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+# Para FastAPI en modo DB_ASYNC
+async def get_async_db():
+    db = get_async_sessionmaker()()
+    try:
+        yield db
+    except SQLAlchemyError as e:
+        logger.error(f"Error en la sesión asíncrona de DB: {e}")
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
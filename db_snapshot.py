@@ -0,0 +1,95 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from functools import lru_cache
+from typing import Sequence
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from migrations import migration_metadata, run_migrations
+from models import Base
+
+logger = logging.getLogger(__name__)
+
+# /reset-db por instantánea: la base sembrada se construye una vez en memoria y cada reinicio
+# la copia sobre la base viva con la API de backup de SQLite. La copia es una sola transacción
+# de escritura en el destino, así que las demás conexiones ven el estado anterior o el sembrado,
+# nunca un esquema a medio borrar. `reseed` conserva el camino de drop_all + create_all + siembra
+# (el único disponible fuera de SQLite).
+RESET_DB_MODE = os.getenv('RESET_DB_MODE', 'snapshot').lower()
+
+# Tablas que el reinicio no toca: se copian de la base viva a la instantánea antes de restaurarla
+PRESERVED_TABLES = ('llm_cache', 'describe_jobs', 'schema_migrations')
+
+_lock = threading.Lock()
+
+
+def supported(engine: Engine) -> bool:
+    return RESET_DB_MODE == 'snapshot' and engine.dialect.name == 'sqlite'
+
+
+@lru_cache(maxsize=1)
+def _template(page_size: int) -> sqlite3.Connection:
+    """Base sembrada en memoria con el mismo esquema, migraciones y tamaño de página que la viva."""
+    # Import diferido: create_db importa la importación masiva y esta, los servicios de la app
+    from create_db import seed_pbis_and_stories, seed_sprints
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    # La API de backup no puede cambiar el tamaño de página de una base en WAL
+    conn.execute(f'PRAGMA page_size={page_size}')
+    template_engine = create_engine('sqlite://', creator=lambda: conn, poolclass=StaticPool)
+    Base.metadata.create_all(bind=template_engine)
+    run_migrations(template_engine)
+    with Session(bind=template_engine) as session:
+        seed_sprints(session)
+        seed_pbis_and_stories(session)
+    logger.info(f"Instantánea de /reset-db construida en {(time.perf_counter() - started) * 1000:.1f} ms")
+    return conn
+
+
+def _copy_tables(source: sqlite3.Connection, target: sqlite3.Connection, tables: Sequence[str]) -> None:
+    for name in tables:
+        table = Base.metadata.tables.get(name)
+        if table is None:
+            table = migration_metadata.tables[name]
+        # Columnas por nombre: en bases migradas el orden físico puede diferir del de models.py
+        columns = ', '.join(c.name for c in table.columns)
+        rows = source.execute(f'SELECT {columns} FROM {name}').fetchall()
+        target.execute(f'DELETE FROM {name}')
+        if rows:
+            placeholders = ', '.join('?' * len(table.columns))
+            target.executemany(f'INSERT INTO {name} ({columns}) VALUES ({placeholders})', rows)
+    target.commit()
+
+
+def restore(engine: Engine) -> float:
+    """Sustituye la base de `engine` por la instantánea sembrada. Devuelve los milisegundos empleados."""
+    started = time.perf_counter()
+    with _lock:
+        raw = engine.raw_connection()
+        try:
+            live: sqlite3.Connection = raw.driver_connection
+            page_size = live.execute('PRAGMA page_size').fetchone()[0]
+            template = _template(page_size)
+
+            # Copia de trabajo: la instantánea no se modifica y sirve para el siguiente reinicio
+            staging = sqlite3.connect(':memory:')
+            try:
+                template.backup(staging)
+                _copy_tables(live, staging, PRESERVED_TABLES)
+                live.commit()
+                # pages=-1: todas las páginas en un solo paso, es decir, en una sola transacción
+                staging.backup(live, pages=-1)
+            finally:
+                staging.close()
+        finally:
+            raw.close()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Base de datos restaurada desde la instantánea en {elapsed_ms:.1f} ms")
+    return elapsed_ms
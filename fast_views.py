@@ -0,0 +1,172 @@
+import os
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+import models
+import schemas
+from crud import _keyset
+from projections import PBI_FIELDS, PBI_MAX_DEPTH, SPRINT_FIELDS, SPRINT_MAX_DEPTH, is_full_view
+
+# Camino rápido de las lecturas (FAST_JSON_ENABLED): en lugar de cargar objetos ORM y validarlos con
+# pydantic (from_attributes), selecciona tuplas de columnas con SQLAlchemy Core, anida
+# sprint → PBI → historia agrupando por id en una sola pasada y codifica con orjson. El JSON es
+# idéntico byte a byte al de response_model, así que el ETag no cambia al activar el flag, y el
+# esquema OpenAPI tampoco (tests/test_fast_views.py lo comprueba).
+FAST_JSON_ENABLED = os.getenv('FAST_JSON_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+sprints_table = models.Sprint.__table__
+pbis_table = models.PBI.__table__
+stories_table = models.Story.__table__
+
+# Orden de las claves en la respuesta completa: el de los campos de cada esquema
+SPRINT_KEYS = tuple(f for f in schemas.Sprint.model_fields if f != 'pbis')
+PBI_KEYS = tuple(f for f in schemas.PBI.model_fields if f != 'stories')
+STORY_KEYS = tuple(schemas.Story.model_fields)
+
+# Una consulta por nivel y, por nivel, (claves del dict, nombre de la lista en el padre)
+Plan = Tuple[List[Select], List[Tuple[Sequence[str], Optional[str]]]]
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse codificada con orjson (mismos bytes que la de Starlette para estos datos)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _columns(table, keys: Sequence[str], parent=None) -> list:
+    columns = [table.c[k] for k in keys]
+    # La columna del padre va al final, fuera de las claves del dict
+    if parent is not None:
+        columns.append(parent.label('parent_id'))
+    return columns
+
+
+def _attach(parents: List[Dict[str, Any]], rows: Sequence[Any], keys: Sequence[str], name: str) -> List[Dict[str, Any]]:
+    """Reparte `rows` (ordenadas por id, con el id del padre al final) entre sus padres en una pasada."""
+    children: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+    position = len(keys)
+    created = []
+    for row in rows:
+        child = dict(zip(keys, row))
+        children[row[position]].append(child)
+        created.append(child)
+    for parent in parents:
+        parent[name] = children.get(parent['id'], [])
+    return created
+
+
+def _assemble(results: List[Sequence[Any]], levels) -> List[Dict[str, Any]]:
+    top = parents = [dict(zip(levels[0][0], row)) for row in results[0]]
+    for level, (keys, name) in enumerate(levels[1:], 1):
+        parents = _attach(parents, results[level] if level < len(results) else (), keys, name)
+    return top
+
+
+def _story_query(condition) -> Select:
+    return (
+        select(*_columns(stories_table, STORY_KEYS, stories_table.c.pbi_id))
+        .where(condition)
+        .order_by(stories_table.c.id)
+    )
+
+
+def sprint_plan(
+    depth: int,
+    fields: Optional[Sequence[str]],
+    sprint_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> Plan:
+    """Consultas de los sprints pedidos (uno o una página) hasta `depth`, una por nivel."""
+    full = is_full_view(depth, SPRINT_MAX_DEPTH, fields)
+    sprint_keys = SPRINT_KEYS if full else tuple(fields or SPRINT_FIELDS)
+    pbi_keys = PBI_KEYS if full else PBI_FIELDS
+
+    if sprint_id is not None:
+        top = select(*_columns(sprints_table, sprint_keys)).where(sprints_table.c.id == sprint_id)
+        in_sprints = pbis_table.c.sprint_id == sprint_id
+    else:
+        top = _keyset(select(*_columns(sprints_table, sprint_keys)), sprints_table.c.id, limit, after_id)
+        in_sprints = pbis_table.c.sprint_id.in_(
+            _keyset(select(sprints_table.c.id), sprints_table.c.id, limit, after_id)
+        )
+    queries, levels = [top], [(sprint_keys, None)]
+    if depth >= 1:
+        queries.append(
+            select(*_columns(pbis_table, pbi_keys, pbis_table.c.sprint_id)).where(in_sprints).order_by(pbis_table.c.id)
+        )
+        levels.append((pbi_keys, 'pbis'))
+    if depth >= 2:
+        queries.append(_story_query(stories_table.c.pbi_id.in_(select(pbis_table.c.id).where(in_sprints))))
+        levels.append((STORY_KEYS, 'stories'))
+    return queries, levels
+
+
+def pbi_plan(
+    depth: int,
+    fields: Optional[Sequence[str]],
+    pbi_id: Optional[int] = None,
+    sprint_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> Plan:
+    """Consultas de un PBI (`pbi_id`) o de una página de PBIs de un sprint hasta `depth`."""
+    full = is_full_view(depth, PBI_MAX_DEPTH, fields)
+    pbi_keys = PBI_KEYS if full else tuple(fields or PBI_FIELDS)
+
+    if pbi_id is not None:
+        top = select(*_columns(pbis_table, pbi_keys)).where(pbis_table.c.id == pbi_id)
+        in_pbis = stories_table.c.pbi_id == pbi_id
+    else:
+        of_sprint = pbis_table.c.sprint_id == sprint_id
+        top = _keyset(select(*_columns(pbis_table, pbi_keys)).where(of_sprint), pbis_table.c.id, limit, after_id)
+        in_pbis = stories_table.c.pbi_id.in_(
+            _keyset(select(pbis_table.c.id).where(of_sprint), pbis_table.c.id, limit, after_id)
+        )
+    queries, levels = [top], [(pbi_keys, None)]
+    if depth >= 1:
+        queries.append(_story_query(in_pbis))
+        levels.append((STORY_KEYS, 'stories'))
+    return queries, levels
+
+
+def story_plan(pbi_id: int, limit: Optional[int] = None, after_id: Optional[int] = None) -> Plan:
+    """Consulta de una página de historias de un PBI."""
+    query = _keyset(
+        select(*_columns(stories_table, STORY_KEYS)).where(stories_table.c.pbi_id == pbi_id),
+        stories_table.c.id, limit, after_id,
+    )
+    return [query], [(STORY_KEYS, None)]
+
+
+def run(db: Session, plan: Plan) -> List[Dict[str, Any]]:
+    """Ejecuta el plan y devuelve los dicts anidados; sin filas en un nivel no consulta los siguientes."""
+    queries, levels = plan
+    results = []
+    for query in queries:
+        results.append(db.execute(query).all())
+        if not results[-1]:
+            break
+    return _assemble(results, levels)
+
+
+async def run_async(db: AsyncSession, plan: Plan) -> List[Dict[str, Any]]:
+    queries, levels = plan
+    results = []
+    for query in queries:
+        results.append((await db.execute(query)).all())
+        if not results[-1]:
+            break
+    return _assemble(results, levels)
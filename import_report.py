@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Informe del coste de importar la aplicación (`import main`) y comprobación de presupuesto.
+
+    python import_report.py                  # tabla por paquete
+    python import_report.py --budget 1.5     # sale con código 1 si se supera
+
+Cada medida se hace en un intérprete nuevo con `python -X importtime`; con varias
+repeticiones se toma la más rápida para no medir la caché de disco fría.
+"""
+import os
+import re
+import sys
+import logging
+import argparse
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).parent
+# Presupuesto por defecto en segundos (la importación de fastapi y sqlalchemy ya ronda 1 s)
+IMPORT_BUDGET_S = float(os.getenv('IMPORT_BUDGET_S', '2.0'))
+# Dependencias que solo deben cargarse al usar el modelo o el LLM
+LAZY_MODULES = ('numpy', 'pandas', 'scipy', 'sklearn', 'xgboost', 'joblib', 'openai')
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+_PROBE = (
+    "import sys, {module}\n"
+    "print(','.join(m for m in {lazy!r} if m in sys.modules))"
+)
+
+
+def measure(module: str = 'main') -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Importa `module` en un proceso nuevo. Devuelve (segundos totales, segundos propios por
+    paquete de primer nivel, dependencias diferidas que se han cargado igualmente).
+    """
+    env = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    by_package: Dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        by_package[name.split('.')[0]] += int(self_us) / 1e6
+        if name == module and len(indent) == 1:
+            total_us = int(cumulative_us)
+    output = proc.stdout.strip().splitlines()
+    loaded = [m for m in output[-1].split(',') if m] if output else []
+    return total_us / 1e6, dict(by_package), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste de importación de la aplicación")
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget', type=float, default=None,
+                        help=f"Segundos máximos (IMPORT_BUDGET_S={IMPORT_BUDGET_S} con --check)")
+    parser.add_argument('--check', action='store_true', help="Aplica el presupuesto por defecto")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(1, args.runs))]
+    total, by_package, loaded = min(runs, key=lambda run: run[0])
+
+    print(f"import {args.module}: {total:.3f}s (mejor de {len(runs)}: {', '.join(f'{r[0]:.3f}' for r in runs)})")
+    print(f"{'paquete':<28}{'s propios':>10}{'%':>7}")
+    for package, seconds in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<28}{seconds:>10.3f}{seconds / total * 100 if total else 0:>6.1f}%")
+
+    budget = args.budget if args.budget is not None else (IMPORT_BUDGET_S if args.check else None)
+    failed = False
+    if loaded:
+        logger.error(f"Dependencias pesadas importadas al cargar {args.module}: {', '.join(loaded)}")
+        failed = True
+    if budget is not None and total > budget:
+        logger.error(f"Importación de {args.module} por encima del presupuesto: {total:.3f}s > {budget:.3f}s")
+        failed = True
+    if failed:
+        sys.exit(1)
+    if budget is not None:
+        logger.info(f"Importación dentro del presupuesto ({total:.3f}s <= {budget:.3f}s)")
+
+
+if __name__ == '__main__':
+    main()
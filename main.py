@@ -1,21 +1,39 @@
+import time
+_import_started = time.perf_counter()
+
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import SQLAlchemyError
 
-from database import Base, engine
-from routers import sprints, pbis, stories, ml, reset_router 
+from database import Base, engine, DB_ASYNC
+from migrations import run_migrations
+from routers import ml, reset_router, import_router, metrics_router
+import metrics
+
+# Con DB_ASYNC=true las rutas CRUD usan AsyncSession; el camino síncrono sigue disponible
+if DB_ASYNC:
+    from routers import sprints_async as sprints, pbis_async as pbis, stories_async as stories
+else:
+    from routers import sprints, pbis, stories
 
 # Configurar logging
 default_log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 logging.basicConfig(level=logging.INFO, format=default_log_format)
 logger = logging.getLogger(__name__)
 
+# True cuando init_db() ya se ha ejecutado en este proceso o en el padre antes del fork (serve.py)
+_db_initialized = False
+
 # Inicializar la base de datos
 def init_db():
+    global _db_initialized
     try:
         Base.metadata.create_all(bind=engine)
         logger.info("Tablas creadas o existentes en la base de datos.")
+        applied = run_migrations(engine)
+        logger.info(f"Migraciones de esquema aplicadas: {applied}")
+        _db_initialized = True
     except SQLAlchemyError as e:
         logger.error(f"Error creando las tablas en la base de datos: {e}")
         raise
@@ -37,14 +55,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latencia por ruta, SQL por petición y registro de peticiones lentas (GET /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Eventos de arranque y apagado
 @app.on_event("startup")
 def on_startup():
-    init_db()
+    # Los workers de serve.py heredan la base ya inicializada por el padre
+    if not _db_initialized:
+        init_db()
+    from services.ai_services import PRIORITY_LOOKUP_ENABLED, MODEL_WATCH_INTERVAL_S, priority_models
+    if PRIORITY_LOOKUP_ENABLED:
+        # El modelo y su tabla se construyen al arrancar y no en la primera petición
+        priority_models.current()
+    priority_models.start_watcher(MODEL_WATCH_INTERVAL_S)
+    from services import priority_rescorer
+    priority_rescorer.start()
     logger.info("Aplicación arrancada y base de datos inicializada.")
 
 @app.on_event("shutdown")
-def on_shutdown():
+async def on_shutdown():
+    from services.ai_services import close_async_client, priority_models
+    from services.describe_jobs import cancel_all
+    from services import priority_rescorer
+    await cancel_all()
+    priority_rescorer.stop()
+    priority_models.stop_watcher()
+    await close_async_client()
+    if DB_ASYNC:
+        from database import get_async_engine
+        await get_async_engine().dispose()
     logger.info("Aplicación detenida.")
 
 # Incluir routers con prefijos y tags para mejor organización
@@ -74,23 +114,29 @@ def include_routers(app: FastAPI):
         prefix="",
         tags=["Mantenimiento"],
     )
+    app.include_router(
+        import_router.router,
+        prefix="",
+        tags=["Mantenimiento"],
+    )
+    app.include_router(
+        metrics_router.router,
+        prefix="",
+        tags=["Mantenimiento"],
+    )
 
 # Registrar routers
 def main():
     include_routers(app)
-    logger.info("Routers registrados en la aplicación.")
+    logger.info(f"Routers registrados en la aplicación ({'async' if DB_ASYNC else 'sync'}).")
 
 # Ejecutar registro de routers al importar
 main()
+# numpy, xgboost y openai no cuentan aquí: se importan con el primer uso (ver import_report.py)
+logger.info(f"Aplicación importada en {time.perf_counter() - _import_started:.2f}s")
 
-# Punto de entrada para uvicorn
+# Punto de entrada: serve.py (varios workers con el modelo compartido; --reload para desarrollo)
 if __name__ == "__main__":
-    import uvicorn
-
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info",
-    )
+    import serve
+
+    serve.main()
@@ -0,0 +1,266 @@
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Métricas de rendimiento en formato de exposición de Prometheus (GET /metrics): latencia por ruta,
+# consultas SQL por petición, inferencia del modelo de prioridad y llamadas a OpenAI. Son de cada
+# proceso: con varios workers cada uno expone las suyas.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Peticiones más lentas que esto se registran con el SQL que han ejecutado (0 = nunca)
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '1000'))
+# Sentencias SQL que se guardan por petición para ese registro
+SLOW_REQUEST_SQL_LIMIT = int(os.getenv('SLOW_REQUEST_SQL_LIMIT', '50'))
+# Presupuesto de sentencias SQL declarado por ruta (sql_budget): `log` avisa al superarlo, `raise` hace
+# fallar la sentencia que lo supera (modo de pruebas y benchmarks) y `off` no lo comprueba
+SQL_BUDGET_MODE = os.getenv('SQL_BUDGET_MODE', 'log').lower()
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{_labels(self.labels, key)} {_number(v)}' for key, v in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # Por serie: [cuenta por cubo (el último es +Inf), suma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._series.items())
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for key, (counts, total, n) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="{}"'.format('+Inf' if bound == float('inf') else _number(bound))
+                lines.append(f'{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {n}')
+        return lines
+
+
+HTTP_REQUESTS = Counter('http_requests_total', 'Peticiones HTTP atendidas', ('method', 'route', 'status'))
+HTTP_LATENCY = Histogram('http_request_duration_seconds', 'Latencia de las peticiones HTTP, cuerpo incluido',
+                         ('method', 'route'))
+REQUEST_SQL_STATEMENTS = Histogram('http_request_sql_statements', 'Sentencias SQL ejecutadas por petición',
+                                   ('method', 'route'), COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram('http_request_sql_seconds', 'Tiempo total de SQL por petición',
+                                ('method', 'route'))
+SQL_STATEMENT_SECONDS = Histogram('db_statement_duration_seconds', 'Duración de cada sentencia SQL', ('engine',))
+PRIORITY_INFERENCE_SECONDS = Histogram('priority_inference_seconds', 'Duración del cálculo de prioridad',
+                                       ('call',))
+PRIORITY_PREDICTIONS = Counter('priority_predictions_total', 'Prioridades calculadas por origen',
+                               ('source',))
+LLM_SECONDS = Histogram('llm_request_duration_seconds', 'Duración de las llamadas a OpenAI',
+                        ('mode', 'model', 'outcome'))
+LLM_FIRST_TOKEN_SECONDS = Histogram('llm_time_to_first_token_seconds', 'Tiempo hasta el primer fragmento en streaming',
+                                    ('model',))
+LLM_TOKENS = Counter('llm_tokens_total', 'Tokens consumidos en OpenAI', ('model', 'kind'))
+SQL_BUDGET_EXCEEDED = Counter('http_request_sql_budget_exceeded_total',
+                              'Peticiones que superan su presupuesto de sentencias SQL', ('method', 'route'))
+
+REGISTRY = (
+    HTTP_REQUESTS, HTTP_LATENCY, REQUEST_SQL_STATEMENTS, REQUEST_SQL_SECONDS, SQL_STATEMENT_SECONDS,
+    PRIORITY_INFERENCE_SECONDS, PRIORITY_PREDICTIONS, LLM_SECONDS, LLM_FIRST_TOKEN_SECONDS, LLM_TOKENS,
+    SQL_BUDGET_EXCEEDED,
+)
+
+
+def render() -> str:
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+
+# --- SQL por petición ---
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    sql_seconds: float = 0.0
+    sql: List[Tuple[float, str]] = field(default_factory=list)  # (segundos, sentencia) para el registro lento
+    budget: Optional[int] = None  # máximo de sentencias declarado por la ruta
+    over_budget: bool = False
+
+
+class SQLBudgetExceeded(RuntimeError):
+    """Una petición ha intentado ejecutar más sentencias SQL que las declaradas (SQL_BUDGET_MODE=raise)."""
+
+
+# Estadísticas de la petición en curso. Los endpoints síncronos y los iteradores de streaming se
+# ejecutan en el threadpool con una copia del contexto, así que ven el mismo objeto.
+_current: ContextVar[Optional[RequestStats]] = ContextVar('request_stats', default=None)
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Cuenta y cronometra cada sentencia de `engine` (global y en la petición en curso)."""
+    if not METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if (SQL_BUDGET_MODE == 'raise' and stats is not None and stats.budget is not None
+                and stats.statements >= stats.budget):
+            stats.over_budget = True
+            raise SQLBudgetExceeded(
+                f"Presupuesto de {stats.budget} sentencias SQL superado; siguiente: {' '.join(statement.split())[:200]}"
+            )
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_started'].pop()
+        SQL_STATEMENT_SECONDS.observe(elapsed, label)
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.sql_seconds += elapsed
+            if stats.budget is not None and stats.statements > stats.budget:
+                stats.over_budget = True
+            if len(stats.sql) < SLOW_REQUEST_SQL_LIMIT:
+                stats.sql.append((elapsed, statement))
+
+    @event.listens_for(engine, 'handle_error')
+    def _error(context):
+        started = context.connection.info.get('metrics_started') if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def set_sql_budget(statements: Optional[int]) -> None:
+    """Fija el máximo de sentencias SQL de la petición en curso (None lo retira)."""
+    stats = _current.get()
+    if stats is not None:
+        stats.budget = statements
+
+
+def sql_budget(statements: int):
+    """
+    Dependencia que declara cuántas sentencias SQL puede ejecutar una ruta en el peor caso:
+    `@router.get(..., dependencies=[metrics.sql_budget(3)])`. Un N+1 nuevo la supera.
+    """
+    async def declare() -> None:
+        set_sql_budget(statements)
+    return Depends(declare)
+
+
+# --- Middleware ASGI ---
+
+class MetricsMiddleware:
+    """
+    Mide cada petición HTTP hasta el último fragmento del cuerpo (incluye NDJSON y SSE). La ruta
+    se etiqueta con su plantilla (/sprints/sprints/{sprint_id}) para no crear una serie por id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            method = scope['method']
+            HTTP_REQUESTS.inc(method, path, str(status_code))
+            HTTP_LATENCY.observe(elapsed, method, path)
+            REQUEST_SQL_STATEMENTS.observe(stats.statements, method, path)
+            REQUEST_SQL_SECONDS.observe(stats.sql_seconds, method, path)
+            if stats.over_budget and SQL_BUDGET_MODE != 'off':
+                SQL_BUDGET_EXCEEDED.inc(method, path)
+                _log_over_budget(method, scope.get('path', path), stats)
+            if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                _log_slow(method, scope.get('path', path), status_code, elapsed, stats)
+
+
+def _sql_lines(stats: RequestStats) -> str:
+    lines = [f"  {seconds * 1000:8.1f} ms  {' '.join(statement.split())[:500]}" for seconds, statement in stats.sql]
+    if stats.statements > len(stats.sql):
+        lines.append(f"  ... y {stats.statements - len(stats.sql)} sentencias más")
+    return '\n' + '\n'.join(lines) if lines else ''
+
+
+def _log_slow(method: str, path: str, status_code: int, elapsed: float, stats: RequestStats) -> None:
+    logger.warning(
+        f"Petición lenta: {method} {path} -> {status_code} en {elapsed * 1000:.0f} ms; "
+        f"{stats.statements} sentencias SQL ({stats.sql_seconds * 1000:.0f} ms)" + _sql_lines(stats)
+    )
+
+
+def _log_over_budget(method: str, path: str, stats: RequestStats) -> None:
+    logger.warning(
+        f"Presupuesto SQL superado: {method} {path} ha intentado más de {stats.budget} sentencias "
+        f"(ejecutadas {stats.statements})" + _sql_lines(stats)
+    )
@@ -0,0 +1,132 @@
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+import sprint_stats
+from models import Base
+
+logger = logging.getLogger(__name__)
+
+# `create_all` nunca modifica tablas existentes: los cambios de esquema posteriores
+# (índices, columnas) se aplican aquí como pasos versionados sobre bases ya creadas.
+
+# Metadata propia: drop_all/create_all de los modelos (p. ej. /reset-db) no borra el historial
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations',
+    migration_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def create_missing_indexes(conn: Connection, table_name: str) -> None:
+    """
+    Crea los índices declarados en models.py que aún no existen en la tabla. Omite los de
+    columnas que todavía no existen: los crea la migración que añade la columna.
+    """
+    inspector = inspect(conn)
+    existing = {ix['name'] for ix in inspector.get_indexes(table_name)}
+    columns = {c['name'] for c in inspector.get_columns(table_name)}
+    for index in Base.metadata.tables[table_name].indexes:
+        if index.name not in existing and {c.name for c in index.columns} <= columns:
+            index.create(bind=conn)
+            logger.info(f"Índice creado: {index.name}")
+
+
+def add_missing_column(conn: Connection, table_name: str, column_name: str) -> None:
+    """Añade una columna declarada en models.py si la tabla existente no la tiene."""
+    if column_name in {c['name'] for c in inspect(conn).get_columns(table_name)}:
+        return
+    column = Base.metadata.tables[table_name].c[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    ddl = f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}'
+    if column.server_default is not None:
+        ddl += f' DEFAULT {column.server_default.arg}'
+    conn.exec_driver_sql(ddl)
+    logger.info(f"Columna añadida: {table_name}.{column_name}")
+
+
+def _v1_foreign_key_and_filter_indexes(conn: Connection) -> None:
+    create_missing_indexes(conn, 'pbis')
+    create_missing_indexes(conn, 'stories')
+
+
+def _v2_story_priority_dirty(conn: Connection) -> None:
+    add_missing_column(conn, 'stories', 'priority_dirty')
+    create_missing_indexes(conn, 'stories')
+
+
+# Claves derivadas que usa services/bulk_import.py cuando la fila no trae una explícita.
+# Solo se rellenan las que no se repiten: el índice único no admitiría duplicados.
+_EXTERNAL_KEY_BACKFILL = (
+    "UPDATE sprints SET external_key = name WHERE external_key IS NULL "
+    "AND name NOT IN (SELECT name FROM sprints GROUP BY name HAVING COUNT(*) > 1)",
+    "UPDATE pbis SET external_key = COALESCE(CAST(sprint_id AS TEXT), '') || '/' || title "
+    "WHERE external_key IS NULL AND NOT EXISTS (SELECT 1 FROM pbis p WHERE p.id <> pbis.id "
+    "AND p.title = pbis.title AND p.sprint_id IS NOT DISTINCT FROM pbis.sprint_id)",
+    "UPDATE stories SET external_key = CAST(pbi_id AS TEXT) || '/' || title "
+    "WHERE external_key IS NULL AND NOT EXISTS (SELECT 1 FROM stories s WHERE s.id <> stories.id "
+    "AND s.title = stories.title AND s.pbi_id = stories.pbi_id)",
+)
+
+
+def _v3_external_keys(conn: Connection) -> None:
+    for table_name in ('sprints', 'pbis', 'stories'):
+        add_missing_column(conn, table_name, 'external_key')
+    for statement in _EXTERNAL_KEY_BACKFILL:
+        conn.exec_driver_sql(statement)
+    for table_name in ('sprints', 'pbis', 'stories'):
+        create_missing_indexes(conn, table_name)
+
+
+def _v4_sprint_stats(conn: Connection) -> None:
+    Base.metadata.tables['sprint_stats'].create(bind=conn, checkfirst=True)
+    if sprint_stats.maintained(conn):
+        sprint_stats.install_triggers(conn)
+    sprint_stats.rebuild(conn)
+
+
+# (versión, descripción, paso). Añadir siempre al final con una versión mayor.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, 'Índices en pbis.sprint_id, stories.pbi_id, stories.priority y stories.story_type',
+     _v1_foreign_key_and_filter_indexes),
+    (2, 'Columna stories.priority_dirty para el recálculo incremental de prioridades',
+     _v2_story_priority_dirty),
+    (3, 'Columna external_key única en sprints, pbis y stories para la importación masiva',
+     _v3_external_keys),
+    (4, 'Tabla sprint_stats de agregados por sprint, mantenida por triggers en SQLite',
+     _v4_sprint_stats),
+]
+
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Aplica, en orden y cada uno en su propia transacción, los pasos aún no registrados.
+    Devuelve cuántos se han aplicado.
+    """
+    migration_metadata.create_all(bind=engine)
+    applied = 0
+    with engine.connect() as conn:
+        done = set(conn.execute(select(schema_migrations.c.version)).scalars())
+    for version, description, step in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                step(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                ))
+        except SQLAlchemyError as e:
+            logger.error(f"Error aplicando la migración {version} ({description}): {e}")
+            raise
+        logger.info(f"Migración {version} aplicada: {description}")
+        applied += 1
+    return applied
@@ -1,21 +1,17 @@
-import os
-from pathlib import Path
-from functools import lru_cache
-import joblib
-import pandas as pd
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict
+from typing import Optional, Dict, Any
 import logging
 
-from schemas import Criticity, StoryType, Priority
+from schemas import Criticity, StoryType
+from services.model_registry import ModelVersion
 
 # Configuración del logger
 default_log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 logging.basicConfig(level=logging.INFO, format=default_log_format)
 logger = logging.getLogger(__name__)
 
-# Ruta del modelo ML
-MODEL_PATH = Path(__file__).parent / 'ml' / 'priority_model.pkl'
+# El modelo lo gestiona el registro versionado de services.ai_services (ml/modelo_prioridad*.pkl);
+# este módulo solo adapta la entrada con enums de schemas.
 
 # --- Input Schema ---
 class PriorityInput(BaseModel):
@@ -33,53 +29,29 @@ class PriorityInput(BaseModel):
         return v
 
 # --- Model Loader ---
-@lru_cache(maxsize=1)
-def load_model() -> Optional[joblib.Bunch]:
+def load_model() -> Optional[ModelVersion]:
     """
-    Carga el modelo de disco la primera vez y lo cachea.
+    Versión activa del modelo de prioridad (la carga la primera vez).
     """
-    try:
-        if MODEL_PATH.exists():
-            logger.info(f"Cargando modelo desde {MODEL_PATH}")
-            return joblib.load(MODEL_PATH)
-        else:
-            logger.warning(f"No se encontró el archivo de modelo en {MODEL_PATH}")
-            return None
-    except Exception as e:
-        logger.error(f"Error cargando el modelo: {e}")
-        return None
+    from services.ai_services import priority_models
+    return priority_models.current()
 
 # --- Prediction ---
-def predict_priority(input_data: Dict) -> Dict[str, Optional[str]]:
+def predict_priority(input_data: Dict) -> Dict[str, Any]:
     """
-    Recibe un dict con los campos necesarios, valida con Pydantic,
-    aplica el pipeline del modelo y devuelve la prioridad prevista.
+    Recibe un dict con los campos necesarios, valida con Pydantic
+    y devuelve la prioridad prevista y la versión del modelo que la calculó.
     """
+    from services.ai_services import calculate_priority, priority_payload_from_story
+
     try:
         data = PriorityInput(**input_data)
     except Exception as e:
         logger.error(f"Error validando input: {e}")
         return {"error": f"Datos inválidos: {e}"}
 
-    model = load_model()
-    if model is None:
-        return {"error": "Modelo no entrenado o ruta inválida."}
-
-    # Preparar DataFrame para la predicción
-    df = pd.DataFrame([{
-        "story_points": data.story_points,
-        "business_value": data.business_value,
-        "criticity": data.criticity.value,
-        "internal_dependencies": data.internal_dependencies,
-        "continuation": data.continuation,
-        "story_type": data.story_type.value
-    }])
-
-    try:
-        pred = model.predict(df)[0]
-        prioridad = Priority(pred)
-        logger.info(f"Predicción completada: {prioridad}")
-        return {"prioridad": prioridad.value}
-    except Exception as e:
-        logger.error(f"Error en la predicción: {e}")
-        return {"error": f"Error en la predicción: {e}"}
+    result = calculate_priority(priority_payload_from_story(data))
+    if 'error' in result:
+        return result
+    logger.info(f"Predicción completada: {result['prioridad']} ({result['model_version']})")
+    return {"prioridad": result['prioridad'], "model_version": result['model_version']}
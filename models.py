@@ -1,5 +1,5 @@
 from datetime import date
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, DateTime, Text
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -11,8 +11,12 @@ class Sprint(Base):
     name = Column(String(100), nullable=False)
     start_date = Column(Date, nullable=True)
     end_date = Column(Date, nullable=True)
+    # Identificador en el gestor de origen para reimportar sin duplicar (services/bulk_import.py)
+    external_key = Column(String(255), nullable=True, unique=True, index=True)
 
-    pbis = relationship('PBI', back_populates='sprint', cascade='all, delete-orphan', lazy='selectin')
+    # Ninguna relación se carga sola: cada consulta de crud.py declara sus loader options y un
+    # acceso no previsto falla en lugar de lanzar una consulta por fila
+    pbis = relationship('PBI', back_populates='sprint', cascade='all, delete-orphan', lazy='raise')
 
     def __repr__(self) -> str:
         return f"<Sprint(id={self.id}, name='{self.name}')>"
@@ -23,10 +27,11 @@ class PBI(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
-    sprint_id = Column(Integer, ForeignKey('sprints.id', ondelete='CASCADE'), nullable=True)
+    sprint_id = Column(Integer, ForeignKey('sprints.id', ondelete='CASCADE'), nullable=True, index=True)
+    external_key = Column(String(255), nullable=True, unique=True, index=True)
 
-    sprint = relationship('Sprint', back_populates='pbis', lazy='joined')
-    stories = relationship('Story', back_populates='pbi', cascade='all, delete-orphan', lazy='selectin')
+    sprint = relationship('Sprint', back_populates='pbis', lazy='raise')
+    stories = relationship('Story', back_populates='pbi', cascade='all, delete-orphan', lazy='raise')
 
     def __repr__(self) -> str:
         return f"<PBI(id={self.id}, title='{self.title}')>"
@@ -42,15 +47,59 @@ class Story(Base):
     criticity = Column(Integer, nullable=True)  # 1: baja, 2: media, 3: alta
     story_points = Column(Integer, nullable=True)
     acceptance_criteria = Column(Text, nullable=True)
-    priority = Column(Integer, nullable=True)   # 0: baja, 1: media, 2: alta
+    priority = Column(Integer, nullable=True, index=True)   # 0: baja, 1: media, 2: alta
+    # Sus características han cambiado y la prioridad está pendiente de recalcular
+    priority_dirty = Column(Boolean, nullable=False, default=False, server_default='0', index=True)
     business_value = Column(Integer, nullable=True)
     complexity = Column(Integer, nullable=True)
-    story_type = Column(Integer, nullable=False, default=1)  # 1: usuario, 2: técnica
+    story_type = Column(Integer, nullable=False, default=1, index=True)  # 1: usuario, 2: técnica
     continuation = Column(Integer, nullable=False, default=0)
     internal_dependencies = Column(Integer, nullable=False, default=0)
+    external_key = Column(String(255), nullable=True, unique=True, index=True)
 
-    pbi_id = Column(Integer, ForeignKey('pbis.id', ondelete='CASCADE'), nullable=False)
-    pbi = relationship('PBI', back_populates='stories', lazy='joined')
+    pbi_id = Column(Integer, ForeignKey('pbis.id', ondelete='CASCADE'), nullable=False, index=True)
+    pbi = relationship('PBI', back_populates='stories', lazy='raise')
 
     def __repr__(self) -> str:
         return f"<Story(id={self.id}, title='{self.title}')>"
+
+class SprintStats(Base):
+    __tablename__ = 'sprint_stats'
+
+    # Totales de las historias de cada sprint por (prioridad, tipo). En SQLite los mantienen los
+    # triggers de sprint_stats.py en la misma sentencia que escribe la historia o el PBI.
+    sprint_id = Column(Integer, ForeignKey('sprints.id', ondelete='CASCADE'), primary_key=True)
+    priority = Column(Integer, primary_key=True)  # -1: sin prioridad (NULL no sirve en la clave)
+    story_type = Column(Integer, primary_key=True)
+    stories = Column(Integer, nullable=False, default=0)
+    story_points = Column(Integer, nullable=False, default=0)
+    business_value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<SprintStats(sprint_id={self.sprint_id}, priority={self.priority}, story_type={self.story_type})>"
+
+class LLMCacheEntry(Base):
+    __tablename__ = 'llm_cache'
+
+    key = Column(String(64), primary_key=True)  # sha256 de modelo + prompt + parámetros
+    model = Column(String(50), nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    last_used_at = Column(DateTime, nullable=False, index=True)
+    hits = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<LLMCacheEntry(key='{self.key[:12]}', model='{self.model}')>"
+
+class DescribeJobRecord(Base):
+    __tablename__ = 'describe_jobs'
+
+    # Estado de los trabajos de services/describe_jobs.py, para que cualquier worker responda al sondeo
+    id = Column(String(32), primary_key=True)
+    sprint_id = Column(Integer, nullable=False, index=True)
+    status = Column(String(20), nullable=False)
+    state = Column(Text, nullable=False)  # JSON de DescribeJob.to_dict()
+    updated_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<DescribeJobRecord(id='{self.id}', sprint_id={self.sprint_id}, status='{self.status}')>"
@@ -0,0 +1,48 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import schemas
+
+# Columnas proyectables con `fields=` en cada nivel superior
+SPRINT_FIELDS = ('id', 'name', 'start_date', 'end_date')
+PBI_FIELDS = ('id', 'title', 'description', 'sprint_id')
+
+# Profundidad máxima (= árbol completo) de cada endpoint
+SPRINT_MAX_DEPTH = 2  # 0: sprint, 1: + PBIs, 2: + historias
+PBI_MAX_DEPTH = 1     # 0: PBI, 1: + historias
+
+
+def parse_fields(raw: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """
+    Convierte `fields=a,b,c` en la lista de columnas a cargar. El id se incluye siempre.
+    Lanza ValueError si se pide una columna no proyectable.
+    """
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return list(dict.fromkeys(fields))
+
+
+def is_full_view(depth: int, max_depth: int, fields: Optional[Sequence[str]]) -> bool:
+    """True si la petición equivale a la respuesta completa de siempre."""
+    return depth >= max_depth and not fields
+
+
+def project_pbi(pbi: Any, depth: int, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Serializa un PBI hasta `depth` niveles leyendo solo las columnas cargadas."""
+    data = {f: getattr(pbi, f) for f in (fields or PBI_FIELDS)}
+    if depth >= 1:
+        data['stories'] = [schemas.Story.model_validate(s).model_dump() for s in pbi.stories]
+    return data
+
+
+def project_sprint(sprint: Any, depth: int, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Serializa un sprint hasta `depth` niveles leyendo solo las columnas cargadas."""
+    data = {f: getattr(sprint, f) for f in (fields or SPRINT_FIELDS)}
+    if depth >= 1:
+        data['pbis'] = [project_pbi(p, depth - 1) for p in sprint.pbis]
+    return data
@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional, Tuple
+
+from fastapi import Response, status
+
+logger = logging.getLogger(__name__)
+
+# Caché de respuestas GET de sprints con ETag fuerte. Los escritores de crud.py,
+# el cálculo de prioridades y /reset-db la invalidan al confirmar cada cambio.
+# Cada proceso guarda sus propias entradas. Con varios workers (serve.py) las invalidaciones se
+# comparten con un contador en memoria compartida creado antes del fork: el worker que ve el
+# contador cambiado por otro vacía su caché antes de responder con ella.
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '1024'))
+
+LIST_SCOPE = 'list'
+SPRINT_SCOPE = 'sprint'
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple[str, Optional[int], Hashable], CachedResponse]" = OrderedDict()
+_generation = 0
+# multiprocessing.Value compartido entre workers (share_across_workers) y su último valor visto aquí
+_shared = None
+_seen = 0
+
+
+def share_across_workers() -> None:
+    """Llamar en el proceso padre antes de crear los workers: comparten desde entonces las invalidaciones."""
+    global _shared, _seen
+    import multiprocessing
+
+    _shared = multiprocessing.Value('q', 0)
+    _seen = 0
+
+
+def _sync() -> None:
+    """Con _lock tomado: si otro worker invalidó desde la última vez, se vacía la caché local."""
+    global _generation, _seen
+    if _shared is None:
+        return
+    value = _shared.value
+    if value != _seen:
+        _entries.clear()
+        _generation += 1
+        _seen = value
+
+
+def _publish() -> bool:
+    """Con _lock tomado: anuncia una invalidación a los demás workers. True si otro ya había invalidado."""
+    global _seen
+    if _shared is None:
+        return False
+    with _shared.get_lock():
+        missed = _shared.value != _seen
+        _shared.value += 1
+        _seen = _shared.value
+    return missed
+
+
+def current_generation() -> int:
+    """Marca a tomar ANTES de leer de la DB; put() descarta el resultado si hubo escrituras entretanto."""
+    with _lock:
+        _sync()
+        return _generation
+
+
+def get(scope: str, sprint_id: Optional[int], variant: Hashable) -> Optional[CachedResponse]:
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    key = (scope, sprint_id, variant)
+    with _lock:
+        _sync()
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+
+
+def put(scope: str, sprint_id: Optional[int], variant: Hashable, body: bytes, generation: int) -> CachedResponse:
+    entry = CachedResponse(etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"', body=body)
+    if not RESPONSE_CACHE_ENABLED:
+        return entry
+    with _lock:
+        _sync()
+        if generation != _generation:
+            # Una escritura se confirmó mientras se construía la respuesta: no cachear datos viejos
+            return entry
+        _entries[(scope, sprint_id, variant)] = entry
+        _entries.move_to_end((scope, sprint_id, variant))
+        while len(_entries) > RESPONSE_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return entry
+
+
+def invalidate_sprint(*sprint_ids: Optional[int]) -> None:
+    """Invalida las respuestas de esos sprints y todos los listados."""
+    global _generation
+    targets = {sid for sid in sprint_ids if sid is not None}
+    with _lock:
+        _generation += 1
+        if _publish():
+            _entries.clear()
+        for key in [k for k in _entries if k[0] == LIST_SCOPE or k[1] in targets]:
+            del _entries[key]
+
+
+def invalidate_all() -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        _publish()
+        _entries.clear()
+    logger.info("Caché de respuestas vaciada")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    return '*' in candidates or any(c.removeprefix('W/') == etag for c in candidates)
+
+
+def respond(entry: CachedResponse, if_none_match: Optional[str]) -> Response:
+    """200 con el cuerpo cacheado, o 304 sin cuerpo si el cliente ya tiene esa versión."""
+    headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+    if _etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type='application/json', headers=headers)
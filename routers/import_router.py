@@ -0,0 +1,43 @@
+# routers/import_router.py
+import io
+import tempfile
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from database import engine
+from services import bulk_import
+
+router = APIRouter()
+
+
+@router.post("/import", tags=["Mantenimiento"], status_code=status.HTTP_200_OK)
+async def importar_backlog(
+    request: Request,
+    format: Optional[str] = Query(None, pattern='^(csv|jsonl)$', description="Por defecto, según el Content-Type"),
+    chunk_size: int = Query(bulk_import.IMPORT_CHUNK_SIZE, ge=1, le=100000, description="Filas por transacción"),
+) -> Dict[str, Any]:
+    """
+    Importa una exportación CSV o JSONL del backlog (cuerpo de la petición, una fila por historia).
+    Reimportar la misma exportación actualiza las filas en lugar de duplicarlas.
+    """
+    fmt = format or bulk_import.format_of(content_type=request.headers.get('content-type'))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envíe text/csv o application/x-ndjson, o indique ?format=csv|jsonl",
+        )
+
+    # El cuerpo se vuelca a disco según llega y se importa por bloques: la memoria no crece con el fichero
+    with tempfile.TemporaryFile() as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding='utf-8-sig', newline='')
+        try:
+            return await run_in_threadpool(bulk_import.import_stream, engine, stream, fmt, chunk_size)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El fichero debe estar en UTF-8")
+        finally:
+            stream.detach()
@@ -0,0 +1,13 @@
+# routers/metrics_router.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", tags=["Mantenimiento"], response_class=PlainTextResponse)
+def exponer_metricas():
+    """Métricas de este proceso en formato de exposición de Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,14 +1,27 @@
+import json
 import logging
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 import models
-from database import get_db
+import crud
+import metrics
+import response_cache
+from database import SessionLocal, get_db, get_read_db
+from services import describe_jobs, llm_cache, priority_rescorer
 from services.ai_services import (
     calculate_priority,
-    generate_sprint_goal,
-    generate_description_and_acceptance,
+    calculate_priorities,
+    check_priority_lookup,
+    priority_payload_from_story,
+    generate_sprint_goal_async,
+    generate_description_and_acceptance_async,
+    stream_sprint_goal_async,
+    stream_description_and_acceptance_async,
+    priority_models,
     PriorityCalcInput,
     DescriptionInput,
     SprintGoalInput
@@ -25,14 +38,22 @@ router = APIRouter(
     tags=["ML"]
 )
 
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 # --- Endpoints ---
+# Los endpoints son async: las llamadas a OpenAI se esperan sin ocupar hilos y el
+# trabajo síncrono (SQLite, inferencia) se delega puntualmente al threadpool.
 
 @router.post("/prioridad/", status_code=status.HTTP_200_OK)
-def obtener_prioridad(
+async def obtener_prioridad(
     data: PriorityCalcInput
 ) -> Dict[str, Any]:
     """Calcula la prioridad de una historia usando ML con todas las características relevantes."""
-    result = calculate_priority(data.dict(by_alias=True))
+    result = await run_in_threadpool(calculate_priority, data.dict(by_alias=True))
     if 'error' in result:
         logger.error(f"Error calculando prioridad: {result['error']}")
         raise HTTPException(
@@ -40,66 +61,99 @@ def obtener_prioridad(
             detail=result['error']
         )
     logger.info("Prioridad calculada correctamente")
-    return {'prioridad': result['prioridad']}
+    return {'prioridad': result['prioridad'], 'model_version': result['model_version']}
+
+
+@router.get("/prioridad/lookup/check", status_code=status.HTTP_200_OK)
+async def comprobar_tabla_prioridades(
+    sample: Optional[int] = Query(None, ge=1, description="Celdas a comprobar (por defecto, toda la rejilla)")
+) -> Dict[str, Any]:
+    """Compara la tabla precalculada de prioridades con predicciones en vivo del modelo."""
+    report = await run_in_threadpool(check_priority_lookup, sample)
+    if 'error' in report:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=report['error']
+        )
+    if report['mismatches']:
+        logger.error(f"Tabla de prioridades inconsistente: {report['mismatches']} de {report['checked']}")
+    return report
+
+
+def _calcular_prioridades(db: Session, sprint_id: int) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+    """Puntúa y guarda las prioridades del sprint; None si el sprint no existe."""
+    if not db.query(models.Sprint.id).filter(models.Sprint.id == sprint_id).first():
+        return None
+
+    stories = crud.get_story_features_by_sprint(db, sprint_id)
+    payloads: List[Dict[str, Any]] = []
+    scored_stories = []
+    for story in stories:
+        try:
+            payloads.append(priority_payload_from_story(story))
+            scored_stories.append(story)
+        except Exception as e:
+            logger.error(f"Error procesando story {story.id}: {e}")
+
+    results: List[Dict[str, Any]] = []
+    priorities: Dict[int, int] = {}
+    model_version: Optional[str] = None
+    for story, res in zip(scored_stories, calculate_priorities(payloads)):
+        if 'error' in res:
+            logger.error(f"Error procesando story {story.id}: {res['error']}")
+            continue
+        # Todas las historias de una llamada se puntúan con la misma versión del modelo
+        model_version = res['model_version']
+        priorities[story.id] = res['prioridad_num']
+        results.append({
+            'story_id': story.id,
+            'title': story.title,
+            'prioridad': res['prioridad']
+        })
+
+    crud.update_story_priorities(db, priorities)
+    return results, model_version
 
 
-@router.post("/calcular_prioridades/{sprint_id}/", status_code=status.HTTP_200_OK)
-def calcular_prioridades_para_sprint(
+@router.post("/calcular_prioridades/{sprint_id}/", status_code=status.HTTP_200_OK, dependencies=[metrics.sql_budget(4)])
+async def calcular_prioridades_para_sprint(
     sprint_id: int,
     db: Session = Depends(get_db)
-) -> Dict[str, List[Dict[str, Any]]]:
+) -> Dict[str, Any]:
     """Calcula y ordena prioridades de todas las historias de un sprint usando todas las características."""
-    sprint = db.query(models.Sprint).get(sprint_id)
-    if not sprint:
+    scored = await run_in_threadpool(_calcular_prioridades, db, sprint_id)
+    if scored is None:
         logger.warning(f"Sprint no encontrado: id={sprint_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Sprint not found"
         )
 
-    results: List[Dict[str, Any]] = []
-    for pbi in sprint.pbis:
-        for story in pbi.stories:
-            try:
-                payload = {
-                    "story_points": story.story_points or 0,
-                    "business_value": story.business_value or 0,
-                    "criticidad": float(story.criticity) if story.criticity is not None else 0,
-                    "internal_dependencies": story.internal_dependencies or 0,
-                    "continuation": story.continuation or 0,
-                    "story_type": {1: "user", 2: "technical"}.get(story.story_type, "user")
-                }
-
-                res = calculate_priority(payload)
-                if 'error' not in res:
-                    story.priority = res['prioridad_num']
-                    results.append({
-                        'story_id': story.id,
-                        'title': story.title,
-                        'prioridad': res['prioridad']
-                    })
-            except Exception as e:
-                logger.error(f"Error procesando story {story.id}: {e}")
-
-    db.commit()
+    results, model_version = scored
     ordered = sorted(results, key=lambda x: x['prioridad'], reverse=True)
     logger.info("Prioridades calculadas y ordenadas para sprint %s", sprint_id)
-    return {'ordenadas_por_prioridad': ordered}
+    return {'ordenadas_por_prioridad': ordered, 'model_version': model_version}
 
 
-@router.get("/sprint_goal/{sprint_id}", status_code=status.HTTP_200_OK)
-def obtener_sprint_goal(
-    sprint_id: int,
-    db: Session = Depends(get_db)
-) -> Dict[str, str]:
-    """Genera objetivo de sprint a partir de títulos y descripciones."""
+def _textos_historias_sprint(db: Session, sprint_id: int) -> List[str]:
     stories = (
-        db.query(models.Story)
-        .join(models.PBI)
+        db.query(models.Story.title, models.Story.raw_description)
+        .join(models.PBI, models.Story.pbi_id == models.PBI.id)
         .filter(models.PBI.sprint_id == sprint_id)
         .all()
     )
-    if not stories:
+    return [f"{s.title}. {s.raw_description or ''}" for s in stories]
+
+
+@router.get("/sprint_goal/{sprint_id}", status_code=status.HTTP_200_OK)
+async def obtener_sprint_goal(
+    sprint_id: int,
+    force_refresh: bool = Query(False, description="Ignora la caché LLM y genera de nuevo"),
+    db: Session = Depends(get_read_db)
+) -> Dict[str, str]:
+    """Genera objetivo de sprint a partir de títulos y descripciones."""
+    textos = await run_in_threadpool(_textos_historias_sprint, db, sprint_id)
+    if not textos:
         logger.warning(f"No se encontraron historias para sprint {sprint_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -107,9 +161,7 @@ def obtener_sprint_goal(
         )
 
     try:
-        goal_input = SprintGoalInput(
-            stories=[f"{s.title}. {s.raw_description or ''}" for s in stories]
-        )
+        goal_input = SprintGoalInput(stories=textos)
     except Exception as e:
         logger.error(f"Error validando input para sprint goal: {e}")
         raise HTTPException(
@@ -117,7 +169,7 @@ def obtener_sprint_goal(
             detail=str(e)
         )
 
-    res = generate_sprint_goal(goal_input.dict())
+    res = await generate_sprint_goal_async(goal_input.dict(), force_refresh=force_refresh)
     if 'error' in res:
         logger.error(f"Error generando objetivo de sprint: {res['error']}")
         raise HTTPException(
@@ -128,13 +180,62 @@ def obtener_sprint_goal(
     return {'sprint_id': str(sprint_id), 'goal': res['sprint_goal']}
 
 
+@router.get("/sprint_goal/{sprint_id}/stream", status_code=status.HTTP_200_OK)
+async def obtener_sprint_goal_stream(
+    sprint_id: int,
+    force_refresh: bool = Query(False, description="Ignora la caché LLM y genera de nuevo"),
+    db: Session = Depends(get_read_db)
+) -> StreamingResponse:
+    """
+    Igual que /sprint_goal/{sprint_id}, pero como Server-Sent Events: eventos `token` con
+    cada fragmento según lo genera el modelo y un evento final `result` (o `error`).
+    """
+    textos = await run_in_threadpool(_textos_historias_sprint, db, sprint_id)
+    if not textos:
+        logger.warning(f"No se encontraron historias para sprint {sprint_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No stories found"
+        )
+
+    try:
+        goal_input = SprintGoalInput(stories=textos)
+    except Exception as e:
+        logger.error(f"Error validando input para sprint goal: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    async def eventos() -> AsyncIterator[str]:
+        async for event, data in stream_sprint_goal_async(goal_input.dict(), force_refresh=force_refresh):
+            if event == 'result':
+                logger.info("Objetivo de sprint generado (stream) para sprint %s", sprint_id)
+                data = {'sprint_id': str(sprint_id), 'goal': data['sprint_goal']}
+            elif event == 'error':
+                logger.error(f"Error generando objetivo de sprint: {data['error']}")
+            yield _sse(event, data)
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+def _guardar_descripcion(db: Session, story: models.Story, res: Dict[str, Any]) -> None:
+    # El PBI viene cargado con la historia (with_pbi): tras el commit ya no se puede leer
+    sprint_id = story.pbi.sprint_id
+    story.formatted_description = res.get('historia', '')
+    story.acceptance_criteria = "\n".join(res.get('criterios', []))
+    db.commit()
+    response_cache.invalidate_sprint(sprint_id)
+
+
 @router.post("/stories/describir_criterios/{story_id}", status_code=status.HTTP_200_OK)
-def generar_descripcion_criterios(
+async def generar_descripcion_criterios(
     story_id: int,
+    force_refresh: bool = Query(False, description="Ignora la caché LLM y genera de nuevo"),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Genera descripción y criterios de aceptación para una historia."""
-    story = db.query(models.Story).get(story_id)
+    story = await run_in_threadpool(crud.get_story_by_id, db, story_id, with_pbi=True)
     if not story:
         logger.warning(f"Historia no encontrada: id={story_id}")
         raise HTTPException(
@@ -151,7 +252,7 @@ def generar_descripcion_criterios(
             detail=str(e)
         )
 
-    res = generate_description_and_acceptance(desc_input.dict())
+    res = await generate_description_and_acceptance_async(desc_input.dict(), force_refresh=force_refresh)
     if 'error' in res:
         logger.error(f"Error generando descripción/criterios: {res['error']}")
         raise HTTPException(
@@ -159,9 +260,7 @@ def generar_descripcion_criterios(
             detail=res['error']
         )
 
-    story.formatted_description = res.get('historia', '')
-    story.acceptance_criteria = "\n".join(res.get('criterios', []))
-    db.commit()
+    await run_in_threadpool(_guardar_descripcion, db, story, res)
     logger.info(f"Descripción y criterios actualizados para story id={story_id}")
 
     return {
@@ -169,3 +268,139 @@ def generar_descripcion_criterios(
         'formatted_description': story.formatted_description,
         'acceptance_criteria': story.acceptance_criteria
     }
+
+
+def _guardar_descripcion_por_id(story_id: int, res: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    # Sesión propia: la de la dependencia ya se ha cerrado cuando termina el stream
+    db = SessionLocal.session_factory()
+    try:
+        story = crud.get_story_by_id(db, story_id, with_pbi=True)
+        if not story:
+            return None
+        _guardar_descripcion(db, story, res)
+        return story.formatted_description, story.acceptance_criteria
+    finally:
+        db.close()
+
+
+@router.post("/stories/describir_criterios/{story_id}/stream", status_code=status.HTTP_200_OK)
+async def generar_descripcion_criterios_stream(
+    story_id: int,
+    force_refresh: bool = Query(False, description="Ignora la caché LLM y genera de nuevo"),
+    db: Session = Depends(get_read_db)
+) -> StreamingResponse:
+    """
+    Igual que /stories/describir_criterios/{story_id}, pero como Server-Sent Events. Al terminar
+    el stream se parsea el JSON, se guarda en la historia y se emite el evento `result`.
+    """
+    story = await run_in_threadpool(crud.get_story_by_id, db, story_id)
+    if not story:
+        logger.warning(f"Historia no encontrada: id={story_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Story not found"
+        )
+
+    try:
+        desc_input = DescriptionInput(idea_general=story.raw_description or '')
+    except Exception as e:
+        logger.error(f"Error validando idea general: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    async def eventos() -> AsyncIterator[str]:
+        async for event, data in stream_description_and_acceptance_async(
+            desc_input.dict(), force_refresh=force_refresh
+        ):
+            if event == 'result':
+                saved = await run_in_threadpool(_guardar_descripcion_por_id, story_id, data)
+                if saved is None:
+                    event, data = 'error', {'error': 'Story not found'}
+                else:
+                    logger.info(f"Descripción y criterios actualizados (stream) para story id={story_id}")
+                    data = {'id': story_id, 'formatted_description': saved[0], 'acceptance_criteria': saved[1]}
+            if event == 'error':
+                logger.error(f"Error generando descripción/criterios: {data['error']}")
+            yield _sse(event, data)
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/sprints/{sprint_id}/describir_todo", status_code=status.HTTP_202_ACCEPTED)
+async def describir_todo_sprint(
+    sprint_id: int,
+    concurrency: Optional[int] = Query(
+        None, ge=1, description="Llamadas simultáneas del trabajo (por defecto DESCRIBE_JOB_CONCURRENCY)"
+    ),
+    db: Session = Depends(get_read_db)
+) -> Dict[str, Any]:
+    """
+    Lanza en segundo plano la generación de descripción y criterios para las historias del
+    sprint que aún no tienen descripción. El progreso se consulta en /jobs/{job_id}.
+    """
+    sprint = await run_in_threadpool(crud.get_sprint_by_id, db, sprint_id, 0, ('id',))
+    if not sprint:
+        logger.warning(f"Sprint no encontrado: id={sprint_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sprint not found"
+        )
+
+    return await describe_jobs.start_job(sprint_id, concurrency)
+
+
+@router.get("/jobs/{job_id}", status_code=status.HTTP_200_OK)
+async def progreso_trabajo(job_id: str) -> Dict[str, Any]:
+    """Estado y progreso de un trabajo de descripción en segundo plano."""
+    job = await describe_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.get("/model", status_code=status.HTTP_200_OK)
+async def estado_modelo() -> Dict[str, Any]:
+    """Versión activa del modelo de prioridad y versiones disponibles en disco."""
+    return await run_in_threadpool(priority_models.status)
+
+
+@router.post("/model/reload", status_code=status.HTTP_200_OK)
+async def recargar_modelo(
+    version: Optional[str] = Query(None, description="Versión a activar (por defecto, la seleccionada en disco)"),
+    force: bool = Query(False, description="Recargar aunque el fichero no haya cambiado")
+) -> Dict[str, Any]:
+    """Carga la versión indicada (o la seleccionada) y la activa sin cortar las peticiones en curso."""
+    try:
+        await run_in_threadpool(priority_models.reload, version, force)
+    except ValueError as e:
+        logger.warning(f"Recarga de modelo rechazada: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT if priority_models.pinned else status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    report = await run_in_threadpool(priority_models.status)
+    if report['last_error']:
+        logger.error(f"Recarga de modelo fallida: {report['last_error']}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=report['last_error']
+        )
+    logger.info(f"Modelo de prioridad activo: {report['active']['tag']}")
+    return report
+
+
+@router.get("/priority_rescorer/stats", status_code=status.HTTP_200_OK)
+async def estadisticas_recalculo_prioridades() -> Dict[str, Any]:
+    """Historias pendientes de recalcular y contadores del recálculo incremental."""
+    return await run_in_threadpool(priority_rescorer.stats)
+
+
+@router.get("/llm_cache/stats", status_code=status.HTTP_200_OK)
+async def estadisticas_cache_llm() -> Dict[str, Any]:
+    """Aciertos, fallos, expulsiones y tamaño de la caché persistente de generaciones LLM."""
+    return await run_in_threadpool(llm_cache.stats)
@@ -1,10 +1,12 @@
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
-import schemas, crud
-from database import get_db
+import schemas, crud, projections, metrics, fast_views
+from database import get_db, get_read_db
 
 # Configurar logger
 default_log_format = '%(asctime)s - %(levelname)s - %(message)s'
@@ -16,7 +18,22 @@ router = APIRouter(
     tags=["PBIs"]
 )
 
-@router.post("/", response_model=schemas.PBI, status_code=status.HTTP_201_CREATED)
+DEPTH_QUERY = Query(
+    projections.PBI_MAX_DEPTH, ge=0, le=projections.PBI_MAX_DEPTH,
+    description="0 = solo PBI, 1 = con historias",
+)
+FIELDS_QUERY = Query(
+    None, description=f"Columnas del PBI separadas por comas: {', '.join(projections.PBI_FIELDS)}",
+)
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    try:
+        return projections.parse_fields(fields, projections.PBI_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post("/", response_model=schemas.PBI, status_code=status.HTTP_201_CREATED, dependencies=[metrics.sql_budget(2)])
 def create_pbi(pbi: schemas.PBICreate, db: Session = Depends(get_db)) -> schemas.PBI:
     try:
         created = crud.create_pbi(db, pbi)
@@ -26,19 +43,47 @@ def create_pbi(pbi: schemas.PBICreate, db: Session = Depends(get_db)) -> schemas
         logger.error(f"Error creating PBI: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
-@router.get("/by_sprint/{sprint_id}", response_model=List[schemas.PBI])
-def get_pbis_by_sprint(sprint_id: int, db: Session = Depends(get_db)) -> List[schemas.PBI]:
-    return crud.get_pbis_by_sprint(db, sprint_id)
+@router.get("/by_sprint/{sprint_id}", response_model=List[schemas.PBI], dependencies=[metrics.sql_budget(2)])
+def get_pbis_by_sprint(
+    sprint_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=crud.MAX_PAGE_SIZE),
+    after_id: Optional[int] = Query(None, ge=0),
+    depth: int = DEPTH_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_read_db),
+) -> List[schemas.PBI]:
+    field_list = _parse_fields(fields)
+    if fast_views.FAST_JSON_ENABLED:
+        plan = fast_views.pbi_plan(depth, field_list, sprint_id=sprint_id, limit=limit, after_id=after_id)
+        return fast_views.FastJSONResponse(fast_views.run(db, plan))
+    pbis = crud.get_pbis_by_sprint(db, sprint_id, limit=limit, after_id=after_id, depth=depth, fields=field_list)
+    if projections.is_full_view(depth, projections.PBI_MAX_DEPTH, field_list):
+        return pbis
+    return JSONResponse(jsonable_encoder([projections.project_pbi(p, depth, field_list) for p in pbis]))
 
-@router.get("/{pbi_id}", response_model=schemas.PBI)
-def get_pbi_by_id(pbi_id: int, db: Session = Depends(get_db)) -> schemas.PBI:
-    pbi = crud.get_pbi_by_id(db, pbi_id)
+@router.get("/{pbi_id}", response_model=schemas.PBI, dependencies=[metrics.sql_budget(2)])
+def get_pbi_by_id(
+    pbi_id: int,
+    depth: int = DEPTH_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_read_db),
+) -> schemas.PBI:
+    field_list = _parse_fields(fields)
+    if fast_views.FAST_JSON_ENABLED:
+        found = fast_views.run(db, fast_views.pbi_plan(depth, field_list, pbi_id=pbi_id))
+        pbi = found[0] if found else None
+    else:
+        pbi = crud.get_pbi_by_id(db, pbi_id, depth=depth, fields=field_list)
     if not pbi:
         logger.warning(f"PBI not found: id={pbi_id}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PBI not found")
-    return pbi
+    if fast_views.FAST_JSON_ENABLED:
+        return fast_views.FastJSONResponse(pbi)
+    if projections.is_full_view(depth, projections.PBI_MAX_DEPTH, field_list):
+        return pbi
+    return JSONResponse(jsonable_encoder(projections.project_pbi(pbi, depth, field_list)))
 
-@router.put("/{pbi_id}", response_model=schemas.PBI)
+@router.put("/{pbi_id}", response_model=schemas.PBI, dependencies=[metrics.sql_budget(4)])
 def update_pbi(pbi_id: int, pbi_data: schemas.PBIUpdate, db: Session = Depends(get_db)) -> schemas.PBI:
     updated = crud.update_pbi(db, pbi_id, pbi_data)
     if not updated:
@@ -47,7 +92,7 @@ def update_pbi(pbi_id: int, pbi_data: schemas.PBIUpdate, db: Session = Depends(g
     logger.info(f"PBI updated: id={updated.id}")
     return updated
 
-@router.delete("/{pbi_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{pbi_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[metrics.sql_budget(4)])
 def delete_pbi(pbi_id: int, db: Session = Depends(get_db)):
     success = crud.delete_pbi(db, pbi_id)
     if not success:
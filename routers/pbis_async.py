@@ -0,0 +1,89 @@
+import logging
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import schemas, crud, crud_async, projections, metrics, fast_views
+from database import get_async_db
+from routers.pbis import DEPTH_QUERY, FIELDS_QUERY, _parse_fields
+
+# Configurar logger
+default_log_format = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=default_log_format)
+logger = logging.getLogger(__name__)
+
+# Mismas rutas que routers/pbis.py sobre AsyncSession (DB_ASYNC=true)
+router = APIRouter(
+    prefix="/pbis",
+    tags=["PBIs"]
+)
+
+@router.post("/", response_model=schemas.PBI, status_code=status.HTTP_201_CREATED, dependencies=[metrics.sql_budget(2)])
+async def create_pbi(pbi: schemas.PBICreate, db: AsyncSession = Depends(get_async_db)) -> schemas.PBI:
+    try:
+        created = await crud_async.create_pbi(db, pbi)
+        logger.info(f"PBI created with id={created.id}")
+        return created
+    except Exception as e:
+        logger.error(f"Error creating PBI: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+@router.get("/by_sprint/{sprint_id}", response_model=List[schemas.PBI], dependencies=[metrics.sql_budget(2)])
+async def get_pbis_by_sprint(
+    sprint_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=crud.MAX_PAGE_SIZE),
+    after_id: Optional[int] = Query(None, ge=0),
+    depth: int = DEPTH_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+) -> List[schemas.PBI]:
+    field_list = _parse_fields(fields)
+    if fast_views.FAST_JSON_ENABLED:
+        plan = fast_views.pbi_plan(depth, field_list, sprint_id=sprint_id, limit=limit, after_id=after_id)
+        return fast_views.FastJSONResponse(await fast_views.run_async(db, plan))
+    pbis = await crud_async.get_pbis_by_sprint(db, sprint_id, limit=limit, after_id=after_id, depth=depth, fields=field_list)
+    if projections.is_full_view(depth, projections.PBI_MAX_DEPTH, field_list):
+        return pbis
+    return JSONResponse(jsonable_encoder([projections.project_pbi(p, depth, field_list) for p in pbis]))
+
+@router.get("/{pbi_id}", response_model=schemas.PBI, dependencies=[metrics.sql_budget(2)])
+async def get_pbi_by_id(
+    pbi_id: int,
+    depth: int = DEPTH_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.PBI:
+    field_list = _parse_fields(fields)
+    if fast_views.FAST_JSON_ENABLED:
+        found = await fast_views.run_async(db, fast_views.pbi_plan(depth, field_list, pbi_id=pbi_id))
+        pbi = found[0] if found else None
+    else:
+        pbi = await crud_async.get_pbi_by_id(db, pbi_id, depth=depth, fields=field_list)
+    if not pbi:
+        logger.warning(f"PBI not found: id={pbi_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PBI not found")
+    if fast_views.FAST_JSON_ENABLED:
+        return fast_views.FastJSONResponse(pbi)
+    if projections.is_full_view(depth, projections.PBI_MAX_DEPTH, field_list):
+        return pbi
+    return JSONResponse(jsonable_encoder(projections.project_pbi(pbi, depth, field_list)))
+
+@router.put("/{pbi_id}", response_model=schemas.PBI, dependencies=[metrics.sql_budget(4)])
+async def update_pbi(pbi_id: int, pbi_data: schemas.PBIUpdate, db: AsyncSession = Depends(get_async_db)) -> schemas.PBI:
+    updated = await crud_async.update_pbi(db, pbi_id, pbi_data)
+    if not updated:
+        logger.warning(f"PBI not found for update: id={pbi_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PBI not found")
+    logger.info(f"PBI updated: id={updated.id}")
+    return updated
+
+@router.delete("/{pbi_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[metrics.sql_budget(4)])
+async def delete_pbi(pbi_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud_async.delete_pbi(db, pbi_id)
+    if not success:
+        logger.warning(f"PBI not found for delete: id={pbi_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PBI not found")
+    logger.info(f"PBI deleted: id={pbi_id}")
+    return None
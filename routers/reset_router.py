@@ -1,18 +1,30 @@
 # routers/reset_router.py
 from fastapi import APIRouter
-from models import Base
+from models import Base, Sprint, PBI, Story, SprintStats
 from database import engine, SessionLocal
 from create_db import seed_sprints, seed_pbis_and_stories
+import db_snapshot
+import response_cache
 
 router = APIRouter()
 
 @router.post("/reset-db", tags=["Mantenimiento"])
 def reset_database():
     """
-    ⚠️ Elimina TODAS las tablas y las vuelve a crear con datos de ejemplo.
+    ⚠️ Elimina TODOS los sprints, PBIs e historias y deja solo los datos de ejemplo.
+    En SQLite restaura una instantánea sembrada (RESET_DB_MODE=snapshot, por defecto).
     """
-    # 1. Borrar tablas
-    Base.metadata.drop_all(bind=engine)
+    if db_snapshot.supported(engine):
+        try:
+            db_snapshot.restore(engine)
+        finally:
+            response_cache.invalidate_all()
+        return {"message": "Base de datos reiniciada y sembrada correctamente."}
+
+    # 1. Borrar tablas (la caché LLM se conserva; los agregados se vacían con ellas)
+    Base.metadata.drop_all(
+        bind=engine, tables=[SprintStats.__table__, Story.__table__, PBI.__table__, Sprint.__table__]
+    )
 
     # 2. Crear tablas
     Base.metadata.create_all(bind=engine)
@@ -24,5 +36,6 @@ def reset_database():
         seed_pbis_and_stories(session)
     finally:
         session.close()
+        response_cache.invalidate_all()
 
     return {"message": "Base de datos reiniciada y sembrada correctamente."}
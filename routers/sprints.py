@@ -1,10 +1,14 @@
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from typing import Iterator, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
-import schemas, crud
-from database import get_db
+import schemas, crud, projections, response_cache, metrics, fast_views
+from database import get_db, get_read_db, ReadSessionLocal
 
 # Configurar logger
 default_log_format = '%(asctime)s - %(levelname)s - %(message)s'
@@ -16,7 +20,71 @@ router = APIRouter(
     tags=["Sprints"]
 )
 
-@router.post("/", response_model=schemas.Sprint, status_code=status.HTTP_201_CREATED)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SPRINT_LIST_ADAPTER = TypeAdapter(List[schemas.Sprint])
+
+
+DEPTH_QUERY = Query(
+    projections.SPRINT_MAX_DEPTH, ge=0, le=projections.SPRINT_MAX_DEPTH,
+    description="0 = solo sprint, 1 = con PBIs, 2 = con historias",
+)
+FIELDS_QUERY = Query(
+    None, description=f"Columnas del sprint separadas por comas: {', '.join(projections.SPRINT_FIELDS)}",
+)
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    try:
+        return projections.parse_fields(fields, projections.SPRINT_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _render(sprint_or_list, depth: int, fields: Optional[List[str]]) -> bytes:
+    """Cuerpo JSON idéntico al que generaría FastAPI con response_model."""
+    full = projections.is_full_view(depth, projections.SPRINT_MAX_DEPTH, fields)
+    if isinstance(sprint_or_list, list):
+        if full:
+            # Validar antes de volcar: sin validación las claves salen en el orden de carga del ORM
+            sprints = SPRINT_LIST_ADAPTER.validate_python(sprint_or_list, from_attributes=True)
+            return SPRINT_LIST_ADAPTER.dump_json(sprints)
+        payload = [projections.project_sprint(s, depth, fields) for s in sprint_or_list]
+    else:
+        if full:
+            return schemas.Sprint.model_validate(sprint_or_list).model_dump_json().encode()
+        payload = projections.project_sprint(sprint_or_list, depth, fields)
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _sprints_body(
+    db: Session, limit: Optional[int], after_id: Optional[int], depth: int, fields: Optional[List[str]]
+) -> bytes:
+    if fast_views.FAST_JSON_ENABLED:
+        plan = fast_views.sprint_plan(depth, fields, limit=limit, after_id=after_id)
+        return fast_views.dumps(fast_views.run(db, plan))
+    return _render(crud.get_sprints(db, limit=limit, after_id=after_id, depth=depth, fields=fields), depth, fields)
+
+
+def _sprint_body(db: Session, sprint_id: int, depth: int, fields: Optional[List[str]]) -> Optional[bytes]:
+    if fast_views.FAST_JSON_ENABLED:
+        found = fast_views.run(db, fast_views.sprint_plan(depth, fields, sprint_id=sprint_id))
+        return fast_views.dumps(found[0]) if found else None
+    sprint = crud.get_sprint_by_id(db, sprint_id, depth=depth, fields=fields)
+    return _render(sprint, depth, fields) if sprint else None
+
+
+def _stream_sprints(
+    limit: Optional[int], after_id: Optional[int], depth: int, fields: Optional[List[str]]
+) -> Iterator[bytes]:
+    # La respuesta se emite después de cerrar get_db, así que el stream usa su propia sesión
+    db = ReadSessionLocal.session_factory()
+    try:
+        for sprint in crud.iter_sprints(db, limit=limit, after_id=after_id, depth=depth, fields=fields):
+            yield _render(sprint, depth, fields) + b"\n"
+    finally:
+        db.close()
+
+@router.post("/", response_model=schemas.Sprint, status_code=status.HTTP_201_CREATED, dependencies=[metrics.sql_budget(2)])
 def create_sprint(sprint: schemas.SprintCreate, db: Session = Depends(get_db)) -> schemas.Sprint:
     try:
         created = crud.create_sprint(db, sprint)
@@ -26,19 +94,69 @@ def create_sprint(sprint: schemas.SprintCreate, db: Session = Depends(get_db)) -
         logger.error(f"Error creating sprint: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
-@router.get("/", response_model=List[schemas.Sprint])
-def get_sprints(db: Session = Depends(get_db)) -> List[schemas.Sprint]:
-    return crud.get_sprints(db)
+@router.get("/", response_model=List[schemas.Sprint], dependencies=[metrics.sql_budget(3)])
+def get_sprints(
+    limit: Optional[int] = Query(None, ge=1, le=crud.MAX_PAGE_SIZE),
+    after_id: Optional[int] = Query(None, ge=0),
+    depth: int = DEPTH_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+) -> List[schemas.Sprint]:
+    """
+    Lista sprints por id. Con `Accept: application/x-ndjson` los emite uno a uno en streaming.
+    `depth` y `fields` recortan el árbol: los niveles y columnas omitidos no se consultan ni aparecen.
+    Las respuestas llevan ETag; con `If-None-Match` y sin cambios se devuelve 304.
+    """
+    field_list = _parse_fields(fields)
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        # El stream consulta por lotes: sus sentencias crecen con el número de sprints
+        metrics.set_sql_budget(None)
+        return StreamingResponse(
+            _stream_sprints(limit, after_id, depth, field_list), media_type=NDJSON_MEDIA_TYPE
+        )
+    variant = (limit, after_id, depth, tuple(field_list or ()))
+    cached = response_cache.get(response_cache.LIST_SCOPE, None, variant)
+    if cached is None:
+        generation = response_cache.current_generation()
+        body = _sprints_body(db, limit, after_id, depth, field_list)
+        cached = response_cache.put(response_cache.LIST_SCOPE, None, variant, body, generation)
+    return response_cache.respond(cached, if_none_match)
+
+@router.get("/{sprint_id}", response_model=schemas.Sprint, dependencies=[metrics.sql_budget(3)])
+def get_sprint_by_id(
+    sprint_id: int,
+    depth: int = DEPTH_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+) -> schemas.Sprint:
+    field_list = _parse_fields(fields)
+    variant = (depth, tuple(field_list or ()))
+    cached = response_cache.get(response_cache.SPRINT_SCOPE, sprint_id, variant)
+    if cached is None:
+        generation = response_cache.current_generation()
+        body = _sprint_body(db, sprint_id, depth, field_list)
+        if body is None:
+            logger.warning(f"Sprint not found: id={sprint_id}")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found")
+        cached = response_cache.put(response_cache.SPRINT_SCOPE, sprint_id, variant, body, generation)
+    return response_cache.respond(cached, if_none_match)
 
-@router.get("/{sprint_id}", response_model=schemas.Sprint)
-def get_sprint_by_id(sprint_id: int, db: Session = Depends(get_db)) -> schemas.Sprint:
-    sprint = crud.get_sprint_by_id(db, sprint_id)
-    if not sprint:
+@router.get("/{sprint_id}/stats", response_model=schemas.SprintStats, dependencies=[metrics.sql_budget(2)])
+def get_sprint_stats(sprint_id: int, db: Session = Depends(get_read_db)) -> schemas.SprintStats:
+    """
+    Totales del sprint (historias, puntos y valor de negocio), también por prioridad y por tipo.
+    Se leen de la tabla de agregados: el coste no depende del número de historias.
+    """
+    stats = crud.get_sprint_stats(db, sprint_id)
+    if stats is None:
         logger.warning(f"Sprint not found: id={sprint_id}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found")
-    return sprint
+    return stats
 
-@router.put("/{sprint_id}", response_model=schemas.Sprint)
+@router.put("/{sprint_id}", response_model=schemas.Sprint, dependencies=[metrics.sql_budget(5)])
 def update_sprint(sprint_id: int, sprint_data: schemas.SprintUpdate, db: Session = Depends(get_db)) -> schemas.Sprint:
     updated = crud.update_sprint(db, sprint_id, sprint_data)
     if not updated:
@@ -46,7 +164,7 @@ def update_sprint(sprint_id: int, sprint_data: schemas.SprintUpdate, db: Session
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found")
     return updated
 
-@router.delete("/{sprint_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{sprint_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[metrics.sql_budget(6)])
 def delete_sprint(sprint_id: int, db: Session = Depends(get_db)):
     success = crud.delete_sprint(db, sprint_id)
     if not success:
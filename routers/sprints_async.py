@@ -0,0 +1,136 @@
+import logging
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import schemas, crud, crud_async, response_cache, metrics, fast_views
+from database import get_async_db, get_async_sessionmaker
+from routers.sprints import NDJSON_MEDIA_TYPE, DEPTH_QUERY, FIELDS_QUERY, _parse_fields, _render
+
+# Configurar logger
+default_log_format = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=default_log_format)
+logger = logging.getLogger(__name__)
+
+# Mismas rutas que routers/sprints.py sobre AsyncSession (DB_ASYNC=true)
+router = APIRouter(
+    prefix="/sprints",
+    tags=["Sprints"]
+)
+
+
+async def _sprints_body(
+    db: AsyncSession, limit: Optional[int], after_id: Optional[int], depth: int, fields: Optional[List[str]]
+) -> bytes:
+    if fast_views.FAST_JSON_ENABLED:
+        plan = fast_views.sprint_plan(depth, fields, limit=limit, after_id=after_id)
+        return fast_views.dumps(await fast_views.run_async(db, plan))
+    sprints = await crud_async.get_sprints(db, limit=limit, after_id=after_id, depth=depth, fields=fields)
+    return _render(sprints, depth, fields)
+
+
+async def _sprint_body(db: AsyncSession, sprint_id: int, depth: int, fields: Optional[List[str]]) -> Optional[bytes]:
+    if fast_views.FAST_JSON_ENABLED:
+        found = await fast_views.run_async(db, fast_views.sprint_plan(depth, fields, sprint_id=sprint_id))
+        return fast_views.dumps(found[0]) if found else None
+    sprint = await crud_async.get_sprint_by_id(db, sprint_id, depth=depth, fields=fields)
+    return _render(sprint, depth, fields) if sprint else None
+
+
+async def _stream_sprints(
+    limit: Optional[int], after_id: Optional[int], depth: int, fields: Optional[List[str]]
+) -> AsyncIterator[bytes]:
+    # La respuesta se emite después de cerrar get_async_db, así que el stream usa su propia sesión
+    async with get_async_sessionmaker()() as db:
+        async for sprint in crud_async.iter_sprints(db, limit=limit, after_id=after_id, depth=depth, fields=fields):
+            yield _render(sprint, depth, fields) + b"\n"
+
+@router.post("/", response_model=schemas.Sprint, status_code=status.HTTP_201_CREATED, dependencies=[metrics.sql_budget(2)])
+async def create_sprint(sprint: schemas.SprintCreate, db: AsyncSession = Depends(get_async_db)) -> schemas.Sprint:
+    try:
+        created = await crud_async.create_sprint(db, sprint)
+        logger.info(f"Sprint created with id={created.id}")
+        return created
+    except Exception as e:
+        logger.error(f"Error creating sprint: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+@router.get("/", response_model=List[schemas.Sprint], dependencies=[metrics.sql_budget(3)])
+async def get_sprints(
+    limit: Optional[int] = Query(None, ge=1, le=crud.MAX_PAGE_SIZE),
+    after_id: Optional[int] = Query(None, ge=0),
+    depth: int = DEPTH_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> List[schemas.Sprint]:
+    """
+    Lista sprints por id. Con `Accept: application/x-ndjson` los emite uno a uno en streaming.
+    `depth` y `fields` recortan el árbol: los niveles y columnas omitidos no se consultan ni aparecen.
+    Las respuestas llevan ETag; con `If-None-Match` y sin cambios se devuelve 304.
+    """
+    field_list = _parse_fields(fields)
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        # El stream consulta por lotes: sus sentencias crecen con el número de sprints
+        metrics.set_sql_budget(None)
+        return StreamingResponse(
+            _stream_sprints(limit, after_id, depth, field_list), media_type=NDJSON_MEDIA_TYPE
+        )
+    variant = (limit, after_id, depth, tuple(field_list or ()))
+    cached = response_cache.get(response_cache.LIST_SCOPE, None, variant)
+    if cached is None:
+        generation = response_cache.current_generation()
+        body = await _sprints_body(db, limit, after_id, depth, field_list)
+        cached = response_cache.put(response_cache.LIST_SCOPE, None, variant, body, generation)
+    return response_cache.respond(cached, if_none_match)
+
+@router.get("/{sprint_id}", response_model=schemas.Sprint, dependencies=[metrics.sql_budget(3)])
+async def get_sprint_by_id(
+    sprint_id: int,
+    depth: int = DEPTH_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.Sprint:
+    field_list = _parse_fields(fields)
+    variant = (depth, tuple(field_list or ()))
+    cached = response_cache.get(response_cache.SPRINT_SCOPE, sprint_id, variant)
+    if cached is None:
+        generation = response_cache.current_generation()
+        body = await _sprint_body(db, sprint_id, depth, field_list)
+        if body is None:
+            logger.warning(f"Sprint not found: id={sprint_id}")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found")
+        cached = response_cache.put(response_cache.SPRINT_SCOPE, sprint_id, variant, body, generation)
+    return response_cache.respond(cached, if_none_match)
+
+@router.get("/{sprint_id}/stats", response_model=schemas.SprintStats, dependencies=[metrics.sql_budget(2)])
+async def get_sprint_stats(sprint_id: int, db: AsyncSession = Depends(get_async_db)) -> schemas.SprintStats:
+    """
+    Totales del sprint (historias, puntos y valor de negocio), también por prioridad y por tipo.
+    Se leen de la tabla de agregados: el coste no depende del número de historias.
+    """
+    stats = await crud_async.get_sprint_stats(db, sprint_id)
+    if stats is None:
+        logger.warning(f"Sprint not found: id={sprint_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found")
+    return stats
+
+@router.put("/{sprint_id}", response_model=schemas.Sprint, dependencies=[metrics.sql_budget(5)])
+async def update_sprint(sprint_id: int, sprint_data: schemas.SprintUpdate, db: AsyncSession = Depends(get_async_db)) -> schemas.Sprint:
+    updated = await crud_async.update_sprint(db, sprint_id, sprint_data)
+    if not updated:
+        logger.warning(f"Sprint not found for update: id={sprint_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found")
+    return updated
+
+@router.delete("/{sprint_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[metrics.sql_budget(6)])
+async def delete_sprint(sprint_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud_async.delete_sprint(db, sprint_id)
+    if not success:
+        logger.warning(f"Sprint not found for delete: id={sprint_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found")
+    logger.info(f"Sprint deleted: id={sprint_id}")
+    return None
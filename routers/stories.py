@@ -1,10 +1,10 @@
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-import schemas, crud
-from database import get_db
+import models, schemas, crud, metrics, fast_views
+from database import get_db, get_read_db
 
 # Configurar logger
 default_log_format = '%(asctime)s - %(levelname)s - %(message)s'
@@ -16,7 +16,32 @@ router = APIRouter(
     tags=["Stories"]
 )
 
-@router.post("/{pbi_id}", response_model=schemas.Story, status_code=status.HTTP_201_CREATED)
+def _bulk_result(results: List[dict]) -> schemas.BulkResult:
+    succeeded = sum(1 for r in results if r['ok'])
+    return schemas.BulkResult(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+@router.post("/bulk/{pbi_id}", response_model=schemas.BulkResult, status_code=status.HTTP_201_CREATED)
+def create_stories_bulk(pbi_id: int, stories: List[Any] = Body(...), db: Session = Depends(get_db)) -> schemas.BulkResult:
+    if not db.query(models.PBI.id).filter(models.PBI.id == pbi_id).first():
+        logger.warning(f"PBI not found for bulk create: id={pbi_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PBI not found")
+    try:
+        results = crud.create_stories_bulk(db, stories, pbi_id)
+    except Exception as e:
+        logger.error(f"Error creating stories in bulk: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return _bulk_result(results)
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def update_stories_bulk(stories: List[Any] = Body(...), db: Session = Depends(get_db)) -> schemas.BulkResult:
+    try:
+        results = crud.update_stories_bulk(db, stories)
+    except Exception as e:
+        logger.error(f"Error updating stories in bulk: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return _bulk_result(results)
+
+@router.post("/{pbi_id}", response_model=schemas.Story, status_code=status.HTTP_201_CREATED, dependencies=[metrics.sql_budget(3)])
 def create_story(pbi_id: int, story: schemas.StoryCreate, db: Session = Depends(get_db)) -> schemas.Story:
     try:
         created = crud.create_story(db, story, pbi_id)
@@ -26,19 +51,26 @@ def create_story(pbi_id: int, story: schemas.StoryCreate, db: Session = Depends(
         logger.error(f"Error creating story: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-@router.get("/by_pbi/{pbi_id}", response_model=List[schemas.Story])
-def get_stories(pbi_id: int, db: Session = Depends(get_db)) -> List[schemas.Story]:
-    return crud.get_stories_by_pbi(db, pbi_id)
+@router.get("/by_pbi/{pbi_id}", response_model=List[schemas.Story], dependencies=[metrics.sql_budget(1)])
+def get_stories(
+    pbi_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=crud.MAX_PAGE_SIZE),
+    after_id: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_read_db),
+) -> List[schemas.Story]:
+    if fast_views.FAST_JSON_ENABLED:
+        return fast_views.FastJSONResponse(fast_views.run(db, fast_views.story_plan(pbi_id, limit, after_id)))
+    return crud.get_stories_by_pbi(db, pbi_id, limit=limit, after_id=after_id)
 
-@router.get("/{story_id}", response_model=schemas.Story)
-def get_story_by_id(story_id: int, db: Session = Depends(get_db)) -> schemas.Story:
+@router.get("/{story_id}", response_model=schemas.Story, dependencies=[metrics.sql_budget(1)])
+def get_story_by_id(story_id: int, db: Session = Depends(get_read_db)) -> schemas.Story:
     story = crud.get_story_by_id(db, story_id)
     if not story:
         logger.warning(f"Story not found: id={story_id}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
     return story
 
-@router.put("/{story_id}", response_model=schemas.Story)
+@router.put("/{story_id}", response_model=schemas.Story, dependencies=[metrics.sql_budget(4)])
 def update_story(story_id: int, story_data: schemas.StoryUpdate, db: Session = Depends(get_db)) -> schemas.Story:
     updated = crud.update_story(db, story_id, story_data)
     if not updated:
@@ -46,7 +78,7 @@ def update_story(story_id: int, story_data: schemas.StoryUpdate, db: Session = D
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
     return updated
 
-@router.delete("/{story_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{story_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[metrics.sql_budget(3)])
 def delete_story(story_id: int, db: Session = Depends(get_db)):
     success = crud.delete_story(db, story_id)
     if not success:
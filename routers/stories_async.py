@@ -0,0 +1,86 @@
+import logging
+from typing import Any, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import schemas, crud, crud_async, metrics, fast_views
+from database import get_async_db
+from routers.stories import _bulk_result
+
+# Configurar logger
+default_log_format = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=default_log_format)
+logger = logging.getLogger(__name__)
+
+# Mismas rutas que routers/stories.py sobre AsyncSession (DB_ASYNC=true)
+router = APIRouter(
+    prefix="/stories",
+    tags=["Stories"]
+)
+
+@router.post("/bulk/{pbi_id}", response_model=schemas.BulkResult, status_code=status.HTTP_201_CREATED)
+async def create_stories_bulk(pbi_id: int, stories: List[Any] = Body(...), db: AsyncSession = Depends(get_async_db)) -> schemas.BulkResult:
+    if not await crud_async.pbi_exists(db, pbi_id):
+        logger.warning(f"PBI not found for bulk create: id={pbi_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PBI not found")
+    try:
+        results = await crud_async.create_stories_bulk(db, stories, pbi_id)
+    except Exception as e:
+        logger.error(f"Error creating stories in bulk: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return _bulk_result(results)
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+async def update_stories_bulk(stories: List[Any] = Body(...), db: AsyncSession = Depends(get_async_db)) -> schemas.BulkResult:
+    try:
+        results = await crud_async.update_stories_bulk(db, stories)
+    except Exception as e:
+        logger.error(f"Error updating stories in bulk: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return _bulk_result(results)
+
+@router.post("/{pbi_id}", response_model=schemas.Story, status_code=status.HTTP_201_CREATED, dependencies=[metrics.sql_budget(3)])
+async def create_story(pbi_id: int, story: schemas.StoryCreate, db: AsyncSession = Depends(get_async_db)) -> schemas.Story:
+    try:
+        created = await crud_async.create_story(db, story, pbi_id)
+        logger.info(f"Story created with id={created.id} under PBI {pbi_id}")
+        return created
+    except Exception as e:
+        logger.error(f"Error creating story: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@router.get("/by_pbi/{pbi_id}", response_model=List[schemas.Story], dependencies=[metrics.sql_budget(1)])
+async def get_stories(
+    pbi_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=crud.MAX_PAGE_SIZE),
+    after_id: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+) -> List[schemas.Story]:
+    if fast_views.FAST_JSON_ENABLED:
+        return fast_views.FastJSONResponse(await fast_views.run_async(db, fast_views.story_plan(pbi_id, limit, after_id)))
+    return await crud_async.get_stories_by_pbi(db, pbi_id, limit=limit, after_id=after_id)
+
+@router.get("/{story_id}", response_model=schemas.Story, dependencies=[metrics.sql_budget(1)])
+async def get_story_by_id(story_id: int, db: AsyncSession = Depends(get_async_db)) -> schemas.Story:
+    story = await crud_async.get_story_by_id(db, story_id)
+    if not story:
+        logger.warning(f"Story not found: id={story_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
+    return story
+
+@router.put("/{story_id}", response_model=schemas.Story, dependencies=[metrics.sql_budget(4)])
+async def update_story(story_id: int, story_data: schemas.StoryUpdate, db: AsyncSession = Depends(get_async_db)) -> schemas.Story:
+    updated = await crud_async.update_story(db, story_id, story_data)
+    if not updated:
+        logger.warning(f"Story not found for update: id={story_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
+    return updated
+
+@router.delete("/{story_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[metrics.sql_budget(3)])
+async def delete_story(story_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud_async.delete_story(db, story_id)
+    if not success:
+        logger.warning(f"Story not found for delete: id={story_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
+    logger.info(f"Story deleted: id={story_id}")
+    return None
@@ -51,6 +51,20 @@ class StoryUpdate(BaseModel):
     formatted_description: Optional[str] = None
     priority: Optional[Priority] = None
 
+class StoryBulkUpdate(StoryUpdate):
+    id: int
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
 class Story(StoryBase):
     id: int
     formatted_description: Optional[str] = None
@@ -103,3 +117,30 @@ class Sprint(SprintBase):
     class Config:
         from_attributes = True
         use_enum_values = True  
+
+# ——— SPRINT STATS SCHEMAS ———
+class PriorityStats(BaseModel):
+    priority: Optional[Priority] = None  # None: historias sin prioridad calculada
+    stories: int
+    story_points: int
+    business_value: int
+
+    class Config:
+        use_enum_values = True
+
+class StoryTypeStats(BaseModel):
+    story_type: StoryType
+    stories: int
+    story_points: int
+    business_value: int
+
+    class Config:
+        use_enum_values = True
+
+class SprintStats(BaseModel):
+    sprint_id: int
+    stories: int
+    story_points: int
+    business_value: int
+    by_priority: List[PriorityStats]
+    by_story_type: List[StoryTypeStats]
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Punto de entrada para servir la aplicación.
+
+    python serve.py                    # WEB_CONCURRENCY workers (1 por defecto)
+    python serve.py --workers 4
+    python serve.py --reload           # desarrollo: un proceso con recarga automática
+
+Con varios workers, el proceso padre importa la aplicación, aplica las migraciones y carga
+el modelo de prioridad una sola vez y después hace fork(): los workers comparten esas
+páginas de memoria (copy-on-write) en lugar de cargar cada uno su copia del modelo, y no
+vuelven a ejecutar init_db() al arrancar. Las invalidaciones de la caché de respuestas se
+comparten entre workers y los trabajos de describir_todo se guardan en la base, así que
+cualquier worker responde al sondeo de su progreso.
+Requiere fork() (Linux/macOS); `uvicorn --workers` arranca procesos nuevos y no comparte nada.
+"""
+import gc
+import os
+import sys
+import time
+import signal
+import logging
+import argparse
+from typing import Dict, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+HOST = os.getenv('HOST', '0.0.0.0')
+PORT = int(os.getenv('PORT', '8000'))
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+# Cargar el modelo en el padre antes del fork (false: cada worker carga su copia al arrancar)
+SERVE_PRELOAD_MODEL = os.getenv('SERVE_PRELOAD_MODEL', 'true').lower() in ('1', 'true', 'yes')
+
+
+def preload():
+    """Importa la aplicación y deja preparado en el padre todo lo que heredan los workers."""
+    import main
+    from database import engine, read_engine
+
+    # Migraciones una vez, no N workers a la vez sobre el mismo fichero
+    main.init_db()
+    if SERVE_PRELOAD_MODEL:
+        from services.ai_services import priority_models
+        current = priority_models.current()
+        if current is not None:
+            logger.info(f"Modelo {current.tag} cargado antes de crear los workers")
+    # Ninguna conexión abierta debe cruzar el fork
+    engine.dispose()
+    read_engine.dispose()
+    # Los objetos ya creados quedan fuera del recolector: sus recorridos no tocan
+    # (ni copian) las páginas compartidas
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def _run_worker(app, sock, index: int) -> None:
+    import uvicorn
+    from services import priority_rescorer
+
+    # El recálculo de prioridades en segundo plano basta con un worker
+    if index > 0:
+        priority_rescorer.PRIORITY_RESCORE_ENABLED = False
+    if not SERVE_PRELOAD_MODEL:
+        from services.ai_services import priority_models
+        priority_models.current()
+    server = uvicorn.Server(uvicorn.Config(app, log_level='info', lifespan='on'))
+    server.run(sockets=[sock])
+
+
+def _spawn(app, sock, index: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # Los workers atienden SIGINT/SIGTERM con el apagado ordenado de uvicorn
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = 0
+        try:
+            _run_worker(app, sock, index)
+        except BaseException as e:
+            logger.error(f"Worker {index} terminado con error: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    logger.info(f"Worker {index} arrancado (pid {pid})")
+    return pid
+
+
+def serve(workers: int, host: str, port: int) -> None:
+    import uvicorn
+
+    app = preload()
+    if workers <= 1:
+        uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level='info')).run()
+        return
+
+    import response_cache
+    # Una escritura en un worker invalida la caché de respuestas de todos
+    response_cache.share_across_workers()
+    sock = uvicorn.Config(app, host=host, port=port).bind_socket()
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    for index in range(workers):
+        children[_spawn(app, sock, index)] = index
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index: Optional[int] = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logger.warning(f"Worker {index} (pid {pid}) terminado con estado {status}, se reinicia")
+        # Pausa para no relanzar en bucle un worker que falla al arrancar
+        time.sleep(1)
+        children[_spawn(app, sock, index)] = index
+    sock.close()
+    logger.info("Servidor detenido.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de Sprint Planning Tool")
+    parser.add_argument('--workers', type=int, default=WEB_CONCURRENCY)
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--reload', action='store_true', help="Desarrollo: un proceso, recarga al cambiar el código")
+    args = parser.parse_args()
+
+    if args.reload:
+        import uvicorn
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True, log_level="info")
+        return
+    if args.workers > 1 and not hasattr(os, 'fork'):
+        logger.error("Varios workers requieren fork(); en esta plataforma usa --workers 1")
+        sys.exit(1)
+    serve(args.workers, args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,29 @@
 import os
+import asyncio
 import logging
 import json
 import re
-from functools import lru_cache
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Dict, Any, Optional, Sequence, Tuple
 
-import numpy as np
-import pandas as pd
-import joblib
-from openai import OpenAI, OpenAIError
+import httpx
 from pydantic import BaseModel, Field, validator, ValidationError
-import xgboost as xgb
+
+import metrics
+from services import llm_cache
+from services.model_registry import ModelRegistry, ModelVersion
+
+# numpy, xgboost, joblib y openai se importan en el primer uso (modelo o LLM): importarlos
+# aquí suma más de un segundo a cada arranque de worker aunque solo se sirva CRUD.
+if TYPE_CHECKING:
+    import numpy as np
+    from openai import AsyncOpenAI, OpenAI
+    from services.compiled_preprocessor import CompiledPreprocessor
+    from services.priority_lookup import PriorityLookup
 
 
 # Configuración de logging
@@ -21,10 +33,119 @@ logger = logging.getLogger(__name__)
 
 # API Key de OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+# URL base alternativa (p. ej. un servidor stub local para pruebas)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# Timeouts, reintentos, pool de conexiones y concurrencia máxima de llamadas a OpenAI
+OPENAI_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "30"))
+OPENAI_CONNECT_TIMEOUT_S = float(os.getenv("OPENAI_CONNECT_TIMEOUT_S", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+
+def _openai_timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT_S, connect=OPENAI_CONNECT_TIMEOUT_S)
+
+
+def _openai_limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_KEEPALIVE)
+
+
+class LLMError(Exception):
+    """Error de la API de OpenAI (evita importar openai para capturarlo)."""
+
+
+@contextmanager
+def _openai_errors() -> Iterator[None]:
+    """Traduce OpenAIError a LLMError; solo envuelve llamadas reales a la API."""
+    from openai import OpenAIError
+
+    try:
+        yield
+    except OpenAIError as e:
+        raise LLMError(str(e)) from e
+
+
+@contextmanager
+def _llm_call(mode: str, model: str) -> Iterator[None]:
+    """Llamada real a la API: traduce sus errores y registra duración y resultado en /metrics."""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        with _openai_errors():
+            yield
+        outcome = 'ok'
+    except (GeneratorExit, asyncio.CancelledError):
+        # El cliente cortó el streaming o se canceló la tarea
+        outcome = 'cancelled'
+        raise
+    finally:
+        metrics.LLM_SECONDS.observe(time.perf_counter() - started, mode, model, outcome)
+
+
+def _record_usage(model: str, usage: Any) -> None:
+    if usage is None:
+        return
+    metrics.LLM_TOKENS.inc(model, 'prompt', amount=usage.prompt_tokens or 0)
+    metrics.LLM_TOKENS.inc(model, 'completion', amount=usage.completion_tokens or 0)
+
 
-# Ruta al modelo
-MODEL_FILE = Path(__file__).parent.parent / 'ml' / 'modelo_prioridad.pkl'
+@lru_cache(maxsize=1)
+def get_client() -> "OpenAI":
+    """Cliente OpenAI síncrono compartido; se crea (e importa openai) en el primer uso."""
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=_openai_timeout(),
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=httpx.Client(limits=_openai_limits(), timeout=_openai_timeout()),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_async_client() -> "AsyncOpenAI":
+    """Cliente AsyncOpenAI compartido sobre un pool httpx acotado; se crea en el primer uso."""
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=_openai_timeout(),
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=httpx.AsyncClient(limits=_openai_limits(), timeout=_openai_timeout()),
+    )
+
+
+@lru_cache(maxsize=1)
+def _llm_semaphore() -> asyncio.Semaphore:
+    return asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+
+async def close_async_client() -> None:
+    """Cierra el pool del cliente asíncrono (al apagar la aplicación)."""
+    if get_async_client.cache_info().currsize:
+        await get_async_client().close()
+    get_async_client.cache_clear()
+    _llm_semaphore.cache_clear()
+
+# Modelos versionados en ml/: modelo_prioridad.pkl ("base") y modelo_prioridad-<versión>.pkl
+MODEL_DIR = Path(__file__).parent.parent / 'ml'
+MODEL_NAME = 'modelo_prioridad'
+# Fija una versión concreta (si no, la de ml/modelo_prioridad.active o la más alta)
+PRIORITY_MODEL_VERSION = os.getenv('PRIORITY_MODEL_VERSION') or None
+# Cada cuántos segundos se comprueba si hay un modelo nuevo (0 = solo recarga manual)
+MODEL_WATCH_INTERVAL_S = float(os.getenv('MODEL_WATCH_INTERVAL_S', '30'))
+
+# Tabla precalculada de prioridades (opcional). Máximos enteros de la rejilla, en el orden
+# story_points, business_value, criticidad, internal_dependencies, continuation
+PRIORITY_LOOKUP_ENABLED = os.getenv('PRIORITY_LOOKUP_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PRIORITY_LOOKUP_MAX = tuple(int(v) for v in os.getenv('PRIORITY_LOOKUP_MAX', '40,10,5,5,1').split(','))
+# Celdas comprobadas contra el modelo al construir la tabla (0 = ninguna)
+PRIORITY_LOOKUP_VERIFY_SAMPLE = int(os.getenv('PRIORITY_LOOKUP_VERIFY_SAMPLE', '512'))
 
 # --- SCHEMAS ---
 class PriorityCalcInput(BaseModel):
@@ -58,20 +179,203 @@ class DescriptionInput(BaseModel):
     idea_general: str = Field(..., min_length=10)
 
 # --- MODELO ---
-@lru_cache(maxsize=1)
-def load_priority_model() -> Optional[Any]:
+@dataclass(frozen=True, eq=False)
+class PriorityModel:
+    """Todo lo que necesita una predicción, construido junto y sustituido de una vez."""
+    booster: Any
+    preprocessor: Any
+    compiled: Optional["CompiledPreprocessor"] = None
+    lookup: Optional["PriorityLookup"] = None
+
+
+MAPA_PRIORIDAD = {0: "baja", 1: "media", 2: "alta"}
+
+
+def priority_payload_from_story(story: Any) -> Dict[str, Any]:
+    """
+    Construye la entrada de PriorityCalcInput a partir de una historia (ORM o fila).
+    """
+    return {
+        "story_points": story.story_points or 0,
+        "business_value": story.business_value or 0,
+        "criticidad": float(story.criticity) if story.criticity is not None else 0,
+        "internal_dependencies": story.internal_dependencies or 0,
+        "continuation": story.continuation or 0,
+        "story_type": {1: "user", 2: "technical"}.get(story.story_type, "user")
+    }
+
+
+def _compile_checked(preprocessor: Any) -> Optional["CompiledPreprocessor"]:
+    """
+    Versión NumPy del preprocesador, comprobada contra preprocessor.transform.
+    None si no se puede compilar o no coincide.
+    """
+    from services.compiled_preprocessor import check_parity, compile_preprocessor
+
+    compiled = compile_preprocessor(preprocessor)
+    if compiled is None:
+        logger.warning('Preprocesador no compilable, se usará preprocessor.transform')
+        return None
+    report = check_parity(compiled, preprocessor, *_parity_rows(compiled))
+    if not report['ok']:
+        logger.error(f'Preprocesador compilado descartado, no coincide con el original: {report}')
+        return None
+    return compiled
+
+
+def _parity_rows(compiled: "CompiledPreprocessor", n: int = 256, seed: int = 0) -> Tuple["np.ndarray", List[str]]:
+    """Filas de prueba: enteros y decimales aleatorios, categorías conocidas y una desconocida."""
+    import numpy as np
+    from services.compiled_preprocessor import NUMERIC_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    numeric = rng.uniform(0, 40, size=(n, len(NUMERIC_COLUMNS)))
+    numeric[::2] = np.floor(numeric[::2])
+    types = [str(c) for c in compiled.categories.ravel()] + ['Desconocido']
+    return numeric, [types[i % len(types)] for i in range(n)]
+
+
+def _transform(model: PriorityModel, numeric: "np.ndarray", story_types: Sequence[str]) -> "np.ndarray":
+    if model.compiled is not None:
+        if len(story_types) == 1:
+            return model.compiled.transform_one(numeric[0], story_types[0])
+        return model.compiled.transform(numeric, story_types)
+
+    # Sin versión compilada: el ColumnTransformer original necesita un DataFrame
+    import pandas as pd
+    from services.compiled_preprocessor import CATEGORY_COLUMN, NUMERIC_COLUMNS
+
+    df = pd.DataFrame(numeric, columns=list(NUMERIC_COLUMNS))
+    df[CATEGORY_COLUMN] = list(story_types)
+    return model.preprocessor.transform(df)
+
+
+def _predict_matrix(model: PriorityModel, numeric: "np.ndarray", story_types: Sequence[str]) -> "np.ndarray":
+    """
+    Ejecuta preprocesado + XGBoost sobre todas las filas de una vez y devuelve la clase de cada una.
+    numeric lleva las columnas de NUMERIC_COLUMNS en ese orden.
+    """
+    import numpy as np
+    import xgboost as xgb
+
+    # Transformación de datos (OneHot + escalado)
+    features = _transform(model, numeric, story_types)
+
+    # Conversión a DMatrix (copia los datos: el búfer de transform_one se puede reutilizar)
+    dmatrix = xgb.DMatrix(features)
+
+    # Predicción
+    probs = model.booster.predict(dmatrix)
+    return np.argmax(probs, axis=1)  # multiclase
+
+
+def _features(inp: PriorityCalcInput) -> Tuple[float, ...]:
+    return (inp.story_points, inp.business_value, inp.criticidad, inp.internal_dependencies, inp.continuation)
+
+
+def _predict_classes(model: PriorityModel, inputs: List[PriorityCalcInput]) -> "np.ndarray":
+    import numpy as np
+
+    numeric = np.array([_features(inp) for inp in inputs], dtype=np.float64)
+    return _predict_matrix(model, numeric, [inp.story_type for inp in inputs])
+
+
+def _model_story_types(preprocessor: Any) -> Tuple[str, ...]:
+    try:
+        return tuple(str(c) for c in preprocessor.named_transformers_["cat"].categories_[0])
+    except Exception:
+        return ("Technical", "User")
+
+
+def _build_lookup(model: PriorityModel) -> Optional["PriorityLookup"]:
+    """
+    Tabla precalculada para `model`. Si la comprobación por muestreo encuentra
+    discrepancias, no se usa.
+    """
+    from services import priority_lookup
+
+    predict = partial(_predict_matrix, model)
+    try:
+        started = time.perf_counter()
+        lookup = priority_lookup.build(predict, PRIORITY_LOOKUP_MAX, _model_story_types(model.preprocessor))
+        report = None
+        if PRIORITY_LOOKUP_VERIFY_SAMPLE > 0:
+            report = priority_lookup.verify(lookup, predict, sample=PRIORITY_LOOKUP_VERIFY_SAMPLE)
+    except Exception as e:
+        logger.error(f'Error construyendo la tabla de prioridades: {e}')
+        return None
+    if report and report['mismatches']:
+        logger.error(f'Tabla de prioridades descartada, no coincide con el modelo: {report}')
+        return None
+    logger.info(
+        f'Tabla de prioridades precalculada: {lookup.cells} celdas, '
+        f'{lookup.table.nbytes} bytes, {time.perf_counter() - started:.2f}s'
+    )
+    return lookup
+
+
+def _load_priority_artifact(path: Path) -> PriorityModel:
+    """Carga un artefacto {'booster', 'preprocessor'} y prepara su preprocesado NumPy y su tabla."""
+    import joblib
+
+    artifact = joblib.load(path)
+    model = PriorityModel(booster=artifact["booster"], preprocessor=artifact["preprocessor"])
+    model = replace(model, compiled=_compile_checked(model.preprocessor))
+    if PRIORITY_LOOKUP_ENABLED:
+        model = replace(model, lookup=_build_lookup(model))
+    return model
+
+
+# Registro de versiones del modelo en ml/ (recarga en caliente con cambio atómico)
+priority_models = ModelRegistry(MODEL_DIR, MODEL_NAME, _load_priority_artifact, pinned=PRIORITY_MODEL_VERSION)
+
+
+def check_priority_lookup(sample: Optional[int] = None) -> Dict[str, Any]:
+    """Compara la tabla precalculada con predicciones en vivo (toda la rejilla o una muestra)."""
+    current = priority_models.current()
+    if current is None or current.artifact.lookup is None:
+        return {'error': 'Tabla de prioridades no activa.'}
+    from services import priority_lookup
+
+    model = current.artifact
+    report = priority_lookup.verify(model.lookup, partial(_predict_matrix, model), sample=sample)
+    return {**report, 'model_version': current.tag}
+
+
+def _lookup_class(model: PriorityModel, inp: PriorityCalcInput) -> Optional[int]:
+    """Clase desde la tabla precalculada, o None si no está activa o la entrada cae fuera."""
+    if model.lookup is None:
+        return None
+    return model.lookup.get(_features(inp), inp.story_type)
+
+
+def _result(pred: int, current: ModelVersion) -> Dict[str, Any]:
+    return {
+        'prioridad_num': pred,
+        'prioridad': MAPA_PRIORIDAD.get(pred, "desconocida"),
+        'model_version': current.tag
+    }
+
+
+def _calculate_one(current: ModelVersion, inp: PriorityCalcInput) -> Dict[str, Any]:
     try:
-        if MODEL_FILE.exists():
-            logger.info(f'Cargando modelo ML desde {MODEL_FILE}')
-            return joblib.load(MODEL_FILE)
-        logger.warning(f'No se encontró el modelo en {MODEL_FILE}')
+        pred = _lookup_class(current.artifact, inp)
+        source = 'lookup'
+        if pred is None:
+            pred = int(_predict_classes(current.artifact, [inp])[0])
+            source = 'model'
+        metrics.PRIORITY_PREDICTIONS.inc(source)
+        logger.info(f'Prioridad predicha: {pred} → {MAPA_PRIORIDAD.get(pred, "desconocida")}')
+        return _result(pred, current)
+
     except Exception as e:
-        logger.error(f'Error cargando modelo ML: {e}')
-    return None
+        logger.error(f'Error en predicción de prioridad: {e}')
+        return {'error': 'Error durante predicción ML.'}
+
 
 def calculate_priority(data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Calcula la prioridad de una historia según el modelo entrenado con xgb.train().
+    Calcula la prioridad de una historia según el modelo entrenado con xgboost.train().
     """
     try:
         inp = PriorityCalcInput(**data)
@@ -79,117 +383,335 @@ def calculate_priority(data: Dict[str, Any]) -> Dict[str, Any]:
         logger.error(f'Error validando datos para prioridad: {ve}')
         return {'error': str(ve)}
 
-    modelo = load_priority_model()
-    if modelo is None:
+    # Una sola lectura: una recarga simultánea no afecta a esta predicción
+    current = priority_models.current()
+    if current is None:
         return {'error': 'Modelo ML no disponible.'}
+    started = time.perf_counter()
+    result = _calculate_one(current, inp)
+    metrics.PRIORITY_INFERENCE_SECONDS.observe(time.perf_counter() - started, 'calculate_priority')
+    return result
 
-    preprocessor = modelo.get("preprocessor")
-    booster = modelo.get("booster")
 
-    try:
-        df = pd.DataFrame([{
-            "Story Points": inp.story_points,
-            "Business Value": inp.business_value,
-            "Criticidad": inp.criticidad,
-            "Nº dep inter": inp.internal_dependencies,
-            "Continuacion": inp.continuation,
-            "Story Type": inp.story_type
-        }])
+def calculate_priorities(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Calcula la prioridad de varias historias con una sola transformación y una sola llamada a predict.
+    Devuelve una lista alineada con la entrada; un elemento inválido lleva 'error' sin afectar al resto.
+    Todo el lote se puntúa con la misma versión del modelo.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    valid_idx: List[int] = []
+    valid_inputs: List[PriorityCalcInput] = []
+    for i, data in enumerate(items):
+        try:
+            valid_inputs.append(PriorityCalcInput(**data))
+            valid_idx.append(i)
+        except ValidationError as ve:
+            logger.error(f'Error validando datos para prioridad (elemento {i}): {ve}')
+            results[i] = {'error': str(ve)}
 
-        # Transformación de datos (OneHot + escalado)
-        df_proc = preprocessor.transform(df)
+    if not valid_inputs:
+        return results
 
-        # Conversión a DMatrix
-        dmatrix = xgb.DMatrix(df_proc)
+    current = priority_models.current()
+    if current is None:
+        for i in valid_idx:
+            results[i] = {'error': 'Modelo ML no disponible.'}
+        return results
+    model = current.artifact
+    started = time.perf_counter()
 
-        # Predicción
-        probs = booster.predict(dmatrix)
-        pred = int(np.argmax(probs, axis=1)[0])  # multiclase
+    # Las entradas dentro de la rejilla precalculada no pasan por el modelo
+    preds: List[Optional[int]] = [_lookup_class(model, inp) for inp in valid_inputs]
+    missing = [k for k, pred in enumerate(preds) if pred is None]
+    if missing:
+        try:
+            for k, pred in zip(missing, _predict_classes(model, [valid_inputs[k] for k in missing])):
+                preds[k] = int(pred)
+        except Exception as e:
+            # Si el lote falla, se predice fila a fila para aislar las historias problemáticas
+            logger.error(f'Error en predicción por lotes, reintentando por historia: {e}')
+            for i, inp in zip(valid_idx, valid_inputs):
+                results[i] = _calculate_one(current, inp)
+            metrics.PRIORITY_INFERENCE_SECONDS.observe(time.perf_counter() - started, 'calculate_priorities')
+            return results
 
-        mapa_prioridad = {0: "baja", 1: "media", 2: "alta"}
-        prioridad_str = mapa_prioridad.get(pred, "desconocida")
+    for i, pred in zip(valid_idx, preds):
+        results[i] = _result(pred, current)
+    metrics.PRIORITY_PREDICTIONS.inc('lookup', amount=len(preds) - len(missing))
+    metrics.PRIORITY_PREDICTIONS.inc('model', amount=len(missing))
+    metrics.PRIORITY_INFERENCE_SECONDS.observe(time.perf_counter() - started, 'calculate_priorities')
+    logger.info(f'Prioridades predichas por lotes: {len(valid_inputs)} historias ({current.tag})')
+    return results
 
-        logger.info(f'Prioridad predicha: {pred} → {prioridad_str}')
-        return {
-            'prioridad_num': pred,
-            'prioridad': prioridad_str
-        }
+# --- FUNCIONES CON GPT ---
+SPRINT_GOAL_PARAMS = {'model': 'gpt-4o', 'temperature': 0.7, 'max_tokens': 60}
+DESCRIPTION_PARAMS = {'model': 'gpt-4o', 'temperature': 0.7, 'max_tokens': 200}
 
-    except Exception as e:
-        logger.error(f'Error en predicción de prioridad: {e}')
-        return {'error': 'Error durante predicción ML.'}
 
-# --- FUNCIONES CON GPT ---
-def generate_sprint_goal(input_data: Dict[str, Any]) -> Dict[str, Any]:
+def _sprint_goal_messages(inp: SprintGoalInput) -> List[Dict[str, str]]:
+    prompt = (
+        f"Eres un asistente ágil experto en Scrum.\n"
+        f"Dadas estas historias: {'; '.join(inp.stories)}\n"
+        "Redacta un objetivo de sprint en español, una sola frase, máximo 20 palabras."
+    )
+    return [
+        {'role': 'system', 'content': 'Eres un asistente experto en metodologías ágiles.'},
+        {'role': 'user', 'content': prompt}
+    ]
+
+
+def _description_messages(inp: DescriptionInput) -> List[Dict[str, str]]:
+    prompt = (
+        "Eres un Asistente Ágil experto en Scrum.\n"
+        f"Idea general: \"{inp.idea_general}\".\n"
+        "Devuelve un JSON válido con doble comilla, con los siguientes campos:\n"
+        "  \"historia\": descripción clara en formato historia de usuario,\n"
+        "  \"criterios\": lista de criterios de aceptación.\n"
+        "No añadas ninguna explicación ni texto adicional, solo el JSON."
+    )
+    return [
+        {'role': 'system', 'content': 'Eres un asistente experto en desarrollo ágil.'},
+        {'role': 'user', 'content': prompt}
+    ]
+
+
+def _parse_description(content: str) -> Dict[str, Any]:
+    content = content.strip()
+    logger.info(f"Respuesta cruda IA: {content}")
+
+    # Limpieza segura del bloque ```json ... ```
+    content = re.sub(r'^```(?:json)?\s*', '', content)
+    content = re.sub(r'\s*```$', '', content)
+
+    return json.loads(content)
+
+
+def _timeout_param(timeout: Optional[float]) -> Dict[str, Any]:
+    """`timeout` (s) de esta llamada; sin él, el del cliente."""
+    return {'timeout': timeout} if timeout is not None else {}
+
+
+def _complete(messages: List[Dict[str, str]], params: Dict[str, Any], force_refresh: bool) -> Tuple[str, str, bool]:
+    """Devuelve (contenido, clave de caché, si venía de caché) consultando antes la caché LLM."""
+    key = llm_cache.cache_key(messages=messages, **params)
+    if not force_refresh:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached, key, True
+    with _llm_call('sync', params['model']):
+        resp = get_client().chat.completions.create(messages=messages, **params)
+    _record_usage(params['model'], resp.usage)
+    return resp.choices[0].message.content, key, False
+
+
+async def _complete_async(
+    messages: List[Dict[str, str]], params: Dict[str, Any], force_refresh: bool, timeout: Optional[float]
+) -> Tuple[str, str, bool]:
+    """Como _complete, sin bloquear el bucle de eventos y con la concurrencia acotada."""
+    key = llm_cache.cache_key(messages=messages, **params)
+    if not force_refresh:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            return cached, key, True
+    async with _llm_semaphore():
+        with _llm_call('async', params['model']):
+            resp = await get_async_client().chat.completions.create(
+                messages=messages,
+                **_timeout_param(timeout),
+                **params
+            )
+    _record_usage(params['model'], resp.usage)
+    return resp.choices[0].message.content, key, False
+
+
+async def _stream_async(
+    messages: List[Dict[str, str]], params: Dict[str, Any], force_refresh: bool, timeout: Optional[float]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Emite ('token', texto) según llegan los fragmentos y, al final, ('done', (contenido, clave, cacheado)).
+    Un acierto de caché se emite como un único fragmento.
+    """
+    key = llm_cache.cache_key(messages=messages, **params)
+    if not force_refresh:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            yield 'token', cached
+            yield 'done', (cached, key, True)
+            return
+    parts: List[str] = []
+    async with _llm_semaphore():
+        with _llm_call('stream', params['model']):
+            started = time.perf_counter()
+            stream = await get_async_client().chat.completions.create(
+                messages=messages,
+                stream=True,
+                # El último fragmento trae el uso de tokens (sin choices)
+                stream_options={'include_usage': True},
+                **_timeout_param(timeout),
+                **params
+            )
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    _record_usage(params['model'], chunk.usage)
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if not parts:
+                        metrics.LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started, params['model'])
+                    parts.append(delta)
+                    yield 'token', delta
+    yield 'done', (''.join(parts), key, False)
+
+
+def generate_sprint_goal(input_data: Dict[str, Any], force_refresh: bool = False) -> Dict[str, Any]:
     try:
         inp = SprintGoalInput(**input_data)
     except ValidationError as ve:
         logger.error(f'Error validando historias: {ve}')
         return {'error': str(ve)}
 
-    prompt = (
-        f"Eres un asistente ágil experto en Scrum.\n"
-        f"Dadas estas historias: {'; '.join(inp.stories)}\n"
-        "Redacta un objetivo de sprint en español, una sola frase, máximo 20 palabras."
-    )
+    try:
+        content, key, cached = _complete(_sprint_goal_messages(inp), SPRINT_GOAL_PARAMS, force_refresh)
+        if not cached:
+            llm_cache.put(key, SPRINT_GOAL_PARAMS['model'], content)
+        return {'sprint_goal': content.strip()}
+    except LLMError as e:
+        logger.error(f'Error con OpenAI: {e}')
+        return {'error': 'Error al generar objetivo de sprint.'}
+
+
+async def generate_sprint_goal_async(
+    input_data: Dict[str, Any], timeout: Optional[float] = None, force_refresh: bool = False
+) -> Dict[str, Any]:
+    """Versión no bloqueante de generate_sprint_goal; `timeout` (s) sustituye al global en esta llamada."""
+    try:
+        inp = SprintGoalInput(**input_data)
+    except ValidationError as ve:
+        logger.error(f'Error validando historias: {ve}')
+        return {'error': str(ve)}
 
     try:
-        resp = client.chat.completions.create(
-            model='gpt-4o',
-            messages=[
-                {'role': 'system', 'content': 'Eres un asistente experto en metodologías ágiles.'},
-                {'role': 'user', 'content': prompt}
-            ],
-            temperature=0.7,
-            max_tokens=60
+        content, key, cached = await _complete_async(
+            _sprint_goal_messages(inp), SPRINT_GOAL_PARAMS, force_refresh, timeout
         )
-        return {'sprint_goal': resp.choices[0].message.content.strip()}
-    except OpenAIError as e:
+        if not cached:
+            await asyncio.to_thread(llm_cache.put, key, SPRINT_GOAL_PARAMS['model'], content)
+        return {'sprint_goal': content.strip()}
+    except LLMError as e:
         logger.error(f'Error con OpenAI: {e}')
         return {'error': 'Error al generar objetivo de sprint.'}
 
-def generate_description_and_acceptance(input_data: Dict[str, Any]) -> Dict[str, Any]:
+
+def generate_description_and_acceptance(input_data: Dict[str, Any], force_refresh: bool = False) -> Dict[str, Any]:
     try:
         inp = DescriptionInput(**input_data)
     except ValidationError as ve:
         logger.error(f'Error validando idea general: {ve}')
         return {'error': str(ve)}
 
-    prompt = (
-        "Eres un Asistente Ágil experto en Scrum.\n"
-        f"Idea general: \"{inp.idea_general}\".\n"
-        "Devuelve un JSON válido con doble comilla, con los siguientes campos:\n"
-        "  \"historia\": descripción clara en formato historia de usuario,\n"
-        "  \"criterios\": lista de criterios de aceptación.\n"
-        "No añadas ninguna explicación ni texto adicional, solo el JSON."
-    )
-
     try:
-        resp = client.chat.completions.create(
-            model='gpt-4o',
-            messages=[
-                {'role': 'system', 'content': 'Eres un asistente experto en desarrollo ágil.'},
-                {'role': 'user', 'content': prompt}
-            ],
-            temperature=0.7,
-            max_tokens=200
-        )
-        content = resp.choices[0].message.content.strip()
-        logger.info(f"Respuesta cruda IA: {content}")
+        content, key, cached = _complete(_description_messages(inp), DESCRIPTION_PARAMS, force_refresh)
+        result = _parse_description(content)
+        # Solo se cachean respuestas que se han podido parsear
+        if not cached:
+            llm_cache.put(key, DESCRIPTION_PARAMS['model'], content)
+        return result
 
-        # Limpieza segura del bloque ```json ... ```
-        content = re.sub(r'^```(?:json)?\s*', '', content)
-        content = re.sub(r'\s*```$', '', content)
+    except json.JSONDecodeError as je:
+        logger.error(f'Error parseando JSON: {je}')
+        return {'error': 'Error al parsear la respuesta de la IA.'}
+    except LLMError as oe:
+        logger.error(f'Error con OpenAI: {oe}')
+        return {'error': 'Error al generar descripción y criterios.'}
+    except Exception as e:
+        logger.error(f'Error inesperado: {e}')
+        return {'error': 'Error inesperado durante la generación.'}
+
+
+async def generate_description_and_acceptance_async(
+    input_data: Dict[str, Any], timeout: Optional[float] = None, force_refresh: bool = False
+) -> Dict[str, Any]:
+    """Versión no bloqueante de generate_description_and_acceptance; `timeout` (s) sustituye al global."""
+    try:
+        inp = DescriptionInput(**input_data)
+    except ValidationError as ve:
+        logger.error(f'Error validando idea general: {ve}')
+        return {'error': str(ve)}
 
-        result = json.loads(content)
+    try:
+        content, key, cached = await _complete_async(
+            _description_messages(inp), DESCRIPTION_PARAMS, force_refresh, timeout
+        )
+        result = _parse_description(content)
+        # Solo se cachean respuestas que se han podido parsear
+        if not cached:
+            await asyncio.to_thread(llm_cache.put, key, DESCRIPTION_PARAMS['model'], content)
         return result
 
     except json.JSONDecodeError as je:
         logger.error(f'Error parseando JSON: {je}')
         return {'error': 'Error al parsear la respuesta de la IA.'}
-    except OpenAIError as oe:
+    except LLMError as oe:
         logger.error(f'Error con OpenAI: {oe}')
         return {'error': 'Error al generar descripción y criterios.'}
     except Exception as e:
         logger.error(f'Error inesperado: {e}')
         return {'error': 'Error inesperado durante la generación.'}
+
+
+async def stream_sprint_goal_async(
+    input_data: Dict[str, Any], timeout: Optional[float] = None, force_refresh: bool = False
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Variante en streaming: ('token', {'text'})*, y después ('result', {'sprint_goal'}) o ('error', {'error'})."""
+    try:
+        inp = SprintGoalInput(**input_data)
+    except ValidationError as ve:
+        logger.error(f'Error validando historias: {ve}')
+        yield 'error', {'error': str(ve)}
+        return
+
+    try:
+        async for kind, data in _stream_async(_sprint_goal_messages(inp), SPRINT_GOAL_PARAMS, force_refresh, timeout):
+            if kind == 'token':
+                yield 'token', {'text': data}
+                continue
+            content, key, cached = data
+            if not cached:
+                await asyncio.to_thread(llm_cache.put, key, SPRINT_GOAL_PARAMS['model'], content)
+            yield 'result', {'sprint_goal': content.strip()}
+    except LLMError as e:
+        logger.error(f'Error con OpenAI: {e}')
+        yield 'error', {'error': 'Error al generar objetivo de sprint.'}
+
+
+async def stream_description_and_acceptance_async(
+    input_data: Dict[str, Any], timeout: Optional[float] = None, force_refresh: bool = False
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Variante en streaming: ('token', {'text'})*, y después ('result', {'historia', 'criterios'}) o ('error', {'error'})."""
+    try:
+        inp = DescriptionInput(**input_data)
+    except ValidationError as ve:
+        logger.error(f'Error validando idea general: {ve}')
+        yield 'error', {'error': str(ve)}
+        return
+
+    try:
+        async for kind, data in _stream_async(_description_messages(inp), DESCRIPTION_PARAMS, force_refresh, timeout):
+            if kind == 'token':
+                yield 'token', {'text': data}
+                continue
+            content, key, cached = data
+            result = _parse_description(content)
+            if not cached:
+                await asyncio.to_thread(llm_cache.put, key, DESCRIPTION_PARAMS['model'], content)
+            yield 'result', result
+
+    except json.JSONDecodeError as je:
+        logger.error(f'Error parseando JSON: {je}')
+        yield 'error', {'error': 'Error al parsear la respuesta de la IA.'}
+    except LLMError as oe:
+        logger.error(f'Error con OpenAI: {oe}')
+        yield 'error', {'error': 'Error al generar descripción y criterios.'}
+    except Exception as e:
+        logger.error(f'Error inesperado: {e}')
+        yield 'error', {'error': 'Error inesperado durante la generación.'}
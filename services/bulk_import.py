@@ -0,0 +1,372 @@
+import os
+import csv
+import json
+import time
+import logging
+from datetime import date
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection, Engine
+
+import models
+import response_cache
+from crud import BULK_ROW_ERRORS
+from schemas import Criticity, Priority, StoryType
+from services import priority_rescorer
+
+# Configuración de logging
+default_log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=default_log_format)
+logger = logging.getLogger(__name__)
+
+# Importación masiva del backlog desde exportaciones CSV/JSONL del gestor de tareas: una fila
+# por historia con su PBI y su sprint. Se lee en bloques de IMPORT_CHUNK_SIZE filas; sprints y
+# PBIs se resuelven con mapas clave -> id en memoria y cada tabla se escribe con INSERT ...
+# ON CONFLICT (external_key) DO UPDATE de varias filas, así que reimportar actualiza en lugar
+# de duplicar. Cada bloque es una transacción.
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '5000'))
+# Errores de fila que se devuelven en el informe (se cuentan todos)
+MAX_REPORTED_ERRORS = 20
+
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/json-lines': 'jsonl',
+}
+
+# Columnas de la historia que se copian tal cual (texto) o como entero
+STORY_TEXT = ('raw_description', 'formatted_description', 'acceptance_criteria')
+STORY_INT = ('story_points', 'business_value', 'complexity', 'continuation', 'internal_dependencies')
+# NOT NULL en models.Story: una celda vacía toma el valor por defecto
+STORY_DEFAULTS = {'story_type': int(StoryType.USER), 'continuation': 0, 'internal_dependencies': 0}
+STORY_TYPE_ALIASES = {'user': StoryType.USER, 'technical': StoryType.TECHNICAL, 'bug': StoryType.BUG}
+# Rango de las columnas Integer de models.py (32 bits en PostgreSQL)
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def format_of(filename: Optional[str] = None, content_type: Optional[str] = None) -> Optional[str]:
+    """Formato por la extensión del fichero o por el Content-Type; None si no se reconoce."""
+    if filename:
+        ext = filename.rsplit('.', 1)[-1].lower()
+        if ext in ('csv', 'jsonl', 'ndjson'):
+            return 'csv' if ext == 'csv' else 'jsonl'
+    if content_type:
+        return CONTENT_TYPES.get(content_type.split(';', 1)[0].strip().lower())
+    return None
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Itera (línea, fila) sin cargar el fichero entero; una línea JSON inválida da fila None."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            yield line_no, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+
+# --- Conversión de celdas ---
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if _blank(value) else str(value).strip()
+
+
+def _int(value: Any, name: str) -> Optional[int]:
+    if _blank(value):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: se esperaba un entero y llegó {value!r}")
+    if not INT_MIN <= number <= INT_MAX:
+        raise ValueError(f"{name}: valor fuera de rango {value!r}")
+    return number
+
+
+def _enum(enum, value: Any, name: str, aliases: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """Acepta el valor numérico o el nombre del miembro (HIGH, user...)."""
+    if _blank(value):
+        return None
+    if isinstance(value, str) and not value.strip().lstrip('-').isdigit():
+        key = value.strip()
+        member = (aliases or {}).get(key.lower()) or enum.__members__.get(key.upper())
+        if member is None:
+            raise ValueError(f"{name}: valor desconocido {value!r}")
+        return int(member)
+    number = _int(value, name)
+    if number not in enum._value2member_map_:
+        raise ValueError(f"{name}: valor fuera de rango {value!r}")
+    return number
+
+
+def _date(value: Any, name: str) -> Optional[date]:
+    if _blank(value):
+        return None
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        raise ValueError(f"{name}: fecha no ISO {value!r}")
+
+
+def parse_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida una fila de la exportación y la separa en sprint, PBI e historia. Solo incluye las
+    columnas presentes en la fila: lo que no viene no se pisa al actualizar.
+    """
+    title = _text(raw.get('title'))
+    pbi_title = _text(raw.get('pbi'))
+    if title is None:
+        raise ValueError("title es obligatorio")
+    if pbi_title is None:
+        raise ValueError("pbi es obligatorio")
+
+    sprint = None
+    sprint_name = _text(raw.get('sprint'))
+    if sprint_name is not None:
+        sprint = {'name': sprint_name, 'external_key': _text(raw.get('sprint_key')) or sprint_name}
+        if 'sprint_start' in raw:
+            sprint['start_date'] = _date(raw['sprint_start'], 'sprint_start')
+        if 'sprint_end' in raw:
+            sprint['end_date'] = _date(raw['sprint_end'], 'sprint_end')
+
+    pbi = {'title': pbi_title, 'external_key': _text(raw.get('pbi_key'))}
+    if 'pbi_description' in raw:
+        pbi['description'] = _text(raw['pbi_description'])
+
+    story: Dict[str, Any] = {'title': title, 'external_key': _text(raw.get('key'))}
+    for name in STORY_TEXT:
+        if name in raw:
+            story[name] = _text(raw[name])
+    for name in STORY_INT:
+        if name in raw:
+            story[name] = _int(raw[name], name)
+    if 'criticity' in raw:
+        story['criticity'] = _enum(Criticity, raw['criticity'], 'criticity')
+    if 'story_type' in raw:
+        story['story_type'] = _enum(StoryType, raw['story_type'], 'story_type', STORY_TYPE_ALIASES)
+    for name, default in STORY_DEFAULTS.items():
+        if name in story and story[name] is None:
+            story[name] = default
+    # Sin prioridad explícita la calcula el recálculo incremental en segundo plano
+    priority = _enum(Priority, raw.get('priority'), 'priority')
+    if priority is None:
+        story['priority_dirty'] = True
+    else:
+        story['priority'] = priority
+        story['priority_dirty'] = False
+    return {'sprint': sprint, 'pbi': pbi, 'story': story}
+
+
+# --- Escritura ---
+
+def _insert(conn: Connection):
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise ValueError(f"INSERT ... ON CONFLICT no disponible para {dialect}")
+    return insert
+
+
+def _upsert(conn: Connection, table: Table, rows: List[Dict[str, Any]], update: bool = True) -> Dict[str, int]:
+    """
+    INSERT ... ON CONFLICT (external_key) DO UPDATE ... RETURNING; devuelve clave -> id.
+    Con update=False las filas existentes no cambian: el SET solo reescribe external_key con su
+    mismo valor, para que RETURNING devuelva también su id (DO NOTHING no las devuelve).
+
+    Con RETURNING y una lista de parámetros, SQLAlchemy ("insertmanyvalues") envía VALUES de
+    varias filas por sentencia a partir de una única sentencia compilada y cacheada (compilar
+    un VALUES de miles de filas en cada bloque costaba más que escribirlo). Las filas se agrupan
+    por columnas presentes y se queda la última de cada clave: PostgreSQL no deja tocar la misma
+    fila dos veces en una sentencia.
+    """
+    insert = _insert(conn)
+    groups: Dict[Tuple[str, ...], Dict[str, Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), {})[row['external_key']] = row
+
+    ids: Dict[str, int] = {}
+    for columns, by_key in groups.items():
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.external_key],
+            set_={c: stmt.excluded[c] for c in columns if c != 'external_key' and update}
+            or {'external_key': stmt.excluded.external_key},
+        ).returning(table.c.external_key, table.c.id)
+        ids.update({key: id_ for key, id_ in conn.execute(stmt, list(by_key.values()))})
+    return ids
+
+
+class BulkImporter:
+    """
+    Mantiene los mapas clave -> id de sprints y PBIs entre bloques de una misma importación.
+    Con update=False solo inserta lo que falta y no modifica las filas existentes.
+    """
+
+    def __init__(self, update: bool = True):
+        self.update = update
+        self.sprint_ids: Dict[str, int] = {}
+        self.pbi_ids: Dict[str, int] = {}
+        self.stats: Dict[str, Any] = {
+            'rows': 0, 'stories': 0, 'skipped': 0, 'chunks': 0, 'errors': [],
+        }
+
+    def upsert_sprints(self, conn: Connection, sprints: List[Dict[str, Any]]) -> None:
+        self.sprint_ids.update(_upsert(conn, models.Sprint.__table__, sprints, self.update))
+
+    def _error(self, line: int, message: str) -> None:
+        self.stats['skipped'] += 1
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append({'line': line, 'error': message})
+
+    def checkpoint(self) -> Tuple[Dict[str, int], Dict[str, int], int]:
+        """Estado antes de un bloque, para volver a él si su transacción se deshace."""
+        return dict(self.sprint_ids), dict(self.pbi_ids), self.stats['skipped']
+
+    def discard_chunk(self, checkpoint, chunk: List[Tuple[int, Any]], error: Exception) -> None:
+        """
+        El bloque se deshizo: los mapas vuelven al checkpoint (sus ids ya no existen), todas sus filas
+        cuentan como descartadas y el error lleva sus líneas. Se informa aunque se haya llegado al
+        máximo de errores: es el único aviso de que esas filas no se escribieron.
+        """
+        self.sprint_ids, self.pbi_ids, skipped = checkpoint
+        self.stats['skipped'] = skipped + len(chunk)
+        self.stats['errors'].append({
+            'line': chunk[0][0], 'last_line': chunk[-1][0],
+            'error': f"Bloque deshecho por un error de la base de datos: {getattr(error, 'orig', None) or error}",
+        })
+
+    def import_chunk(self, conn: Connection, chunk: Iterable[Tuple[int, Optional[Dict[str, Any]]]]) -> int:
+        """Escribe un bloque en `conn` (sin commit). Devuelve las historias escritas."""
+        parsed, lines = [], []
+        for line, raw in chunk:
+            self.stats['rows'] += 1
+            if raw is None:
+                self._error(line, "JSON inválido")
+                continue
+            try:
+                parsed.append(parse_row(raw))
+                lines.append(line)
+            except ValueError as e:
+                self._error(line, str(e))
+        if not parsed:
+            return 0
+
+        # 1. Sprints no vistos en bloques anteriores
+        new_sprints = [p['sprint'] for p in parsed if p['sprint'] and p['sprint']['external_key'] not in self.sprint_ids]
+        if new_sprints:
+            self.upsert_sprints(conn, new_sprints)
+
+        # 2. PBIs: sin clave explícita, la clave es sprint + título
+        new_pbis = []
+        for p in parsed:
+            pbi = p['pbi']
+            sprint_id = self.sprint_ids[p['sprint']['external_key']] if p['sprint'] else None
+            pbi['sprint_id'] = sprint_id
+            if pbi['external_key'] is None:
+                pbi['external_key'] = f"{sprint_id or ''}/{pbi['title']}"
+            if pbi['external_key'] not in self.pbi_ids:
+                new_pbis.append(pbi)
+        if new_pbis:
+            self.pbi_ids.update(_upsert(conn, models.PBI.__table__, new_pbis, self.update))
+
+        # 3. Historias: sin clave explícita, la clave es PBI + título. Una clave repetida en el
+        # bloque se descarta: _upsert solo escribiría la última fila de cada clave
+        stories, first_line = [], {}
+        for line, p in zip(lines, parsed):
+            story = p['story']
+            story['pbi_id'] = self.pbi_ids[p['pbi']['external_key']]
+            if story['external_key'] is None:
+                story['external_key'] = f"{story['pbi_id']}/{story['title']}"
+            if story['external_key'] in first_line:
+                self._error(line, f"historia repetida: misma clave que la línea {first_line[story['external_key']]}")
+                continue
+            first_line[story['external_key']] = line
+            stories.append(story)
+        written = len(_upsert(conn, models.Story.__table__, stories, self.update))
+
+        self.stats['stories'] += written
+        self.stats['chunks'] += 1
+        return written
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'sprints': len(self.sprint_ids),
+            'pbis': len(self.pbi_ids),
+            'elapsed_s': round(elapsed, 3),
+            'rows_per_s': round(self.stats['rows'] / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def import_rows(
+    engine: Engine, rows: Iterable[Tuple[int, Optional[Dict[str, Any]]]], chunk_size: int = IMPORT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """Importa (línea, fila) en bloques de `chunk_size`, con un commit por bloque."""
+    importer = BulkImporter()
+    started = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            for chunk in _chunks(rows, chunk_size):
+                # Los bloques anteriores ya tienen commit: un error de la base deshace solo este
+                # bloque y la importación sigue, para devolver siempre el informe
+                checkpoint = importer.checkpoint()
+                try:
+                    importer.import_chunk(conn, chunk)
+                    conn.commit()
+                except BULK_ROW_ERRORS as e:
+                    conn.rollback()
+                    importer.discard_chunk(checkpoint, chunk, e)
+                    logger.warning(f"Bloque de las líneas {chunk[0][0]}-{chunk[-1][0]} deshecho: {e}")
+                elapsed = time.perf_counter() - started
+                logger.info(f"Importadas {importer.stats['rows']} filas ({importer.stats['rows'] / elapsed:.0f} filas/s)")
+    finally:
+        if importer.stats['stories']:
+            response_cache.invalidate_all()
+            priority_rescorer.notify()
+    report = importer.report(time.perf_counter() - started)
+    logger.info(
+        f"Importación terminada: {report['stories']} historias, {report['pbis']} PBIs, {report['sprints']} sprints, "
+        f"{report['skipped']} filas descartadas en {report['elapsed_s']}s ({report['rows_per_s']} filas/s)"
+    )
+    return report
+
+
+def import_stream(engine: Engine, stream: TextIO, fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, Any]:
+    return import_rows(engine, read_rows(stream, fmt), chunk_size)
+
+
+def import_file(engine: Engine, path: str, fmt: Optional[str] = None, chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Importa un fichero CSV o JSONL; el formato sale de la extensión si no se indica."""
+    fmt = fmt or format_of(filename=path)
+    if fmt not in FORMATS:
+        raise ValueError(f"No se reconoce el formato de {path}: use --format csv|jsonl")
+    # utf-8-sig: las exportaciones CSV de hojas de cálculo suelen llevar BOM
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        return import_stream(engine, stream, fmt, chunk_size)
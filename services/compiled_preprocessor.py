@@ -0,0 +1,105 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+# Versión NumPy del ColumnTransformer entrenado (StandardScaler + OneHotEncoder): los
+# parámetros se extraen una vez al cargar el modelo y la transformación de una historia
+# deja de construir un DataFrame de pandas.
+NUMERIC_COLUMNS = ('Story Points', 'Business Value', 'Criticidad', 'Nº dep inter', 'Continuacion')
+CATEGORY_COLUMN = 'Story Type'
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledPreprocessor:
+    mean: np.ndarray          # (n_num,), ceros si el scaler no centra
+    scale: np.ndarray         # (n_num,), unos si el scaler no escala
+    categories: np.ndarray    # categorías del one-hot, en el orden de sus columnas
+    num_slice: slice
+    cat_slice: slice
+    n_features: int
+
+    def __post_init__(self):
+        object.__setattr__(self, '_local', threading.local())
+
+    def transform(
+        self, numeric: np.ndarray, story_types: Sequence[str], out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        numeric: (n, len(NUMERIC_COLUMNS)); story_types: n cadenas. Escribe en `out` si se
+        pasa (forma (n, n_features)). Las categorías desconocidas quedan a cero, como
+        handle_unknown='ignore'.
+        """
+        numeric = np.asarray(numeric, dtype=np.float64)
+        if out is None:
+            out = np.empty((numeric.shape[0], self.n_features), dtype=np.float64)
+        np.subtract(numeric, self.mean, out=out[:, self.num_slice])
+        np.divide(out[:, self.num_slice], self.scale, out=out[:, self.num_slice])
+        types = np.asarray(story_types, dtype=object).reshape(-1, 1)
+        out[:, self.cat_slice] = types == self.categories
+        return out
+
+    def transform_one(self, numeric: Sequence[float], story_type: str) -> np.ndarray:
+        """Una fila sobre un búfer preasignado por hilo; el resultado se sobrescribe en la siguiente llamada."""
+        buffer = getattr(self._local, 'row', None)
+        if buffer is None:
+            buffer = self._local.row = np.empty((1, self.n_features), dtype=np.float64)
+        return self.transform(np.asarray(numeric, dtype=np.float64).reshape(1, -1), (story_type,), out=buffer)
+
+
+def compile_preprocessor(preprocessor: Any) -> Optional[CompiledPreprocessor]:
+    """
+    Extrae medias, escalas y categorías del ColumnTransformer entrenado. Devuelve None si
+    su estructura no es la esperada (otros transformadores, columnas, drop, salida dispersa).
+    """
+    try:
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        transformers = {name: (trans, list(cols)) for name, trans, cols in preprocessor.transformers_}
+        num, num_cols = transformers['num']
+        cat, cat_cols = transformers['cat']
+        if getattr(preprocessor, 'sparse_output_', False) or preprocessor.remainder != 'drop':
+            return None
+        if not isinstance(num, StandardScaler) or tuple(num_cols) != NUMERIC_COLUMNS:
+            return None
+        if not isinstance(cat, OneHotEncoder) or cat_cols != [CATEGORY_COLUMN]:
+            return None
+        if cat.drop is not None or cat.handle_unknown != 'ignore' or getattr(cat, '_infrequent_enabled', False):
+            return None
+        if set(transformers) - {'num', 'cat', 'remainder'}:
+            return None
+
+        n_num = len(NUMERIC_COLUMNS)
+        indices = preprocessor.output_indices_
+        categories = np.asarray(cat.categories_[0], dtype=object)
+        return CompiledPreprocessor(
+            mean=np.asarray(num.mean_, dtype=np.float64) if num.with_mean else np.zeros(n_num),
+            scale=np.asarray(num.scale_, dtype=np.float64) if num.with_std else np.ones(n_num),
+            categories=categories.reshape(1, -1),
+            num_slice=indices['num'],
+            cat_slice=indices['cat'],
+            n_features=max(indices['num'].stop, indices['cat'].stop),
+        )
+    except (AttributeError, KeyError, ValueError, TypeError, ImportError):
+        return None
+
+
+def check_parity(
+    compiled: CompiledPreprocessor, preprocessor: Any, numeric: np.ndarray, story_types: Sequence[str]
+) -> Dict[str, Any]:
+    """Compara transform() compilado con preprocessor.transform() sobre las mismas filas."""
+    import pandas as pd
+
+    frame = pd.DataFrame(np.asarray(numeric, dtype=np.float64), columns=list(NUMERIC_COLUMNS))
+    frame[CATEGORY_COLUMN] = list(story_types)
+    expected = preprocessor.transform(frame)
+    if hasattr(expected, 'toarray'):
+        expected = expected.toarray()
+    actual = compiled.transform(numeric, story_types)
+    diff = np.abs(actual - expected)
+    return {
+        'rows': int(actual.shape[0]),
+        'max_abs_diff': float(diff.max()) if diff.size else 0.0,
+        'ok': bool(actual.shape == expected.shape and np.allclose(actual, expected, rtol=0, atol=1e-12)),
+    }
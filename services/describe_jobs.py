@@ -0,0 +1,285 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import ValidationError
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+
+import crud
+import models
+from database import SessionLocal
+from services.ai_services import DescriptionInput, generate_description_and_acceptance_async
+
+# Configuración de logging
+default_log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=default_log_format)
+logger = logging.getLogger(__name__)
+
+# Trabajos en segundo plano que generan descripción y criterios para todas las historias
+# pendientes de un sprint. El worker que lanza un trabajo lo ejecuta y guarda su estado en la
+# tabla describe_jobs al empezar, cada DESCRIBE_JOB_SYNC_INTERVAL_S y al terminar, así que con
+# varios workers (serve.py) cualquiera de ellos responde al sondeo del progreso.
+DESCRIBE_JOB_CONCURRENCY = int(os.getenv('DESCRIBE_JOB_CONCURRENCY', '4'))
+DESCRIBE_JOB_MAX_CONCURRENCY = int(os.getenv('DESCRIBE_JOB_MAX_CONCURRENCY', '16'))
+DESCRIBE_JOB_HISTORY = int(os.getenv('DESCRIBE_JOB_HISTORY', '100'))
+DESCRIBE_JOB_SYNC_INTERVAL_S = float(os.getenv('DESCRIBE_JOB_SYNC_INTERVAL_S', '1'))
+# Un trabajo en curso cuya fila lleva este tiempo sin actualizarse se da por fallido (worker caído)
+DESCRIBE_JOB_STALE_S = float(os.getenv('DESCRIBE_JOB_STALE_S', '60'))
+
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE = (PENDING, RUNNING)
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+@dataclass
+class DescribeJob:
+    id: str
+    sprint_id: int
+    concurrency: int
+    story_ids: List[int]
+    status: str = PENDING
+    done: int = 0
+    skipped: int = 0
+    errors: Dict[int, str] = field(default_factory=dict)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.story_ids)
+
+    def to_dict(self) -> Dict[str, Any]:
+        processed = self.done + self.skipped + len(self.errors)
+        return {
+            'job_id': self.id,
+            'sprint_id': self.sprint_id,
+            'status': self.status,
+            'concurrency': self.concurrency,
+            'total': self.total,
+            'done': self.done,
+            'skipped': self.skipped,
+            'failed': len(self.errors),
+            'progress': round(processed / self.total, 4) if self.total else 1.0,
+            'errors': {str(story_id): error for story_id, error in self.errors.items()},
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+_lock = threading.Lock()
+_jobs: "OrderedDict[str, DescribeJob]" = OrderedDict()
+# Referencias fuertes: el bucle de eventos solo guarda referencias débiles a las tareas
+_tasks: Set[asyncio.Task] = set()
+
+
+def _save(job: DescribeJob, prune: bool = False) -> None:
+    """Guarda el estado del trabajo en describe_jobs (y descarta los terminados más antiguos)."""
+    db = SessionLocal.session_factory()
+    try:
+        db.merge(models.DescribeJobRecord(
+            id=job.id, sprint_id=job.sprint_id, status=job.status,
+            state=json.dumps(job.to_dict()), updated_at=datetime.utcnow(),
+        ))
+        if prune:
+            record = models.DescribeJobRecord
+            keep = (
+                select(record.id).where(record.status.in_(FINISHED))
+                .order_by(record.updated_at.desc()).limit(DESCRIBE_JOB_HISTORY)
+            )
+            db.execute(delete(record).where(record.status.in_(FINISHED), record.id.not_in(keep)))
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Error guardando el estado del trabajo {job.id}: {e}")
+    finally:
+        db.close()
+
+
+def _stored_state(record: "models.DescribeJobRecord") -> Dict[str, Any]:
+    state = json.loads(record.state)
+    if record.status in ACTIVE and record.updated_at < datetime.utcnow() - timedelta(seconds=DESCRIBE_JOB_STALE_S):
+        # El worker que lo ejecutaba dejó de actualizarlo
+        state['status'] = FAILED
+    return state
+
+
+def _load(job_id: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal.session_factory()
+    try:
+        record = db.get(models.DescribeJobRecord, job_id)
+        return _stored_state(record) if record is not None else None
+    finally:
+        db.close()
+
+
+def _load_active(sprint_id: int) -> Optional[Dict[str, Any]]:
+    """Trabajo en curso del sprint lanzado por cualquier worker."""
+    record = models.DescribeJobRecord
+    db = SessionLocal.session_factory()
+    try:
+        for row in db.scalars(
+            select(record).where(record.sprint_id == sprint_id, record.status.in_(ACTIVE))
+            .order_by(record.updated_at.desc())
+        ):
+            state = _stored_state(row)
+            if state['status'] in ACTIVE:
+                return state
+        return None
+    finally:
+        db.close()
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Estado del trabajo: de memoria si lo ejecuta este proceso, si no de la base."""
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job.to_dict()
+    return await asyncio.to_thread(_load, job_id)
+
+
+def _active_job(sprint_id: int) -> Optional[DescribeJob]:
+    for job in _jobs.values():
+        if job.sprint_id == sprint_id and job.status in ACTIVE:
+            return job
+    return None
+
+
+def _register(job: DescribeJob) -> None:
+    _jobs[job.id] = job
+    # Se descartan los trabajos terminados más antiguos
+    finished = [j.id for j in _jobs.values() if j.status in FINISHED]
+    for job_id in finished[:max(0, len(_jobs) - DESCRIBE_JOB_HISTORY)]:
+        del _jobs[job_id]
+
+
+def _pending_stories(sprint_id: int) -> List[Any]:
+    db = SessionLocal.session_factory()
+    try:
+        return crud.get_undescribed_stories_by_sprint(db, sprint_id)
+    finally:
+        db.close()
+
+
+def _store(story_id: int, sprint_id: int, res: Dict[str, Any]) -> bool:
+    db = SessionLocal.session_factory()
+    try:
+        return crud.set_story_description(
+            db, story_id, res.get('historia', ''), "\n".join(res.get('criterios', [])), sprint_id
+        )
+    finally:
+        db.close()
+
+
+async def _describe_story(job: DescribeJob, story_id: int, raw_description: Optional[str],
+                          semaphore: asyncio.Semaphore) -> None:
+    async with semaphore:
+        try:
+            desc_input = DescriptionInput(idea_general=raw_description or '')
+        except ValidationError as ve:
+            job.errors[story_id] = '; '.join(err['msg'] for err in ve.errors())
+            return
+        res = await generate_description_and_acceptance_async(desc_input.dict())
+        if 'error' in res:
+            job.errors[story_id] = res['error']
+            return
+        try:
+            # Se persiste historia a historia: un fallo posterior no pierde lo ya generado
+            if await asyncio.to_thread(_store, story_id, job.sprint_id, res):
+                job.done += 1
+            else:
+                job.skipped += 1
+        except Exception as e:
+            job.errors[story_id] = str(e)
+
+
+async def _heartbeat(job: DescribeJob) -> None:
+    while True:
+        await asyncio.sleep(DESCRIBE_JOB_SYNC_INTERVAL_S)
+        await asyncio.to_thread(_save, job)
+
+
+async def _run(job: DescribeJob, stories: List[Any]) -> None:
+    job.status = RUNNING
+    semaphore = asyncio.Semaphore(job.concurrency)
+    heartbeat = asyncio.create_task(_heartbeat(job))
+    try:
+        await asyncio.gather(*(
+            _describe_story(job, story.id, story.raw_description, semaphore) for story in stories
+        ))
+        job.status = COMPLETED
+        logger.info(
+            f"Trabajo {job.id} terminado (sprint {job.sprint_id}): "
+            f"{job.done} descritas, {job.skipped} omitidas, {len(job.errors)} con error"
+        )
+    except asyncio.CancelledError:
+        job.status = CANCELLED
+        logger.warning(f"Trabajo {job.id} cancelado (sprint {job.sprint_id})")
+        raise
+    except Exception as e:
+        job.status = FAILED
+        logger.error(f"Trabajo {job.id} fallido (sprint {job.sprint_id}): {e}")
+    finally:
+        job.finished_at = datetime.utcnow()
+        heartbeat.cancel()
+        # Sin await: la tarea puede estar cancelándose (apagado de la aplicación)
+        _save(job)
+
+
+async def start_job(sprint_id: int, concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Lanza (o devuelve, si ya hay uno en curso en cualquier worker) el trabajo de descripción
+    del sprint. Solo incluye las historias sin `formatted_description`.
+    """
+    with _lock:
+        active = _active_job(sprint_id)
+    if active is not None:
+        return active.to_dict()
+    stored = await asyncio.to_thread(_load_active, sprint_id)
+    if stored is not None:
+        return stored
+
+    stories = await asyncio.to_thread(_pending_stories, sprint_id)
+    limit = max(1, min(concurrency or DESCRIBE_JOB_CONCURRENCY, DESCRIBE_JOB_MAX_CONCURRENCY))
+    job = DescribeJob(
+        id=uuid.uuid4().hex, sprint_id=sprint_id, concurrency=limit, story_ids=[s.id for s in stories]
+    )
+    with _lock:
+        # Otra petición pudo lanzar el mismo sprint mientras se leían las historias
+        active = _active_job(sprint_id)
+        if active is not None:
+            return active.to_dict()
+        _register(job)
+    # Guardado antes de responder: el sondeo puede llegar a otro worker
+    await asyncio.to_thread(_save, job, True)
+
+    task = asyncio.create_task(_run(job, stories))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    logger.info(f"Trabajo {job.id} lanzado para sprint {sprint_id}: {job.total} historias, concurrencia {limit}")
+    return job.to_dict()
+
+
+async def wait_all() -> None:
+    """Espera a que terminen los trabajos en curso."""
+    await asyncio.gather(*list(_tasks), return_exceptions=True)
+
+
+async def cancel_all() -> None:
+    """Cancela los trabajos en curso (apagado de la aplicación)."""
+    tasks = list(_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,119 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+import models
+from database import SessionLocal
+
+# Configuración de logging
+default_log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=default_log_format)
+logger = logging.getLogger(__name__)
+
+# Caché persistente de generaciones LLM en la tabla llm_cache, direccionada por contenido:
+# la misma petición (modelo, prompt, temperatura, max_tokens) reutiliza la respuesta guardada.
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LLM_CACHE_TTL_S = int(os.getenv('LLM_CACHE_TTL_S', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+
+_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] += n
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+    """sha256 del JSON canónico de todo lo que determina la respuesta."""
+    canonical = json.dumps(
+        {'model': model, 'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens},
+        ensure_ascii=False, sort_keys=True, separators=(',', ':'),
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def get(key: str) -> Optional[str]:
+    """Devuelve la respuesta cacheada si existe y no ha caducado; marca su uso para el LRU."""
+    if not LLM_CACHE_ENABLED:
+        return None
+    db = SessionLocal.session_factory()
+    try:
+        entry = db.get(models.LLMCacheEntry, key)
+        now = datetime.utcnow()
+        if entry is None or entry.created_at < now - timedelta(seconds=LLM_CACHE_TTL_S):
+            _count('misses')
+            return None
+        entry.last_used_at = now
+        entry.hits = (entry.hits or 0) + 1
+        response = entry.response
+        db.commit()
+        _count('hits')
+        return response
+    except SQLAlchemyError as e:
+        db.rollback()
+        _count('errors')
+        logger.error(f'Error leyendo la caché LLM: {e}')
+        return None
+    finally:
+        db.close()
+
+
+def put(key: str, model: str, response: str) -> None:
+    """Guarda (o reemplaza) una respuesta y aplica caducidad y el límite de tamaño LRU."""
+    if not LLM_CACHE_ENABLED:
+        return
+    db = SessionLocal.session_factory()
+    try:
+        now = datetime.utcnow()
+        db.merge(models.LLMCacheEntry(
+            key=key, model=model, response=response, created_at=now, last_used_at=now, hits=0
+        ))
+        evicted = db.execute(
+            delete(models.LLMCacheEntry)
+            .where(models.LLMCacheEntry.created_at < now - timedelta(seconds=LLM_CACHE_TTL_S))
+        ).rowcount or 0
+        excess = db.scalar(select(func.count()).select_from(models.LLMCacheEntry)) - LLM_CACHE_MAX_ENTRIES
+        if excess > 0:
+            oldest = (
+                select(models.LLMCacheEntry.key)
+                .order_by(models.LLMCacheEntry.last_used_at)
+                .limit(excess)
+                .scalar_subquery()
+            )
+            evicted += db.execute(
+                delete(models.LLMCacheEntry).where(models.LLMCacheEntry.key.in_(oldest))
+            ).rowcount or 0
+        db.commit()
+        _count('writes')
+        if evicted:
+            _count('evictions', evicted)
+    except SQLAlchemyError as e:
+        db.rollback()
+        _count('errors')
+        logger.error(f'Error guardando en la caché LLM: {e}')
+    finally:
+        db.close()
+
+
+def stats() -> Dict[str, Any]:
+    """Contadores del proceso y tamaño actual de la tabla."""
+    with _lock:
+        data: Dict[str, Any] = dict(_counters)
+    lookups = data['hits'] + data['misses']
+    data['hit_ratio'] = round(data['hits'] / lookups, 4) if lookups else None
+    db = SessionLocal.session_factory()
+    try:
+        data['entries'] = db.scalar(select(func.count()).select_from(models.LLMCacheEntry))
+    finally:
+        db.close()
+    data.update(enabled=LLM_CACHE_ENABLED, ttl_s=LLM_CACHE_TTL_S, max_entries=LLM_CACHE_MAX_ENTRIES)
+    return data
@@ -0,0 +1,218 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Registro de versiones de un modelo dentro de un directorio:
+#   <nombre>.pkl              artefacto original, versión "base"
+#   <nombre>-<versión>.pkl    artefactos versionados
+#   <nombre>.active           versión activa (opcional); si no hay, la versión más alta
+# La versión nueva se carga completa fuera de las peticiones y se activa con una sola
+# asignación: una predicción en curso sigue usando la versión que tomó al empezar.
+BASE_VERSION = 'base'
+
+
+@dataclass(frozen=True, eq=False)
+class ModelVersion:
+    version: str
+    path: Path
+    sha256: str
+    loaded_at: datetime
+    artifact: Any
+
+    @property
+    def tag(self) -> str:
+        """Versión más el inicio del hash: distingue un artefacto sobrescrito con el mismo nombre."""
+        return f'{self.version}+{self.sha256[:8]}'
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'tag': self.tag,
+            'file': self.path.name,
+            'sha256': self.sha256,
+            'loaded_at': self.loaded_at.isoformat(),
+        }
+
+
+def _natural_key(version: str) -> Tuple:
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r'(\d+)', version))
+
+
+def _fingerprint(path: Path) -> Tuple[str, int, int]:
+    stat = path.stat()
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open('rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, directory: Path, name: str, loader: Callable[[Path], Any], pinned: Optional[str] = None):
+        self.directory = directory
+        self.name = name
+        self.loader = loader
+        self.pinned = pinned
+        self.last_error: Optional[str] = None
+        self._active: Optional[ModelVersion] = None
+        self._fingerprint: Optional[Tuple[str, int, int]] = None
+        self._initialized = False
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def pointer_file(self) -> Path:
+        return self.directory / f'{self.name}.active'
+
+    def available(self) -> Dict[str, Path]:
+        versions: Dict[str, Path] = {}
+        base = self.directory / f'{self.name}.pkl'
+        if base.exists():
+            versions[BASE_VERSION] = base
+        for path in self.directory.glob(f'{self.name}-*.pkl'):
+            versions[path.stem[len(self.name) + 1:]] = path
+        return versions
+
+    def _read_pointer(self) -> Optional[str]:
+        try:
+            return self.pointer_file.read_text(encoding='utf-8').strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_pointer(self, version: str) -> None:
+        tmp = self.pointer_file.with_suffix('.active.tmp')
+        tmp.write_text(version, encoding='utf-8')
+        os.replace(tmp, self.pointer_file)
+
+    def _selected(self) -> Optional[Tuple[str, Path]]:
+        versions = self.available()
+        wanted = self.pinned or self._read_pointer()
+        if wanted:
+            if wanted in versions:
+                return wanted, versions[wanted]
+            self.last_error = f'Versión de modelo no encontrada: {wanted}'
+            logger.error(f'{self.last_error} en {self.directory}')
+            return None
+        versioned = [v for v in versions if v != BASE_VERSION]
+        if versioned:
+            latest = max(versioned, key=_natural_key)
+            return latest, versions[latest]
+        if BASE_VERSION in versions:
+            return BASE_VERSION, versions[BASE_VERSION]
+        self.last_error = f'No se encontró ningún modelo {self.name} en {self.directory}'
+        logger.warning(self.last_error)
+        return None
+
+    def current(self) -> Optional[ModelVersion]:
+        """Versión activa; la primera llamada la carga. Tomar la referencia una vez por predicción."""
+        if not self._initialized:
+            self.reload()
+        return self._active
+
+    def reload(self, version: Optional[str] = None, force: bool = False) -> Optional[ModelVersion]:
+        """
+        Carga la versión seleccionada (o activa `version`, que debe existir) y la sustituye de
+        golpe. Si la carga falla se mantiene la versión anterior. Sin cambios en el fichero
+        seleccionado no se recarga salvo con `force`.
+        """
+        with self._reload_lock:
+            try:
+                return self._reload(version, force)
+            finally:
+                # Al final: quien llame a current() durante la primera carga espera al lock
+                self._initialized = True
+
+    def _reload(self, version: Optional[str], force: bool) -> Optional[ModelVersion]:
+        if version is not None:
+            if self.pinned:
+                raise ValueError(f'Versión fijada por configuración: {self.pinned}')
+            if version not in self.available():
+                raise ValueError(f'Versión de modelo no encontrada: {version}')
+            self._write_pointer(version)
+
+        selected = self._selected()
+        if selected is None:
+            return self._active
+        label, path = selected
+        try:
+            fingerprint = _fingerprint(path)
+            if not force and self._active is not None and fingerprint == self._fingerprint:
+                return self._active
+            logger.info(f'Cargando modelo {self.name} versión {label} desde {path}')
+            loaded = ModelVersion(
+                version=label, path=path, sha256=_sha256(path), loaded_at=datetime.utcnow(),
+                artifact=self.loader(path),
+            )
+        except Exception as e:
+            self.last_error = f'Error cargando {path.name}: {e}'
+            logger.error(self.last_error)
+            return self._active
+
+        previous, self._active, self._fingerprint = self._active, loaded, fingerprint
+        self.last_error = None
+        logger.info(
+            f'Modelo {self.name} activo: {loaded.tag}'
+            + (f' (antes {previous.tag})' if previous is not None else '')
+        )
+        return loaded
+
+    def check_for_changes(self) -> Optional[ModelVersion]:
+        """Recarga si la versión seleccionada o su fichero han cambiado (solo tras la primera carga)."""
+        if not self._initialized:
+            return None
+        selected = self._selected()
+        if selected is None:
+            return self._active
+        try:
+            if _fingerprint(selected[1]) == self._fingerprint:
+                return self._active
+        except FileNotFoundError:
+            return self._active
+        return self.reload()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                logger.error(f'Error vigilando el modelo {self.name}: {e}')
+
+    def start_watcher(self, interval: float) -> None:
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name=f'{self.name}-watcher', daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self, timeout: float = 5.0) -> None:
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join(timeout)
+        self._watcher = None
+
+    def status(self) -> Dict[str, Any]:
+        active = self._active
+        return {
+            'active': active.info() if active is not None else None,
+            'available': sorted(self.available(), key=_natural_key),
+            'selected': self.pinned or self._read_pointer(),
+            'pinned': self.pinned is not None,
+            'watching': self._watcher is not None and self._watcher.is_alive(),
+            'last_error': self.last_error,
+        }
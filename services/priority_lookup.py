@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Tabla precalculada de prioridades: las características del modelo son enteros pequeños,
+# así que se enumera la rejilla completa una vez y cada consulta es un acceso por índice.
+# Columnas numéricas del preprocesador, en el orden de los ejes de la tabla
+FEATURES = ('Story Points', 'Business Value', 'Criticidad', 'Nº dep inter', 'Continuacion')
+
+# predict(numeric (n, len(FEATURES)), story_types (n,)) -> clase de cada fila
+PredictFn = Callable[[np.ndarray, Sequence[str]], np.ndarray]
+
+
+@dataclass(frozen=True)
+class PriorityLookup:
+    maxima: Tuple[int, ...]          # valor máximo (incluido) de cada característica de FEATURES
+    story_types: Tuple[str, ...]     # último eje de la tabla
+    table: np.ndarray                # int8, forma (*[m + 1 for m in maxima], len(story_types))
+
+    @property
+    def cells(self) -> int:
+        return int(self.table.size)
+
+    def index_of(self, values: Sequence[float], story_type: str) -> Optional[Tuple[int, ...]]:
+        """Índice en la tabla, o None si algún valor no es entero o cae fuera de la rejilla."""
+        if story_type not in self.story_types:
+            return None
+        idx = []
+        for value, maximum in zip(values, self.maxima):
+            as_int = int(value)
+            if as_int != value or not 0 <= as_int <= maximum:
+                return None
+            idx.append(as_int)
+        idx.append(self.story_types.index(story_type))
+        return tuple(idx)
+
+    def get(self, values: Sequence[float], story_type: str) -> Optional[int]:
+        idx = self.index_of(values, story_type)
+        return None if idx is None else int(self.table[idx])
+
+
+def _shape(maxima: Sequence[int], story_types: Sequence[str]) -> Tuple[int, ...]:
+    return tuple(m + 1 for m in maxima) + (len(story_types),)
+
+
+def grid(maxima: Sequence[int], story_types: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Todas las combinaciones de la rejilla; la fila i corresponde a table.reshape(-1)[i]."""
+    shape = _shape(maxima, story_types)
+    coords = np.indices(shape).reshape(len(shape), -1)
+    numeric = coords[:-1].T.astype(np.float64)
+    return numeric, np.asarray(story_types, dtype=object)[coords[-1]]
+
+
+def build(predict: PredictFn, maxima: Sequence[int], story_types: Sequence[str]) -> PriorityLookup:
+    """Predice la rejilla completa en un único lote y la guarda como tabla int8."""
+    classes = predict(*grid(maxima, story_types))
+    return PriorityLookup(
+        maxima=tuple(maxima),
+        story_types=tuple(story_types),
+        table=np.asarray(classes, dtype=np.int8).reshape(_shape(maxima, story_types)),
+    )
+
+
+def verify(
+    lookup: PriorityLookup, predict: PredictFn, sample: Optional[int] = None, seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Compara la tabla con predicciones en vivo del modelo, en toda la rejilla o en
+    una muestra aleatoria de `sample` celdas.
+    """
+    numeric, story_types = grid(lookup.maxima, lookup.story_types)
+    cells = np.arange(len(story_types))
+    if sample and sample < len(cells):
+        cells = np.sort(np.random.default_rng(seed).choice(cells, size=sample, replace=False))
+    live = np.asarray(predict(numeric[cells], story_types[cells]))
+    stored = lookup.table.reshape(-1)[cells]
+    mismatched = np.flatnonzero(live != stored)
+    return {
+        'cells': lookup.cells,
+        'checked': int(cells.size),
+        'mismatches': int(mismatched.size),
+        'examples': [
+            {
+                **{name: float(v) for name, v in zip(FEATURES, numeric[cells[i]])},
+                'Story Type': str(story_types[cells[i]]),
+                'table': int(stored[i]),
+                'model': int(live[i]),
+            }
+            for i in mismatched[:10]
+        ],
+    }
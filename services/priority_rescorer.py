@@ -0,0 +1,183 @@
+import os
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import models
+import response_cache
+from database import SessionLocal
+
+# Configuración de logging
+default_log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=default_log_format)
+logger = logging.getLogger(__name__)
+
+# Recálculo incremental de prioridades: crud marca stories.priority_dirty al crear una historia
+# o cambiar sus características y avisa con notify(); un hilo de fondo puntúa por lotes solo
+# las historias marcadas, fuera de la petición de escritura.
+PRIORITY_RESCORE_ENABLED = os.getenv('PRIORITY_RESCORE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PRIORITY_RESCORE_BATCH_SIZE = int(os.getenv('PRIORITY_RESCORE_BATCH_SIZE', '200'))
+# Espera tras un aviso para agrupar escrituras seguidas en un mismo lote
+PRIORITY_RESCORE_DELAY_S = float(os.getenv('PRIORITY_RESCORE_DELAY_S', '0.5'))
+# Repaso periódico aunque no llegue ningún aviso (otros procesos, reintentos)
+PRIORITY_RESCORE_INTERVAL_S = float(os.getenv('PRIORITY_RESCORE_INTERVAL_S', '60'))
+
+# Columnas de Story que usa el modelo de prioridad
+PRIORITY_FEATURES = (
+    'story_points', 'business_value', 'criticity', 'internal_dependencies', 'continuation', 'story_type'
+)
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_counters = {'passes': 0, 'rescored': 0, 'stale': 0, 'failed': 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] += n
+
+
+def features_changed(story: Any, data: Dict[str, Any]) -> bool:
+    """True si `data` cambia alguna característica del modelo respecto a `story`."""
+    return any(key in data and getattr(story, key) != data[key] for key in PRIORITY_FEATURES)
+
+
+def notify() -> None:
+    """Avisa al hilo de fondo de que hay historias marcadas; no bloquea."""
+    _wake.set()
+
+
+def _dirty_batch(db: Session, after_id: int, limit: int) -> List[Any]:
+    story = models.Story
+    return db.execute(
+        select(story.id, *[getattr(story, f) for f in PRIORITY_FEATURES], models.PBI.sprint_id)
+        .join(models.PBI, story.pbi_id == models.PBI.id)
+        .where(story.priority_dirty.is_(True), story.id > after_id)
+        .order_by(story.id)
+        .limit(limit)
+    ).all()
+
+
+def _apply(db: Session, params: List[Dict[str, Any]]) -> int:
+    """
+    Guarda prioridades y limpia la marca solo si las características siguen siendo las
+    puntuadas: una historia editada durante el cálculo queda marcada para la siguiente pasada.
+    """
+    stories = models.Story.__table__
+    stmt = (
+        update(stories)
+        .where(
+            stories.c.id == bindparam('b_id'),
+            *[stories.c[f].is_not_distinct_from(bindparam(f'b_{f}')) for f in PRIORITY_FEATURES],
+        )
+        .values(priority=bindparam('b_priority'), priority_dirty=False)
+    )
+    written = db.execute(stmt, params).rowcount
+    db.commit()
+    return written
+
+
+def rescore_dirty(batch_size: Optional[int] = None) -> int:
+    """Puntúa por lotes todas las historias marcadas. Devuelve cuántas prioridades se han guardado."""
+    # Import diferido: crud importa este módulo y no debe cargar xgboost ni el modelo
+    from services.ai_services import calculate_priorities, priority_payload_from_story
+
+    batch_size = batch_size or PRIORITY_RESCORE_BATCH_SIZE
+    written_total = 0
+    db = SessionLocal.session_factory()
+    try:
+        # Avance por id: las historias que fallan o cambian siguen marcadas sin repetirse en esta pasada
+        after_id = 0
+        while True:
+            rows = _dirty_batch(db, after_id, batch_size)
+            if not rows:
+                break
+            after_id = rows[-1].id
+
+            params: List[Dict[str, Any]] = []
+            sprint_ids = set()
+            for row, res in zip(rows, calculate_priorities([priority_payload_from_story(r) for r in rows])):
+                if 'error' in res:
+                    logger.error(f"No se pudo recalcular la prioridad de story {row.id}: {res['error']}")
+                    _count('failed')
+                    continue
+                params.append({
+                    'b_id': row.id,
+                    'b_priority': res['prioridad_num'],
+                    **{f'b_{f}': getattr(row, f) for f in PRIORITY_FEATURES},
+                })
+                sprint_ids.add(row.sprint_id)
+            if not params:
+                continue
+
+            written = _apply(db, params)
+            response_cache.invalidate_sprint(*sprint_ids)
+            written_total += written
+            _count('rescored', written)
+            _count('stale', len(params) - written)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Error recalculando prioridades: {e}")
+        raise
+    finally:
+        db.close()
+    _count('passes')
+    if written_total:
+        logger.info(f"Prioridades recalculadas para {written_total} historias")
+    return written_total
+
+
+def _run() -> None:
+    while not _stop.is_set():
+        _wake.wait(PRIORITY_RESCORE_INTERVAL_S)
+        if _stop.wait(PRIORITY_RESCORE_DELAY_S):
+            break
+        # Se limpia antes de puntuar: un aviso durante la pasada provoca otra
+        _wake.clear()
+        try:
+            rescore_dirty()
+        except Exception as e:
+            logger.error(f"Error en el recálculo de prioridades en segundo plano: {e}")
+
+
+def start() -> None:
+    """Arranca el hilo de fondo (una pasada inicial recoge lo marcado antes de reiniciar)."""
+    global _thread
+    if not PRIORITY_RESCORE_ENABLED or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _wake.set()
+    _thread = threading.Thread(target=_run, name='priority-rescorer', daemon=True)
+    _thread.start()
+    logger.info("Recálculo incremental de prioridades activo")
+
+
+def stop(timeout: float = 5.0) -> None:
+    global _thread
+    if _thread is None:
+        return
+    _stop.set()
+    _wake.set()
+    _thread.join(timeout)
+    _thread = None
+
+
+def stats() -> Dict[str, Any]:
+    """Contadores del proceso y número de historias marcadas pendientes."""
+    with _lock:
+        data: Dict[str, Any] = dict(_counters)
+    db = SessionLocal.session_factory()
+    try:
+        data['pending'] = db.scalar(
+            select(func.count()).select_from(models.Story).where(models.Story.priority_dirty.is_(True))
+        )
+    finally:
+        db.close()
+    data.update(enabled=PRIORITY_RESCORE_ENABLED, running=_thread is not None and _thread.is_alive())
+    return data
@@ -0,0 +1,205 @@
+import sys
+import logging
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, func, insert, select, union
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+
+import models
+from models import Base
+from schemas import Priority, StoryType
+
+logger = logging.getLogger(__name__)
+
+# Agregados por sprint para GET /sprints/{id}/stats: la tabla sprint_stats guarda, por sprint,
+# prioridad y tipo, cuántas historias hay y la suma de sus puntos y valor de negocio. En SQLite la
+# mantienen triggers sobre stories, pbis y sprints, así que la actualizan todos los caminos de
+# escritura (ORM, UPDATE por lotes del recálculo de prioridades, upserts de la importación masiva)
+# en la misma transacción. Con otros motores la consulta agrega las historias en cada petición.
+# `python sprint_stats.py` reconstruye la tabla y `--check` informa de la deriva sin tocarla.
+
+NO_PRIORITY = -1
+
+rollup = models.SprintStats.__table__
+pbis = models.PBI.__table__
+stories = models.Story.__table__
+
+_ADD = """
+    INSERT INTO sprint_stats (sprint_id, priority, story_type, stories, story_points, business_value)
+    {select}
+    ON CONFLICT (sprint_id, priority, story_type) DO UPDATE SET
+        stories = stories + excluded.stories,
+        story_points = story_points + excluded.story_points,
+        business_value = business_value + excluded.business_value;"""
+
+_PRUNE = "\n    DELETE FROM sprint_stats WHERE sprint_id = {sprint} AND stories = 0;"
+
+# Una historia (NEW u OLD)
+_ADD_STORY = _ADD.format(select=(
+    "SELECT sprint_id, COALESCE(NEW.priority, -1), NEW.story_type, 1, COALESCE(NEW.story_points, 0), "
+    "COALESCE(NEW.business_value, 0)\n    FROM pbis WHERE id = NEW.pbi_id AND sprint_id IS NOT NULL"
+))
+_SUBTRACT_STORY = """
+    UPDATE sprint_stats SET
+        stories = stories - 1,
+        story_points = story_points - COALESCE(OLD.story_points, 0),
+        business_value = business_value - COALESCE(OLD.business_value, 0)
+    WHERE sprint_id = (SELECT sprint_id FROM pbis WHERE id = OLD.pbi_id)
+        AND priority = COALESCE(OLD.priority, -1) AND story_type = OLD.story_type;""" + _PRUNE.format(
+    sprint="(SELECT sprint_id FROM pbis WHERE id = OLD.pbi_id)"
+)
+
+# Todas las historias de un PBI (al moverlo de sprint o borrarlo)
+_PBI_GROUPS = (
+    "SELECT COALESCE(priority, -1) AS priority, story_type, COUNT(*) AS stories, "
+    "SUM(COALESCE(story_points, 0)) AS story_points, SUM(COALESCE(business_value, 0)) AS business_value "
+    "FROM stories WHERE pbi_id = {pbi} GROUP BY 1, 2"
+)
+_ADD_PBI = _ADD.format(select=(
+    "SELECT NEW.sprint_id, priority, story_type, stories, story_points, business_value\n"
+    f"    FROM ({_PBI_GROUPS.format(pbi='NEW.id')}) WHERE NEW.sprint_id IS NOT NULL"
+))
+_SUBTRACT_PBI = f"""
+    UPDATE sprint_stats SET
+        stories = sprint_stats.stories - g.stories,
+        story_points = sprint_stats.story_points - g.story_points,
+        business_value = sprint_stats.business_value - g.business_value
+    FROM ({_PBI_GROUPS.format(pbi='OLD.id')}) AS g
+    WHERE sprint_stats.sprint_id = OLD.sprint_id
+        AND sprint_stats.priority = g.priority AND sprint_stats.story_type = g.story_type;""" + _PRUNE.format(
+    sprint='OLD.sprint_id'
+)
+
+TRIGGERS = {
+    'stories_stats_insert': f"AFTER INSERT ON stories\nBEGIN{_ADD_STORY}\nEND",
+    'stories_stats_delete': f"AFTER DELETE ON stories\nBEGIN{_SUBTRACT_STORY}\nEND",
+    'stories_stats_update': (
+        "AFTER UPDATE OF pbi_id, priority, story_type, story_points, business_value ON stories\n"
+        "WHEN OLD.pbi_id IS NOT NEW.pbi_id OR OLD.priority IS NOT NEW.priority "
+        "OR OLD.story_type IS NOT NEW.story_type OR OLD.story_points IS NOT NEW.story_points "
+        "OR OLD.business_value IS NOT NEW.business_value\n"
+        f"BEGIN{_SUBTRACT_STORY}{_ADD_STORY}\nEND"
+    ),
+    'pbis_stats_update': (
+        "AFTER UPDATE OF sprint_id ON pbis WHEN OLD.sprint_id IS NOT NEW.sprint_id\n"
+        f"BEGIN{_SUBTRACT_PBI}{_ADD_PBI}\nEND"
+    ),
+    # BEFORE: las historias del PBI aún existen si se borra sin cascada del ORM
+    'pbis_stats_delete': f"BEFORE DELETE ON pbis\nBEGIN{_SUBTRACT_PBI}\nEND",
+    'sprints_stats_delete': "AFTER DELETE ON sprints\nBEGIN\n    DELETE FROM sprint_stats WHERE sprint_id = OLD.id;\nEND",
+}
+
+
+def maintained(bind) -> bool:
+    """True si los triggers mantienen sprint_stats en este motor."""
+    return bind.dialect.name == 'sqlite'
+
+
+def install_triggers(conn: Connection) -> None:
+    for name, body in TRIGGERS.items():
+        conn.exec_driver_sql(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def _install_after_create(target, connection, **kw) -> None:
+    # drop_all de stories/pbis/sprints (reinicio con RESET_DB_MODE=reseed) se lleva sus triggers
+    if maintained(connection):
+        install_triggers(connection)
+
+
+def aggregate(*where) -> Select:
+    """Los mismos totales calculados desde las historias (fuente de verdad de la reconstrucción)."""
+    priority = func.coalesce(stories.c.priority, NO_PRIORITY)
+    return (
+        select(
+            pbis.c.sprint_id,
+            priority.label('priority'),
+            stories.c.story_type,
+            func.count().label('stories'),
+            func.sum(func.coalesce(stories.c.story_points, 0)).label('story_points'),
+            func.sum(func.coalesce(stories.c.business_value, 0)).label('business_value'),
+        )
+        .join_from(stories, pbis, stories.c.pbi_id == pbis.c.id)
+        .where(pbis.c.sprint_id.is_not(None), *where)
+        .group_by(pbis.c.sprint_id, priority, stories.c.story_type)
+    )
+
+
+def rows_query(bind, sprint_id: int) -> Select:
+    """Filas (prioridad, tipo) del sprint: de la tabla de agregados o, sin triggers, de las historias."""
+    if maintained(bind):
+        return select(rollup).where(rollup.c.sprint_id == sprint_id)
+    return aggregate(pbis.c.sprint_id == sprint_id)
+
+
+def summarize(sprint_id: int, rows: Iterable[Any]) -> Dict[str, Any]:
+    """Totales del sprint y desglose por prioridad y por tipo (todos los valores, aunque sean 0)."""
+    def zero() -> Dict[str, int]:
+        return {'stories': 0, 'story_points': 0, 'business_value': 0}
+
+    total = zero()
+    # None: historias sin prioridad; siempre presente para que la forma no dependa de los datos
+    by_priority: Dict[Optional[int], Dict[str, int]] = {**{p.value: zero() for p in Priority}, None: zero()}
+    by_type: Dict[int, Dict[str, int]] = {t.value: zero() for t in StoryType}
+    for row in rows:
+        priority = None if row.priority == NO_PRIORITY else row.priority
+        for bucket in (total, by_priority.setdefault(priority, zero()), by_type.setdefault(row.story_type, zero())):
+            bucket['stories'] += row.stories
+            bucket['story_points'] += row.story_points
+            bucket['business_value'] += row.business_value
+    return {
+        'sprint_id': sprint_id,
+        **total,
+        'by_priority': [{'priority': p, **v} for p, v in by_priority.items()],
+        'by_story_type': [{'story_type': t, **v} for t, v in sorted(by_type.items())],
+    }
+
+
+def rebuild(conn: Connection, sprint_id: Optional[int] = None) -> int:
+    """Recalcula sprint_stats (entera o de un sprint) desde las historias. Devuelve las filas escritas."""
+    where = [pbis.c.sprint_id == sprint_id] if sprint_id is not None else []
+    delete = rollup.delete()
+    if sprint_id is not None:
+        delete = delete.where(rollup.c.sprint_id == sprint_id)
+    conn.execute(delete)
+    columns = ['sprint_id', 'priority', 'story_type', 'stories', 'story_points', 'business_value']
+    return conn.execute(insert(rollup).from_select(columns, aggregate(*where))).rowcount
+
+
+def drift(conn: Connection) -> List[int]:
+    """Sprints cuya fila de agregados no coincide con sus historias."""
+    stored = select(rollup.c.sprint_id, rollup.c.priority, rollup.c.story_type,
+                    rollup.c.stories, rollup.c.story_points, rollup.c.business_value)
+    expected = aggregate()
+    missing, extra = expected.except_(stored).subquery(), stored.except_(expected).subquery()
+    differing = union(select(missing.c.sprint_id), select(extra.c.sprint_id)).subquery()
+    return list(conn.execute(select(differing.c.sprint_id).order_by(differing.c.sprint_id)).scalars())
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Reconstruye los agregados de GET /sprints/{id}/stats")
+    parser.add_argument('--check', action='store_true', help="Solo informa de la deriva; código 1 si la hay")
+    parser.add_argument('--sprint', type=int, help="Reconstruye solo este sprint")
+    args = parser.parse_args()
+
+    from database import engine
+
+    with engine.connect() as conn:
+        differing = drift(conn)
+    if differing:
+        logger.warning(f"Agregados desfasados en {len(differing)} sprints: {differing[:20]}")
+    else:
+        logger.info("Agregados al día")
+    if args.check:
+        sys.exit(1 if differing else 0)
+
+    with engine.begin() as conn:
+        written = rebuild(conn, args.sprint)
+    logger.info(f"sprint_stats reconstruida: {written} filas")
+
+
+if __name__ == '__main__':
+    main()
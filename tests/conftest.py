@@ -0,0 +1,28 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# La aplicación lee su configuración al importarse: base SQLite temporal, sin tareas de fondo
+# ni caché de respuestas, y el presupuesto de SQL por ruta como error
+_tmp = tempfile.TemporaryDirectory(prefix='planning-tests-')
+os.environ.update({
+    'DATABASE_URL': f'sqlite:///{Path(_tmp.name) / "tests.db"}',
+    'OPENAI_API_KEY': 'tests',
+    'PRIORITY_RESCORE_ENABLED': 'false',
+    'MODEL_WATCH_INTERVAL_S': '0',
+    'RESPONSE_CACHE_ENABLED': 'false',
+    'SQL_BUDGET_MODE': 'raise',
+})
+for _name in ('READ_DATABASE_URL', 'ASYNC_DATABASE_URL'):
+    os.environ.pop(_name, None)
+
+
+@pytest.fixture(scope='session')
+def client():
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,52 @@
+from services import bulk_import
+
+
+def _import(client, body: str, **params):
+    return client.post('/import', content=body, params=params, headers={'content-type': 'text/csv'})
+
+
+def _stories(client, sprint: str):
+    sprints = client.get('/sprints/sprints/?depth=2').json()
+    pbis = next(s for s in sprints if s['name'] == sprint)['pbis']
+    return sorted((story['title'], story['story_points']) for pbi in pbis for story in pbi['stories'])
+
+
+def test_repeated_story_in_a_chunk_is_reported(client):
+    response = _import(client, 'sprint,pbi,title,story_points\nS9,P9,h1,2\nS9,P9,h1,3\nS9,P9,h2,1\n')
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report['rows'], report['stories'], report['skipped']) == (3, 2, 1)
+    assert report['errors'] == [{'line': 3, 'error': 'historia repetida: misma clave que la línea 2'}]
+    assert _stories(client, 'S9') == [('h1', 2), ('h2', 1)]
+
+
+def test_out_of_range_integer_is_a_row_error(client):
+    response = _import(client, 'sprint,pbi,title,story_points\nS8,P8,h1,2\nS8,P8,h2,99999999999999999999999\n',
+                       chunk_size=1)
+
+    assert response.status_code == 200
+    assert response.json()['errors'] == [{'line': 3, 'error': "story_points: valor fuera de rango '99999999999999999999999'"}]
+    assert _stories(client, 'S8') == [('h1', 2)]
+
+
+def test_database_error_discards_only_its_chunk(client, monkeypatch):
+    upsert = bulk_import._upsert
+
+    def failing_upsert(conn, table, rows, update=True):
+        ids = upsert(conn, table, rows, update)
+        if any(row.get('title') == 'falla' for row in rows):
+            raise OverflowError('Python int too large to convert to SQLite INTEGER')
+        return ids
+
+    monkeypatch.setattr(bulk_import, '_upsert', failing_upsert)
+    response = _import(client, 'sprint,pbi,title\nS7a,P7,h1\nS7b,P7,falla\nS7b,P7,h2\n', chunk_size=1)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report['rows'], report['stories'], report['skipped'], report['chunks']) == (3, 2, 1, 2)
+    assert report['errors'] == [{'line': 3, 'last_line': 3, 'error': 'Bloque deshecho por un error de la base de '
+                                 'datos: Python int too large to convert to SQLite INTEGER'}]
+    # El sprint y el PBI del bloque deshecho se vuelven a crear con el bloque siguiente
+    assert _stories(client, 'S7a') == [('h1', None)]
+    assert _stories(client, 'S7b') == [('h2', None)]
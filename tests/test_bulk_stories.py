@@ -0,0 +1,84 @@
+def _pbi(client) -> int:
+    sprint = client.post('/sprints/sprints/', json={'name': 'Sprint bulk'}).json()
+    return client.post('/pbis/pbis/', json={'title': 'PBI bulk', 'sprint_id': sprint['id']}).json()['id']
+
+
+def test_invalid_items_are_reported_and_valid_ones_created(client):
+    pbi_id = _pbi(client)
+    payload = [
+        {'title': 'Válida', 'story_points': 3},
+        {'story_points': 5},
+        'no es un objeto',
+        {'title': 'Otra válida', 'story_type': 2},
+    ]
+    response = client.post(f'/stories/stories/bulk/{pbi_id}', json=payload)
+
+    assert response.status_code == 201
+    body = response.json()
+    assert (body['succeeded'], body['failed']) == (2, 2)
+    results = body['results']
+    assert [r['index'] for r in results] == [0, 1, 2, 3]
+    assert [r['ok'] for r in results] == [True, False, False, True]
+    assert results[1]['error'].startswith('title:')
+    assert results[1]['id'] is None and results[2]['id'] is None
+
+    stories = client.get(f'/stories/stories/by_pbi/{pbi_id}').json()
+    assert sorted(s['id'] for s in stories) == sorted([results[0]['id'], results[3]['id']])
+    assert {s['title'] for s in stories} == {'Válida', 'Otra válida'}
+
+
+def test_all_invalid_items_create_nothing(client):
+    pbi_id = _pbi(client)
+    response = client.post(f'/stories/stories/bulk/{pbi_id}', json=[{}, {'title': None}])
+
+    assert response.status_code == 201
+    assert response.json()['succeeded'] == 0
+    assert client.get(f'/stories/stories/by_pbi/{pbi_id}').json() == []
+
+
+def test_unknown_pbi(client):
+    assert client.post('/stories/stories/bulk/999999', json=[{'title': 'x'}]).status_code == 404
+
+
+def test_rows_rejected_by_the_database_are_reported_per_item(client):
+    pbi_id = _pbi(client)
+    payload = [{'title': 'Antes'}, {'title': 'Desborda', 'story_points': 2 ** 70}, {'title': 'Después'}]
+    response = client.post(f'/stories/stories/bulk/{pbi_id}', json=payload)
+
+    assert response.status_code == 201
+    results = response.json()['results']
+    assert [r['ok'] for r in results] == [True, False, True]
+    assert results[1] == {'index': 1, 'id': None, 'ok': False, 'error': 'Database error'}
+    titles = {s['title'] for s in client.get(f'/stories/stories/by_pbi/{pbi_id}').json()}
+    assert titles == {'Antes', 'Después'}
+
+
+def test_update_reports_invalid_and_rejected_items(client):
+    pbi_id = _pbi(client)
+    created = client.post(f'/stories/stories/bulk/{pbi_id}', json=[{'title': f'H{k}'} for k in range(4)]).json()
+    ids = [r['id'] for r in created['results']]
+    payload = [
+        {'id': ids[0], 'story_points': 8},
+        {'id': ids[1], 'criticity': 99},
+        {'id': ids[2], 'story_points': 2 ** 70},
+        {'id': 999999, 'title': 'No existe'},
+        {'id': ids[3], 'title': 'Renombrada'},
+        {'title': 'Sin id'},
+    ]
+    response = client.patch('/stories/stories/bulk', json=payload)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['succeeded'], body['failed']) == (2, 4)
+    results = body['results']
+    assert [r['index'] for r in results] == list(range(6))
+    assert [r['ok'] for r in results] == [True, False, False, False, True, False]
+    assert results[1]['error'].startswith('criticity:')
+    assert results[2] == {'index': 2, 'id': ids[2], 'ok': False, 'error': 'Database error'}
+    assert results[3]['error'] == 'Story not found'
+    assert results[5]['error'].startswith('id:')
+
+    stories = {s['id']: s for s in client.get(f'/stories/stories/by_pbi/{pbi_id}').json()}
+    assert stories[ids[0]]['story_points'] == 8
+    assert stories[ids[1]]['criticity'] is None and stories[ids[2]]['story_points'] is None
+    assert stories[ids[3]]['title'] == 'Renombrada'
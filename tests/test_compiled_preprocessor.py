@@ -0,0 +1,32 @@
+import joblib
+import numpy as np
+import pytest
+
+from services.ai_services import MODEL_DIR, MODEL_NAME, _parity_rows
+from services.compiled_preprocessor import check_parity, compile_preprocessor
+
+
+@pytest.fixture(scope='module')
+def preprocessor():
+    return joblib.load(MODEL_DIR / f'{MODEL_NAME}.pkl')['preprocessor']
+
+
+@pytest.fixture(scope='module')
+def compiled(preprocessor):
+    compiled = compile_preprocessor(preprocessor)
+    assert compiled is not None, 'El preprocesador del modelo publicado no se puede compilar'
+    return compiled
+
+
+def test_matches_preprocessor_transform(compiled, preprocessor):
+    report = check_parity(compiled, preprocessor, *_parity_rows(compiled, n=1000, seed=1))
+    assert report['ok'], report
+    assert report['rows'] == 1000
+
+
+def test_transform_one_matches_transform(compiled):
+    numeric, story_types = _parity_rows(compiled, n=50, seed=2)
+    batch = compiled.transform(numeric, story_types)
+    for i in range(len(story_types)):
+        # Misma tolerancia que check_parity: NumPy vectoriza distinto una fila y un lote
+        np.testing.assert_allclose(compiled.transform_one(numeric[i], story_types[i])[0], batch[i], rtol=0, atol=1e-12)
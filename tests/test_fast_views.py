@@ -0,0 +1,116 @@
+from datetime import date
+from typing import Dict, List, Tuple
+
+import pytest
+from sqlalchemy import insert
+
+import fast_views
+import main
+import models
+from benchmarks.data import LARGE_SPRINT_PBIS
+from database import engine
+
+MISSING = 10 ** 9
+
+
+def _sprint(conn, **values) -> int:
+    return conn.execute(insert(models.Sprint).values(**values).returning(models.Sprint.id)).scalar_one()
+
+
+def _pbis(conn, rows: List[dict]) -> List[int]:
+    return conn.execute(
+        insert(models.PBI).returning(models.PBI.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+
+@pytest.fixture(scope='module')
+def dataset() -> Tuple[List[int], List[int]]:
+    """Sprints con fechas, uno con más PBIs que un lote de selectinload y casos límite: sprint sin
+    PBIs ni fechas, PBI sin historias y textos con caracteres a escapar."""
+    with engine.begin() as conn:
+        sprint_ids, pbi_ids = [], []
+        for k in range(2):
+            sprint = _sprint(conn, name=f'Sprint {k}', start_date=date(2025, 1, 1 + 14 * k),
+                             end_date=date(2025, 1, 14 + 14 * k))
+            pbis = _pbis(conn, [{'title': f'PBI {k}.{i}', 'description': f'Descripción {i}', 'sprint_id': sprint}
+                                for i in range(4)])
+            conn.execute(insert(models.Story), [
+                {'title': f'Historia {p}.{i}', 'pbi_id': p, 'story_type': 1 + i % 2, 'criticity': 1 + i,
+                 'priority': i % 3, 'story_points': i, 'business_value': 10 * i, 'raw_description': f'Texto {i}'}
+                for p in pbis for i in range(3)
+            ])
+            sprint_ids.append(sprint)
+            pbi_ids += pbis[:2]
+
+        large = _sprint(conn, name='Sprint grande')
+        pbis = _pbis(conn, [{'title': f'PBI grande {i}', 'sprint_id': large} for i in range(LARGE_SPRINT_PBIS)])
+        conn.execute(insert(models.Story), [{'title': f'Historia {p}', 'pbi_id': p} for p in pbis])
+
+        empty = _sprint(conn, name='Sprint vacío "ñandú" ✓')
+        edge = _sprint(conn, name='Sprint\tlímite\n\u0001')
+        pbi_ids += _pbis(conn, [{'title': 'PBI sin historias', 'sprint_id': edge},
+                                {'title': 'PBI \\ "raro"', 'description': 'línea\nsiguiente 😀', 'sprint_id': edge}])
+        conn.execute(insert(models.Story), [
+            {'title': 'Historia mínima', 'pbi_id': pbi_ids[-1], 'story_type': 1},
+            {'title': 'Historia completa', 'pbi_id': pbi_ids[-1], 'story_type': 3, 'criticity': 5, 'priority': 2,
+             'story_points': 0, 'business_value': 0, 'complexity': 0, 'continuation': 1,
+             'internal_dependencies': 2, 'raw_description': '</script> &  ', 'formatted_description': '',
+             'acceptance_criteria': 'a\r\nb'},
+        ])
+    return sprint_ids + [large, empty, edge], pbi_ids
+
+
+def _urls(sprint_ids: List[int], pbi_ids: List[int]) -> List[str]:
+    """Cada GET de sprints, PBIs e historias: profundidad, fields, paginación y 404."""
+    urls = []
+    for depth in (0, 1, 2):
+        urls.append(f'/sprints/sprints/?depth={depth}')
+        urls.append(f'/sprints/sprints/?depth={depth}&limit=3&after_id={sprint_ids[0]}')
+        urls.append(f'/sprints/sprints/?depth={depth}&fields=end_date,name')
+        for sprint_id in sprint_ids + [MISSING]:
+            urls.append(f'/sprints/sprints/{sprint_id}?depth={depth}')
+        urls.append(f'/sprints/sprints/{sprint_ids[-1]}?depth={depth}&fields=start_date')
+    for depth in (0, 1):
+        for sprint_id in sprint_ids + [MISSING]:
+            urls.append(f'/pbis/pbis/by_sprint/{sprint_id}?depth={depth}')
+            urls.append(f'/pbis/pbis/by_sprint/{sprint_id}?depth={depth}&limit=2&after_id=1')
+            urls.append(f'/pbis/pbis/by_sprint/{sprint_id}?depth={depth}&fields=description')
+        for pbi_id in pbi_ids + [MISSING]:
+            urls.append(f'/pbis/pbis/{pbi_id}?depth={depth}')
+            urls.append(f'/pbis/pbis/{pbi_id}?depth={depth}&fields=sprint_id,title')
+    for pbi_id in pbi_ids + [MISSING]:
+        urls.append(f'/stories/stories/by_pbi/{pbi_id}')
+        urls.append(f'/stories/stories/by_pbi/{pbi_id}?limit=3&after_id=2')
+    return urls
+
+
+@pytest.fixture
+def fast_json():
+    """Restaura FAST_JSON_ENABLED y el esquema OpenAPI generado al terminar."""
+    enabled = fast_views.FAST_JSON_ENABLED
+    yield
+    fast_views.FAST_JSON_ENABLED = enabled
+    main.app.openapi_schema = None
+
+
+def _get(client, url: str, fast: bool) -> Dict[str, object]:
+    fast_views.FAST_JSON_ENABLED = fast
+    response = client.get(url)
+    return {'status': response.status_code, 'content-type': response.headers.get('content-type'),
+            'etag': response.headers.get('etag'), 'body': response.content}
+
+
+# El camino rápido debe devolver los mismos bytes que response_model: si no, el ETag cambia al
+# activar o desactivar el flag y los clientes pierden sus 304
+
+def test_fast_path_responses_are_identical(client, dataset, fast_json):
+    differing = [url for url in _urls(*dataset) if _get(client, url, False) != _get(client, url, True)]
+    assert differing == []
+
+
+def test_fast_path_keeps_openapi_schema(client, fast_json):
+    schemas = {}
+    for fast in (False, True):
+        main.app.openapi_schema = None
+        schemas[fast] = _get(client, '/openapi.json', fast)
+    assert schemas[False] == schemas[True]
@@ -0,0 +1,11 @@
+import import_report
+
+
+def test_import_main_within_budget_and_without_lazy_modules():
+    # Mejor de tres, como `python import_report.py --check`, para no medir la caché de disco fría
+    runs = [import_report.measure('main') for _ in range(3)]
+    total, _, loaded = min(runs, key=lambda run: run[0])
+
+    assert loaded == [], f"Dependencias diferidas cargadas al importar main: {loaded}"
+    assert 0 < total <= import_report.IMPORT_BUDGET_S, \
+        f"import main: {total:.3f}s > {import_report.IMPORT_BUDGET_S}s"
@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+import models
+from create_db import seed_pbis_and_stories, seed_sprints
+from migrations import run_migrations
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "seed.db"}')
+    models.Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with Session(bind=engine) as session:
+        seed_sprints(session)
+        seed_pbis_and_stories(session)
+        yield session
+    engine.dispose()
+
+
+def _story(session, title: str) -> models.Story:
+    return session.scalars(select(models.Story).where(models.Story.title == title)).one()
+
+
+def test_seeding_again_keeps_user_edits(session):
+    story = _story(session, 'Usuario puede iniciar sesión')
+    story.story_points, story.priority = 99, 2
+    sprint = session.scalars(select(models.Sprint).where(models.Sprint.name == 'Sprint 1')).one()
+    sprint.end_date = date(2025, 5, 31)
+    session.commit()
+
+    seed_sprints(session)
+    seed_pbis_and_stories(session)
+    session.expire_all()
+
+    story = _story(session, 'Usuario puede iniciar sesión')
+    assert (story.story_points, story.priority) == (99, 2)
+    assert session.get(models.Sprint, sprint.id).end_date == date(2025, 5, 31)
+
+
+def test_seeding_again_restores_missing_rows_without_duplicates(session):
+    total = session.scalar(select(func.count()).select_from(models.Story))
+    session.delete(_story(session, 'Editar perfil'))
+    session.commit()
+
+    seed_sprints(session)
+    seed_pbis_and_stories(session)
+
+    assert session.scalar(select(func.count()).select_from(models.Story)) == total
+    assert session.scalar(select(func.count()).select_from(models.Sprint)) == 2
+    assert _story(session, 'Editar perfil').story_points == 3
@@ -0,0 +1,99 @@
+from collections import Counter
+
+import sprint_stats
+from database import engine
+
+STORIES = [
+    {'title': 'Alta', 'story_points': 5, 'business_value': 8, 'criticity': 5, 'story_type': 1, 'priority': 2},
+    {'title': 'Técnica', 'story_points': 3, 'business_value': 2, 'criticity': 2, 'story_type': 2},
+    {'title': 'Error', 'story_points': 1, 'business_value': 1, 'criticity': 3, 'story_type': 3},
+    {'title': 'Sin puntos', 'criticity': 1},
+]
+
+
+def _create(client, path: str, **payload) -> int:
+    response = client.post(path, json=payload)
+    assert response.status_code == 201
+    return response.json()['id']
+
+
+def _bulk(client, pbi_id: int) -> list:
+    return [r['id'] for r in client.post(f'/stories/stories/bulk/{pbi_id}', json=STORIES).json()['results']]
+
+
+def _expected(client, sprint_id: int) -> dict:
+    """Los totales del endpoint calculados a partir de las historias del sprint."""
+    sprint = client.get(f'/sprints/sprints/{sprint_id}?depth=2').json()
+    stories = [story for pbi in sprint['pbis'] for story in pbi['stories']]
+    points = Counter()
+    for story in stories:
+        for key in (('priority', story['priority']), ('story_type', story['story_type'])):
+            points[key + ('stories',)] += 1
+            points[key + ('story_points',)] += story['story_points'] or 0
+            points[key + ('business_value',)] += story['business_value'] or 0
+    return {
+        'stories': len(stories),
+        'story_points': sum(story['story_points'] or 0 for story in stories),
+        'business_value': sum(story['business_value'] or 0 for story in stories),
+        'by_priority': {p: tuple(points['priority', p, k] for k in ('stories', 'story_points', 'business_value'))
+                        for p in (0, 1, 2, None)},
+        'by_story_type': {t: tuple(points['story_type', t, k] for k in ('stories', 'story_points', 'business_value'))
+                          for t in (1, 2, 3)},
+    }
+
+
+def _stats(client, sprint_id: int) -> dict:
+    response = client.get(f'/sprints/sprints/{sprint_id}/stats')
+    assert response.status_code == 200
+    stats = response.json()
+    return {
+        'stories': stats['stories'],
+        'story_points': stats['story_points'],
+        'business_value': stats['business_value'],
+        'by_priority': {b['priority']: (b['stories'], b['story_points'], b['business_value'])
+                        for b in stats['by_priority']},
+        'by_story_type': {b['story_type']: (b['stories'], b['story_points'], b['business_value'])
+                          for b in stats['by_story_type']},
+    }
+
+
+def test_priority_buckets_do_not_depend_on_the_data(client):
+    sprint = _create(client, '/sprints/sprints/', name='Stats vacío')
+    assert [b['priority'] for b in client.get(f'/sprints/sprints/{sprint}/stats').json()['by_priority']] == [0, 1, 2, None]
+
+
+def test_triggers_follow_every_write_path(client):
+    first = _create(client, '/sprints/sprints/', name='Stats A')
+    second = _create(client, '/sprints/sprints/', name='Stats B')
+    kept = _create(client, '/pbis/pbis/', title='Se queda', sprint_id=first)
+    moved = _create(client, '/pbis/pbis/', title='Se mueve', sprint_id=first)
+    deleted = _create(client, '/pbis/pbis/', title='Se borra', sprint_id=second)
+    stories = _bulk(client, kept)
+    _bulk(client, moved)
+    _bulk(client, deleted)
+    _create(client, f'/stories/stories/{kept}', title='Suelta', story_points=2, business_value=4)
+
+    assert client.put(f'/stories/stories/{stories[1]}',
+                      json={'story_points': 13, 'story_type': 1, 'priority': 0}).status_code == 200
+    assert client.delete(f'/stories/stories/{stories[2]}').status_code == 204
+    assert client.patch('/stories/stories/bulk', json=[{'id': stories[0], 'business_value': 20}]).json()['failed'] == 0
+    assert client.put(f'/pbis/pbis/{moved}', json={'sprint_id': second}).status_code == 200
+    assert client.delete(f'/pbis/pbis/{deleted}').status_code == 204
+    assert client.post(f'/ml/ml/calcular_prioridades/{first}/').status_code == 200
+    # Reimportar actualiza con ON CONFLICT DO UPDATE: también pasa por los triggers de UPDATE
+    for points, priority in ((8, ''), (21, 2)):
+        response = client.post('/import', content=(
+            'sprint,pbi,title,story_points,business_value,story_type,priority\n'
+            f'Stats importado,Importado,Nueva,{points},5,bug,{priority}\n'
+            'Stats importado,Importado,Otra,1,1,user,0\n'
+        ), headers={'content-type': 'text/csv'})
+        assert response.status_code == 200 and response.json()['errors'] == []
+    imported = next(s['id'] for s in client.get('/sprints/sprints/?depth=0').json() if s['name'] == 'Stats importado')
+
+    with engine.connect() as conn:
+        assert sprint_stats.drift(conn) == []
+    for sprint in (first, second, imported):
+        assert _stats(client, sprint) == _expected(client, sprint)
+    # Tras calcular prioridades no quedan historias sin prioridad, pero el desglose sigue con 4 entradas
+    assert _stats(client, first)['by_priority'][None] == (0, 0, 0)
+    assert _stats(client, imported)['by_priority'][2] == (1, 21, 5)
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import insert
+
+import models
+from benchmarks.data import LARGE_SPRINT_PBIS
+from database import engine
+
+
+@pytest.fixture
+def large_sprint() -> int:
+    """Sprint con más PBIs que un lote de selectinload (500 ids), con una historia en cada uno."""
+    with engine.begin() as conn:
+        sprint_id = conn.execute(
+            insert(models.Sprint).values(name='Sprint grande').returning(models.Sprint.id)
+        ).scalar_one()
+        pbi_ids = conn.execute(
+            insert(models.PBI).returning(models.PBI.id, sort_by_parameter_order=True),
+            [{'title': f'PBI {k}', 'sprint_id': sprint_id} for k in range(LARGE_SPRINT_PBIS)],
+        ).scalars().all()
+        conn.execute(insert(models.Story), [{'title': f'Historia {p}', 'pbi_id': p} for p in pbi_ids])
+    return sprint_id
+
+
+def _assert_full(sprint: dict) -> None:
+    assert len(sprint['pbis']) == LARGE_SPRINT_PBIS
+    assert all(len(pbi['stories']) == 1 and pbi['stories'][0]['title'] == f"Historia {pbi['id']}"
+               for pbi in sprint['pbis'])
+
+
+# SQL_BUDGET_MODE=raise (conftest.py): una ruta que supere su presupuesto responde 500
+
+def test_get_large_sprint_within_budget(client, large_sprint):
+    response = client.get(f'/sprints/sprints/{large_sprint}?depth=2')
+    assert response.status_code == 200
+    _assert_full(response.json())
+
+
+def test_sprint_page_with_large_sprint_within_budget(client, large_sprint):
+    response = client.get(f'/sprints/sprints/?limit=5&depth=2&after_id={large_sprint - 1}')
+    assert response.status_code == 200
+    page = response.json()
+    assert page[0]['id'] == large_sprint
+    _assert_full(page[0])
+
+
+def test_update_large_sprint_within_budget(client, large_sprint):
+    response = client.put(f'/sprints/sprints/{large_sprint}', json={'name': 'Renombrado'})
+    assert response.status_code == 200
+    assert response.json()['name'] == 'Renombrado'
+    _assert_full(response.json())
+
+
+def test_delete_large_sprint_within_budget(client, large_sprint):
+    assert client.delete(f'/sprints/sprints/{large_sprint}').status_code == 204
+    assert client.get(f'/sprints/sprints/{large_sprint}').status_code == 404
+    with engine.connect() as conn:
+        orphans = conn.exec_driver_sql(
+            'SELECT COUNT(*) FROM stories WHERE pbi_id NOT IN (SELECT id FROM pbis)'
+        ).scalar_one()
+    assert orphans == 0
+
+
+@pytest.fixture
+def many_sprints() -> list:
+    """Más sprints que un lote de selectinload, con un PBI y una historia cada uno."""
+    with engine.begin() as conn:
+        sprint_ids = conn.execute(
+            insert(models.Sprint).returning(models.Sprint.id, sort_by_parameter_order=True),
+            [{'name': f'Sprint {k}'} for k in range(LARGE_SPRINT_PBIS)],
+        ).scalars().all()
+        pbi_ids = conn.execute(
+            insert(models.PBI).returning(models.PBI.id, sort_by_parameter_order=True),
+            [{'title': f'PBI de {s}', 'sprint_id': s} for s in sprint_ids],
+        ).scalars().all()
+        conn.execute(insert(models.Story), [{'title': f'Historia {p}', 'pbi_id': p} for p in pbi_ids])
+    return sprint_ids
+
+
+def test_unpaged_sprint_list_within_budget(client, many_sprints, large_sprint):
+    response = client.get('/sprints/sprints/?depth=2')
+    assert response.status_code == 200
+    sprints = {sprint['id']: sprint for sprint in response.json()}
+    assert all(len(sprints[s]['pbis']) == 1 and len(sprints[s]['pbis'][0]['stories']) == 1 for s in many_sprints)
+    _assert_full(sprints[large_sprint])
+
+
+def test_unpaged_pbi_list_within_budget(client, large_sprint):
+    response = client.get(f'/pbis/pbis/by_sprint/{large_sprint}?depth=1')
+    assert response.status_code == 200
+    _assert_full({'pbis': response.json()})
@@ -0,0 +1,29 @@
+import os
+import socket
+from pathlib import Path
+
+import pytest
+
+import worker_memory
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, 'fork') or not Path('/proc/self/smaps_rollup').exists(),
+    reason='Requiere fork() y /proc/<pid>/smaps_rollup (Linux)',
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_preloading_the_model_lowers_total_pss():
+    separate = worker_memory.measure(2, _free_port(), preload=False, requests=40, timeout=120)
+    shared = worker_memory.measure(2, _free_port(), preload=True, requests=40, timeout=120)
+
+    # Padre y los dos workers en ambos modos
+    assert len(separate) == len(shared) == 3
+    separate_pss = sum(row['Pss'] for row in separate)
+    shared_pss = sum(row['Pss'] for row in shared)
+    assert shared_pss < separate_pss, f'PSS total {shared_pss} KiB con precarga, {separate_pss} KiB sin ella'
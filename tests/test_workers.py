@@ -0,0 +1,91 @@
+import os
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import models
+import response_cache
+from database import SessionLocal
+from services import describe_jobs
+
+
+def _sprint(client) -> int:
+    return client.post('/sprints/sprints/', json={'name': 'Sprint workers'}).json()['id']
+
+
+def _wait_finished(client, job_id: str) -> dict:
+    for _ in range(100):
+        job = client.get(f'/ml/ml/jobs/{job_id}').json()
+        if job['status'] in describe_jobs.FINISHED:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'El trabajo {job_id} no termina')
+
+
+def _store(job_id: str, sprint_id: int, status: str, age_s: float) -> None:
+    db = SessionLocal.session_factory()
+    try:
+        job = describe_jobs.DescribeJob(id=job_id, sprint_id=sprint_id, concurrency=1, story_ids=[1], status=status)
+        db.add(models.DescribeJobRecord(
+            id=job_id, sprint_id=sprint_id, status=status, state=json.dumps(job.to_dict()),
+            updated_at=datetime.utcnow() - timedelta(seconds=age_s),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_job_progress_is_served_by_a_worker_that_did_not_start_it(client):
+    sprint_id = _sprint(client)
+    job_id = client.post(f'/ml/ml/sprints/{sprint_id}/describir_todo').json()['job_id']
+    assert _wait_finished(client, job_id)['status'] == describe_jobs.COMPLETED
+
+    # Otro worker no tiene el trabajo en memoria: lo lee de describe_jobs
+    with describe_jobs._lock:
+        describe_jobs._jobs.clear()
+    job = client.get(f'/ml/ml/jobs/{job_id}')
+    assert job.status_code == 200
+    assert job.json()['status'] == describe_jobs.COMPLETED
+    assert client.get('/ml/ml/jobs/no-existe').status_code == 404
+
+
+def test_job_running_in_another_worker_is_not_started_twice(client):
+    sprint_id = _sprint(client)
+    _store('a' * 32, sprint_id, describe_jobs.RUNNING, age_s=0)
+
+    response = client.post(f'/ml/ml/sprints/{sprint_id}/describir_todo')
+    assert response.json()['job_id'] == 'a' * 32
+
+
+def test_job_of_a_dead_worker_is_reported_failed(client):
+    sprint_id = _sprint(client)
+    _store('b' * 32, sprint_id, describe_jobs.RUNNING, age_s=describe_jobs.DESCRIBE_JOB_STALE_S + 1)
+
+    assert client.get(f'/ml/ml/jobs/{"b" * 32}').json()['status'] == describe_jobs.FAILED
+    response = client.post(f'/ml/ml/sprints/{sprint_id}/describir_todo')
+    assert response.json()['job_id'] != 'b' * 32
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Requiere fork()')
+def test_invalidation_in_one_worker_reaches_the_others(monkeypatch):
+    monkeypatch.setattr(response_cache, 'RESPONSE_CACHE_ENABLED', True)
+    monkeypatch.setattr(response_cache, '_shared', None)
+    monkeypatch.setattr(response_cache, '_seen', 0)
+    response_cache.share_across_workers()
+    generation = response_cache.current_generation()
+    response_cache.put(response_cache.SPRINT_SCOPE, 1, 'v', b'{"name":"viejo"}', generation)
+    assert response_cache.get(response_cache.SPRINT_SCOPE, 1, 'v') is not None
+
+    pid = os.fork()
+    if pid == 0:
+        # Otro worker confirma una escritura en un sprint distinto
+        response_cache.invalidate_sprint(2)
+        os._exit(0)
+    assert os.waitpid(pid, 0)[1] == 0
+
+    assert response_cache.get(response_cache.SPRINT_SCOPE, 1, 'v') is None
+    # Una respuesta construida antes de la invalidación ajena no se cachea
+    response_cache.put(response_cache.SPRINT_SCOPE, 1, 'v', b'{"name":"viejo"}', generation)
+    assert response_cache.get(response_cache.SPRINT_SCOPE, 1, 'v') is None
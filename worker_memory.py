@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Memoria por worker de `serve.py` con y sin el modelo precargado en el proceso padre (Linux).
+
+    python worker_memory.py --workers 4
+
+Arranca el servidor en cada modo, lanza unas peticiones de prioridad, espera a que la memoria
+de los workers se estabilice y lee /proc/<pid>/smaps_rollup. RSS cuenta entera cada página
+compartida en cada proceso; PSS la reparte entre quienes la comparten, así que la suma de PSS
+(padre incluido) es la memoria real del conjunto. Sale con código 1 si precargar no reduce esa suma.
+Usa la base de datos de DATABASE_URL (las migraciones se aplican al arrancar).
+"""
+import os
+import sys
+import time
+import signal
+import logging
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+ROOT = Path(__file__).parent
+PAYLOAD = {
+    'story_points': 5, 'business_value': 3, 'criticidad': 4,
+    'internal_dependencies': 0, 'continuation': 0, 'story_type': 'user',
+}
+
+
+def smaps(pid: int) -> Dict[str, int]:
+    """Campos de /proc/<pid>/smaps_rollup en KiB."""
+    fields: Dict[str, int] = {}
+    for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines()[1:]:
+        name, value = line.split(':', 1)
+        fields[name] = int(value.split()[0])
+    return fields
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        return [int(p) for p in Path(f'/proc/{pid}/task/{pid}/children').read_text().split()]
+    except FileNotFoundError:
+        return []
+
+
+def _wait_ready(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f'{base_url}/docs', timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f'El servidor no respondió en {timeout}s')
+
+
+def _wait_stable(pids: List[int], timeout: float, tolerance_kb: int = 1024) -> None:
+    """Espera a que el RSS de todos los workers deje de crecer (carga del modelo, imports)."""
+    deadline = time.monotonic() + timeout
+    previous = None
+    while time.monotonic() < deadline:
+        current = [smaps(pid)['Rss'] for pid in pids]
+        if previous is not None and all(abs(a - b) <= tolerance_kb for a, b in zip(current, previous)):
+            return
+        previous = current
+        time.sleep(1)
+
+
+def measure(workers: int, port: int, preload: bool, requests: int, timeout: float) -> List[Dict[str, int]]:
+    env = {**os.environ, 'SERVE_PRELOAD_MODEL': 'true' if preload else 'false', 'MODEL_WATCH_INTERVAL_S': '0'}
+    proc = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        _wait_ready(base_url, timeout)
+        deadline = time.monotonic() + timeout
+        while len(_children(proc.pid)) < workers and time.monotonic() < deadline:
+            time.sleep(0.2)
+        pids = _children(proc.pid)
+
+        # Peticiones concurrentes para que varios workers ejecuten predicciones
+        with httpx.Client(base_url=base_url, timeout=30) as client, ThreadPoolExecutor(workers * 2) as pool:
+            statuses = list(pool.map(lambda _: client.post('/ml/ml/prioridad/', json=PAYLOAD).status_code,
+                                     range(requests)))
+        if any(code != 200 for code in statuses):
+            logger.warning(f"Peticiones con error: {[c for c in statuses if c != 200][:5]}")
+
+        _wait_stable(pids, timeout)
+        # El padre también cuenta: conserva las páginas que comparte con los workers
+        return [{'pid': proc.pid, **smaps(proc.pid)}] + [{'pid': pid, **smaps(pid)} for pid in pids]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _report(title: str, rows: List[Dict[str, int]]) -> int:
+    print(f"\n{title}")
+    print(f"{'':>8}{'pid':>8}{'RSS MiB':>10}{'PSS MiB':>10}{'compart.':>10}{'privada':>10}")
+    for i, row in enumerate(rows):
+        shared = row['Shared_Clean'] + row['Shared_Dirty']
+        private = row['Private_Clean'] + row['Private_Dirty']
+        label = 'padre' if i == 0 else f'worker {i - 1}'
+        print(f"{label:>8}{row['pid']:>8}{row['Rss'] / 1024:>10.1f}{row['Pss'] / 1024:>10.1f}"
+              f"{shared / 1024:>10.1f}{private / 1024:>10.1f}")
+    total_pss = sum(row['Pss'] for row in rows)
+    print(f"{'total':>8}{'':>8}{sum(row['Rss'] for row in rows) / 1024:>10.1f}{total_pss / 1024:>10.1f}")
+    return total_pss
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria por worker con y sin modelo precargado")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8123)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    if not Path('/proc/self/smaps_rollup').exists():
+        logger.error("Se necesita /proc/<pid>/smaps_rollup (Linux)")
+        sys.exit(1)
+
+    separate = _report("Cada worker carga su modelo",
+                       measure(args.workers, args.port, False, args.requests, args.timeout))
+    shared = _report("Modelo precargado antes del fork",
+                     measure(args.workers, args.port, True, args.requests, args.timeout))
+    print(f"\nPSS total: {separate / 1024:.1f} MiB -> {shared / 1024:.1f} MiB "
+          f"({(separate - shared) / 1024:.1f} MiB menos)")
+    if shared >= separate:
+        logger.error("Precargar el modelo no reduce la memoria total de los workers")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()